@@ -0,0 +1,77 @@
+import time
+from typing import Any, Dict, List
+
+from strands.hooks import (
+    AfterModelCallEvent,
+    AfterToolCallEvent,
+    BeforeModelCallEvent,
+    BeforeToolCallEvent,
+    HookProvider,
+    HookRegistry,
+)
+
+from metrics import metrics
+from conversation import CompactingConversationManager, estimate_message_tokens
+from tool_output import ToolOutputGovernor
+
+class ToolMetricsHook(HookProvider):
+    """Records per-tool call latency and error counts into the process-wide metrics registry."""
+
+    def __init__(self) -> None:
+        self._started: Dict[str, float] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeToolCallEvent, self.before_tool_call)
+        registry.add_callback(AfterToolCallEvent, self.after_tool_call)
+
+    def before_tool_call(self, event: BeforeToolCallEvent) -> None:
+        self._started[event.tool_use["toolUseId"]] = time.perf_counter()
+
+    def after_tool_call(self, event: AfterToolCallEvent) -> None:
+        started = self._started.pop(event.tool_use["toolUseId"], None)
+        tool_name = event.tool_use["name"]
+        if started is not None:
+            metrics.observe("tool_latency_seconds", time.perf_counter() - started, tool=tool_name)
+        metrics.incr("tool_calls", tool=tool_name)
+        if event.exception is not None or (event.result or {}).get("status") == "error":
+            metrics.incr("tool_errors", tool=tool_name)
+
+class ModelMetricsHook(HookProvider):
+    """Records model call latency per agent into the process-wide metrics registry."""
+
+    def __init__(self) -> None:
+        self._started: Dict[int, float] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeModelCallEvent, self.before_model_call)
+        registry.add_callback(AfterModelCallEvent, self.after_model_call)
+
+    def before_model_call(self, event: BeforeModelCallEvent) -> None:
+        self._started[id(event.agent)] = time.perf_counter()
+
+    def after_model_call(self, event: AfterModelCallEvent) -> None:
+        started = self._started.pop(id(event.agent), None)
+        if started is not None:
+            metrics.observe("model_latency_seconds", time.perf_counter() - started, agent=event.agent.name)
+        if event.exception is not None:
+            metrics.incr("model_errors", agent=event.agent.name)
+
+class ConversationHook(HookProvider):
+    """
+    Before every model call, compacts the history of agents using a
+    CompactingConversationManager and records the history size per turn.
+    """
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeModelCallEvent, self.before_model_call)
+
+    def before_model_call(self, event: BeforeModelCallEvent) -> None:
+        agent = event.agent
+        if isinstance(agent.conversation_manager, CompactingConversationManager):
+            agent.conversation_manager.apply_management(agent)
+        metrics.observe("conversation_history_tokens", estimate_message_tokens(agent.messages), agent=agent.name)
+        metrics.observe("conversation_history_messages", len(agent.messages), agent=agent.name)
+
+def get_agent_hooks() -> List[HookProvider]:
+    """Hook providers attached to every agent built by the workflows."""
+    return [ToolMetricsHook(), ModelMetricsHook(), ToolOutputGovernor(), ConversationHook()]
@@ -0,0 +1,102 @@
+"""
+Checks that one process can multiplex many nemo_workflow runs on a single event loop.
+
+Runs one story, then N stories concurrently, each against its own synthetic repo with a
+scripted model that sleeps `--model-latency-ms` per call. If every agent step and tool runs
+without blocking the event loop, N concurrent stories finish in roughly the time of one.
+Exits 1 when the concurrent run takes longer than `--max-ratio` times the single run.
+
+Usage:
+    python -m benchmarks.concurrency_benchmark [--stories 8] [--model-latency-ms 300] [--max-ratio 1.5]
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from contextlib import ExitStack
+from typing import Any, Dict, List
+
+from models import set_model_factory
+from checkpoint import LocalCheckpointStore, WorkflowCheckpoint
+from benchmarks.e2e_benchmark import create_stub_mcp_clients
+from benchmarks.stub_model import ScriptedModel, active_script, build_nemo_script
+from benchmarks.synthetic_repo import create_synthetic_repo
+
+JIRA_STORY = "Add a `feature_flag_enabled(name)` helper that returns True for flags prefixed with `nemo_`."
+
+def prepare_story(index: int, num_files: int) -> Dict[str, Any]:
+    project_name = f"nemo-concurrency-{index}"
+    repo_path = f"/tmp/{project_name}"
+    jira_story_id = f"CONC-{index}"
+    target_file = create_synthetic_repo(repo_path, num_files=num_files, lines_per_file=100, seed=index)
+    return {
+        "project_name": project_name,
+        "jira_story_id": jira_story_id,
+        "script": build_nemo_script(repo_path, project_name, jira_story_id, target_file),
+    }
+
+async def run_story(story: Dict[str, Any], mcp_tools: Dict[str, List[Any]], checkpoint_dir: str) -> None:
+    from workflow import nemo_workflow
+
+    active_script.set(story["script"])  # Each story runs in its own task, so this stays local to it
+    checkpoint = WorkflowCheckpoint(LocalCheckpointStore(checkpoint_dir), key=story["project_name"])
+    checkpoint.reset()
+    await nemo_workflow(
+        story["project_name"], JIRA_STORY, story["jira_story_id"],
+        mcp_tools=mcp_tools, checkpoint=checkpoint
+    )
+
+async def timed_batch(stories: List[Dict[str, Any]], mcp_tools: Dict[str, List[Any]], checkpoint_dir: str) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*[run_story(story, mcp_tools, checkpoint_dir) for story in stories])
+    return time.perf_counter() - start
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    from workflow import list_mcp_tools
+
+    set_model_factory(lambda model_id: ScriptedModel(model_id=model_id, latency_seconds=args.model_latency_ms / 1000))
+    try:
+        with ExitStack() as stack, tempfile.TemporaryDirectory() as checkpoint_dir:
+            mcp_clients = create_stub_mcp_clients(args.mcp_latency_ms)
+            for client in mcp_clients.values():
+                stack.enter_context(client)
+            mcp_tools = list_mcp_tools(mcp_clients)
+
+            single_seconds = await timed_batch([prepare_story(0, args.num_files)], mcp_tools, checkpoint_dir)
+            stories = [prepare_story(i, args.num_files) for i in range(1, args.stories + 1)]
+            concurrent_seconds = await timed_batch(stories, mcp_tools, checkpoint_dir)
+    finally:
+        set_model_factory(None)
+
+    ratio = concurrent_seconds / single_seconds
+    return {
+        "stories": args.stories,
+        "model_latency_ms": args.model_latency_ms,
+        "single_seconds": round(single_seconds, 2),
+        "concurrent_seconds": round(concurrent_seconds, 2),
+        "ratio": round(ratio, 2),
+        "max_ratio": args.max_ratio,
+        "passed": ratio <= args.max_ratio,
+    }
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stories", type=int, default=8)
+    parser.add_argument("--num-files", type=int, default=20)
+    parser.add_argument("--model-latency-ms", type=float, default=300)
+    parser.add_argument("--mcp-latency-ms", type=float, default=0)
+    parser.add_argument("--max-ratio", type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+    if not report["passed"]:
+        print(f"❌ {args.stories} concurrent stories took {report['ratio']}x a single story (budget {args.max_ratio}x)")
+        return 1
+    print(f"✅ {args.stories} concurrent stories took {report['ratio']}x a single story")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
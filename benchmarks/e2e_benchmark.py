@@ -0,0 +1,163 @@
+"""
+Offline end-to-end benchmark of nemo_workflow.
+
+Runs the full pipeline against a synthetic repo with every external dependency replaced by a
+local stand-in, so the numbers measure the orchestration itself:
+- models: `ScriptedModel` replays scripted tool calls (benchmarks/stub_model.py)
+- MCP: Context7 / AWS docs stdio stand-ins (benchmarks/stub_mcp_server.py)
+- GitHub: `LocalGitHubPRManager` commits locally and writes the PR as JSON
+
+Reports wall time per step, tool and model call latency, and peak memory per step.
+
+Usage:
+    python -m benchmarks.e2e_benchmark [--num-files 50] [--lines-per-file 200] [--runs 3]
+        [--model-latency-ms 0] [--mcp-latency-ms 0] [--skip-review] [--output report.json]
+
+Set NEMO_LLM_CACHE_MODE=record (or replay) to measure runs served from the LLM cache, and
+NEMO_TOOL_CACHE_LOCATION=off to measure MCP documentation lookups without the tool cache.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import tracemalloc
+from contextlib import ExitStack
+from typing import Any, Dict, List
+
+from mcp import StdioServerParameters, stdio_client
+from strands.tools.mcp import MCPClient
+
+from metrics import metrics
+from llm_cache import llm_cache_stats
+from tool_cache import tool_cache_stats
+from models import set_model_factory
+from checkpoint import LocalCheckpointStore, WorkflowCheckpoint
+from benchmarks.local_github import LocalGitHubPRManager
+from benchmarks.stub_model import ScriptedModel, build_nemo_script
+from benchmarks.synthetic_repo import create_synthetic_repo
+
+STUB_MCP_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_mcp_server.py")
+
+PROJECT_NAME = "nemo-benchmark-repo"
+JIRA_STORY_ID = "BENCH-1"
+JIRA_STORY = "Add a `feature_flag_enabled(name)` helper that returns True for flags prefixed with `nemo_`."
+
+class MemoryTrackingCheckpoint(WorkflowCheckpoint):
+    """Records the traced memory peak since the previous step whenever a step completes."""
+
+    def save_step(self, step: str, **outputs: Any) -> None:
+        _, peak = tracemalloc.get_traced_memory()
+        metrics.observe("step_memory_peak_mb", peak / 1_000_000, step=step)
+        tracemalloc.reset_peak()
+        super().save_step(step, **outputs)
+
+def create_stub_mcp_clients(latency_ms: float) -> Dict[str, MCPClient]:
+    """Same keys as `workflow.create_mcp_clients`, backed by local stdio servers."""
+    def client(flavor: str) -> MCPClient:
+        params = StdioServerParameters(
+            command=sys.executable,
+            args=[STUB_MCP_SERVER, "--flavor", flavor, "--latency-ms", str(latency_ms)]
+        )
+        return MCPClient(lambda: stdio_client(params))
+
+    return {"context7": client("context7"), "aws_documentation": client("aws_documentation")}
+
+async def run_once(args: argparse.Namespace, mcp_tools: Dict[str, List[Any]], checkpoint_dir: str) -> Dict[str, Any]:
+    from workflow import nemo_workflow
+
+    repo_path = f"/tmp/{PROJECT_NAME}"
+    target_file = create_synthetic_repo(repo_path, args.num_files, args.lines_per_file)
+    script = build_nemo_script(repo_path, PROJECT_NAME, JIRA_STORY_ID, target_file)
+    set_model_factory(lambda model_id: ScriptedModel(script, model_id=model_id, latency_seconds=args.model_latency_ms / 1000))
+
+    checkpoint = MemoryTrackingCheckpoint(LocalCheckpointStore(checkpoint_dir), key=f"{PROJECT_NAME}-{JIRA_STORY_ID}")
+    checkpoint.reset()
+
+    start = time.perf_counter()
+    result = json.loads(await nemo_workflow(
+        PROJECT_NAME, JIRA_STORY, JIRA_STORY_ID,
+        mcp_tools=mcp_tools, checkpoint=checkpoint, skip_review=args.skip_review
+    ))
+    workflow_seconds = time.perf_counter() - start
+
+    pr_start = time.perf_counter()
+    pr = LocalGitHubPRManager(PROJECT_NAME, "https://github.com/example/nemo-benchmark-repo", JIRA_STORY_ID).run_pull_request_workflow()
+    metrics.observe("workflow_step_seconds", time.perf_counter() - pr_start, step="pr")
+
+    return {
+        "workflow_seconds": round(workflow_seconds, 3),
+        "changes_count": result["changes_count"],
+        "pr_url": pr["pr_url"],
+    }
+
+def build_report(args: argparse.Namespace, runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    snapshot = metrics.snapshot()
+
+    def section(prefix: str) -> Dict[str, Any]:
+        return {key[len(prefix):].strip("{}"): value for key, value in snapshot["timings"].items() if key.startswith(prefix)}
+
+    return {
+        "config": {
+            "num_files": args.num_files,
+            "lines_per_file": args.lines_per_file,
+            "runs": args.runs,
+            "model_latency_ms": args.model_latency_ms,
+            "mcp_latency_ms": args.mcp_latency_ms,
+            "skip_review": args.skip_review,
+        },
+        "runs": runs,
+        "step_seconds": section("workflow_step_seconds"),
+        "tool_latency_seconds": section("tool_latency_seconds"),
+        "model_latency_seconds": section("model_latency_seconds"),
+        "step_memory_peak_mb": section("step_memory_peak_mb"),
+        "context_tokens_saved": section("context_tokens_saved"),
+        "tool_calls": {key: value for key, value in snapshot["counters"].items() if key.startswith("tool_")},
+        "model_routing": {key: value for key, value in snapshot["counters"].items() if key.startswith(("model_route_", "model_fallbacks"))},
+        "llm_cache": llm_cache_stats(),
+        "tool_cache": tool_cache_stats(),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    from workflow import list_mcp_tools
+
+    metrics.reset()
+    tracemalloc.start()
+    runs = []
+    try:
+        with ExitStack() as stack, tempfile.TemporaryDirectory() as checkpoint_dir:
+            mcp_clients = create_stub_mcp_clients(args.mcp_latency_ms)
+            for client in mcp_clients.values():
+                stack.enter_context(client)
+            mcp_tools = list_mcp_tools(mcp_clients)
+
+            for _ in range(args.runs):
+                runs.append(await run_once(args, mcp_tools, checkpoint_dir))
+    finally:
+        tracemalloc.stop()
+        set_model_factory(None)
+    return build_report(args, runs)
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num-files", type=int, default=50)
+    parser.add_argument("--lines-per-file", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--model-latency-ms", type=float, default=0)
+    parser.add_argument("--mcp-latency-ms", type=float, default=0)
+    parser.add_argument("--skip-review", action="store_true", help="Benchmark the fast path (no review/revision)")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
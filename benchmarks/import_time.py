@@ -0,0 +1,89 @@
+"""
+Import-time regression guard for the Lambda entry point.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, reports the slowest
+modules and fails when the total exceeds the budget or when a heavy module that should
+only load on first use (strands, mcp, PyGithub, ...) is imported eagerly.
+
+Usage:
+    python -m benchmarks.import_time [--module main] [--budget-ms 800] [--top 15]
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages that must not be imported when the entry point module loads
+DEFERRED_MODULES = [
+    "strands",
+    "mcp",
+    "httpx",
+    "github",
+    "bedrock_agentcore",
+    "workflow",
+    "data_analyst_workflow",
+    "create_pr",
+    "boto3",
+    "botocore",
+]
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure_imports(module: str) -> List[Tuple[str, int, int, int]]:
+    """Return (module, self_us, cumulative_us, depth) for every import made by `import <module>`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return imports
+
+def summarize(imports: List[Tuple[str, int, int, int]], module: str) -> Dict[str, object]:
+    # The entry point's own line carries the cumulative time of everything it pulled in
+    total_us = next((cumulative for name, _, cumulative, _ in imports if name == module), 0)
+    loaded = {name.split(".")[0] for name, _, _, _ in imports}
+    return {
+        "total_ms": total_us / 1000,
+        "eager_deferred_modules": sorted(m for m in DEFERRED_MODULES if m in loaded),
+        "slowest": sorted(imports, key=lambda item: item[2], reverse=True),
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Entry point module to import")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("NEMO_IMPORT_BUDGET_MS", "800")))
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    args = parser.parse_args()
+
+    summary = summarize(measure_imports(args.module), args.module)
+
+    print(f"import {args.module}: {summary['total_ms']:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us, depth in summary["slowest"][:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {'  ' * depth}{name}")
+
+    failed = False
+    if summary["eager_deferred_modules"]:
+        print(f"❌ Imported eagerly, should load on first use: {summary['eager_deferred_modules']}")
+        failed = True
+    if summary["total_ms"] > args.budget_ms:
+        print(f"❌ Import time {summary['total_ms']:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("✅ Import time within budget")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
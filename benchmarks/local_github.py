@@ -0,0 +1,41 @@
+"""
+Offline stand-in for GitHub: commits the branch locally and records the PR as JSON.
+"""
+import os
+import json
+import time
+
+from create_pr import GitHubPRManager
+
+class LocalGitHubPRManager(GitHubPRManager):
+    """GitHubPRManager that never talks to Secrets Manager or GitHub."""
+
+    def __init__(self, project_name, repo_url, story_id, base_branch="main", output_dir="/tmp/nemo-benchmark-prs"):
+        self.project_name = project_name
+        self.repo_url = repo_url
+        self.story_id = story_id
+        self.base_branch = base_branch
+        self.repo_path = f"/tmp/{self.project_name}"
+        self.output_dir = output_dir
+        self.token = None
+        self.github_client = None
+
+    def commit_and_push(self):
+        new_branch = f"feature/{self.story_id}"
+        self.run_cmd(["git", "checkout", "-b", new_branch], cwd=self.repo_path)
+        self.run_cmd(["git", "add", "."], cwd=self.repo_path)
+        self.run_cmd(["git", "commit", "-m", f"{self.story_id}: automated changes"], cwd=self.repo_path)
+        return new_branch
+
+    def create_pr(self, pr_body):
+        os.makedirs(self.output_dir, exist_ok=True)
+        pr_path = os.path.join(self.output_dir, f"{self.project_name}-{self.story_id}.json")
+        with open(pr_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "title": f"[{self.story_id}] - Nemo AI",
+                "body": pr_body,
+                "head": f"feature/{self.story_id}",
+                "base": self.base_branch,
+                "created_at": time.time(),
+            }, f, indent=2)
+        return f"file://{pr_path}"
@@ -0,0 +1,102 @@
+"""
+Compares fresh MCP connections per workflow with the pooled connections of `MCPConnectionPool`.
+
+Starts the Context7 / AWS docs stand-ins over streamable HTTP, then measures:
+- fresh: connect + list_tools + close on every iteration (the old per-workflow behaviour)
+- pooled: `pool.get_tools()` on every iteration (one connect, then cached listings)
+- reconnect: restart one stand-in server and check the pool recovers on the next listing
+
+Usage:
+    python -m benchmarks.mcp_pool_benchmark [--iterations 20] [--mcp-latency-ms 0]
+"""
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+from typing import Any, Dict, List
+
+from mcp.client.streamable_http import streamablehttp_client
+from strands.tools.mcp import MCPClient
+
+from metrics import metrics
+from mcp_pool import MCPConnectionPool
+from benchmarks.e2e_benchmark import STUB_MCP_SERVER
+
+PORTS = {"context7": 8765, "aws_documentation": 8766}
+
+def start_server(flavor: str, latency_ms: float) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, STUB_MCP_SERVER, "--flavor", flavor, "--transport", "streamable-http",
+         "--port", str(PORTS[flavor]), "--latency-ms", str(latency_ms)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", PORTS[flavor]), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"Stub MCP server '{flavor}' did not start")
+
+def client_factory(flavor: str):
+    url = f"http://127.0.0.1:{PORTS[flavor]}/mcp"
+    return lambda: MCPClient(lambda: streamablehttp_client(url))
+
+def fresh_connections(iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for flavor in PORTS:
+            with client_factory(flavor)() as client:
+                client.list_tools_sync()
+    return time.perf_counter() - start
+
+def pooled_connections(pool: MCPConnectionPool, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        pool.get_tools()
+    return time.perf_counter() - start
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    metrics.reset()
+    servers = {flavor: start_server(flavor, args.mcp_latency_ms) for flavor in PORTS}
+    pool = MCPConnectionPool({flavor: client_factory(flavor) for flavor in PORTS}, tools_ttl_seconds=args.ttl_seconds)
+    try:
+        fresh_seconds = fresh_connections(args.iterations)
+        pooled_seconds = pooled_connections(pool, args.iterations)
+
+        # Kill a server behind the pool's back; once the listing expires the pool reconnects
+        servers["context7"].kill()
+        servers["context7"].wait()
+        servers["context7"] = start_server("context7", args.mcp_latency_ms)
+        pool.tools_ttl_seconds = 0
+        recovered_tools = len(pool.get_server_tools("context7"))
+        pool_stats = pool.stats()
+    finally:
+        pool.close()
+        for process in servers.values():
+            process.kill()
+
+    return {
+        "iterations": args.iterations,
+        "fresh_seconds": round(fresh_seconds, 3),
+        "pooled_seconds": round(pooled_seconds, 3),
+        "speedup": round(fresh_seconds / pooled_seconds, 1) if pooled_seconds else None,
+        "recovered_tools_after_restart": recovered_tools,
+        "pool": pool_stats,
+        "metrics": metrics.snapshot(prefix="mcp_"),
+    }
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--mcp-latency-ms", type=float, default=0)
+    parser.add_argument("--ttl-seconds", type=float, default=600)
+    args = parser.parse_args(argv)
+    print(json.dumps(run_benchmark(args), indent=2))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,112 @@
+"""
+Compares raw concurrent model calls with calls through the shared Bedrock rate limiter.
+
+A quota-limited stand-in model raises ModelThrottledException whenever more than
+`--quota-concurrency` calls are in flight. Callers retry a throttled call after a fixed
+backoff, like the boto / strands retries do. Without the limiter most of the calls end up
+retrying (a retry storm); with it, concurrency adapts to the quota and throttles stay rare.
+
+Usage:
+    python -m benchmarks.rate_limiter_benchmark [--calls 200] [--callers 32] [--quota-concurrency 6]
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import Any, AsyncIterable, Dict, List, Optional
+
+from strands.types.exceptions import ModelThrottledException
+
+from metrics import metrics
+from rate_limiter import ModelRateLimiter, RateLimitedModel
+from benchmarks.stub_model import ScriptedModel
+
+class QuotaLimitedModel(ScriptedModel):
+    """Scripted model that throttles calls above `quota_concurrency` in flight."""
+
+    def __init__(self, quota_concurrency: int, latency_seconds: float):
+        super().__init__(script={}, model_id="quota-limited", latency_seconds=latency_seconds)
+        self.quota_concurrency = quota_concurrency
+        self.in_flight = 0
+        self.throttled = 0
+
+    async def stream(self, messages: List[Dict[str, Any]], tool_specs: Optional[List[Dict[str, Any]]] = None, system_prompt: Optional[str] = None, **kwargs: Any) -> AsyncIterable[Dict[str, Any]]:
+        if self.in_flight >= self.quota_concurrency:
+            self.throttled += 1
+            raise ModelThrottledException("ThrottlingException: Too many requests")
+        self.in_flight += 1
+        try:
+            async for event in super().stream(messages, tool_specs, system_prompt, **kwargs):
+                yield event
+        finally:
+            self.in_flight -= 1
+
+async def call_with_retries(model: Any, backoff_seconds: float) -> int:
+    """One call, retried after `backoff_seconds` on throttling; returns the number of attempts."""
+    messages = [{"role": "user", "content": [{"text": "hello"}]}]
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            async for _ in model.stream(messages, system_prompt="benchmark"):
+                pass
+            return attempts
+        except ModelThrottledException:
+            await asyncio.sleep(backoff_seconds)
+
+async def run_calls(model: Any, calls: int, callers: int, backoff_seconds: float) -> Dict[str, Any]:
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(calls):
+        queue.put_nowait(None)
+    attempts: List[int] = []
+
+    async def caller() -> None:
+        while not queue.empty():
+            queue.get_nowait()
+            attempts.append(await call_with_retries(model, backoff_seconds))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[caller() for _ in range(callers)])
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": round(elapsed, 3),
+        "calls_per_second": round(calls / elapsed, 1),
+        "attempts": sum(attempts),
+        "retried_calls": sum(1 for a in attempts if a > 1),
+    }
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    metrics.reset()
+    latency = args.model_latency_ms / 1000
+
+    raw_model = QuotaLimitedModel(args.quota_concurrency, latency)
+    raw = await run_calls(raw_model, args.calls, args.callers, args.backoff_ms / 1000)
+    raw["throttled"] = raw_model.throttled
+
+    limited_inner = QuotaLimitedModel(args.quota_concurrency, latency)
+    limiter = ModelRateLimiter("quota-limited", requests_per_minute=args.requests_per_minute, tokens_per_minute=10_000_000, max_concurrency=args.callers)
+    limited = await run_calls(RateLimitedModel(limited_inner, limiter), args.calls, args.callers, args.backoff_ms / 1000)
+    limited["throttled"] = limited_inner.throttled
+    limited["final_concurrency_limit"] = limiter.concurrency_limit
+
+    return {
+        "config": vars(args),
+        "unlimited": raw,
+        "rate_limited": limited,
+        "queue_wait_seconds": metrics.snapshot(prefix="bedrock_queue_wait_seconds")["timings"],
+    }
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--callers", type=int, default=32)
+    parser.add_argument("--quota-concurrency", type=int, default=6)
+    parser.add_argument("--requests-per-minute", type=float, default=100_000)
+    parser.add_argument("--model-latency-ms", type=float, default=50)
+    parser.add_argument("--backoff-ms", type=float, default=200)
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run_benchmark(args)), indent=2))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,44 @@
+"""
+Checks the story router's defaults with an empty route history (calibration factor 1.0).
+
+A tiny story on a small repo must take the fast path, an average story on a mid-sized repo
+must run the full pipeline on Lambda, and a long story on a large repo must go to ECS.
+Exits non-zero when any of them is routed elsewhere.
+
+Usage:
+    python -m benchmarks.router_check
+"""
+import os
+import sys
+import json
+import tempfile
+from typing import Dict
+
+from router import ROUTE_ECS, ROUTE_FAST, ROUTE_LAMBDA, RouteHistory, StoryRouter
+
+CASES = {
+    "tiny story, small repo": ({"file_count": 20, "repo_bytes": 100_000, "story_chars": 150, "is_data_analysis_task": False}, ROUTE_FAST),
+    "average story, mid-sized repo": ({"file_count": 400, "repo_bytes": 4_000_000, "story_chars": 900, "is_data_analysis_task": False}, ROUTE_LAMBDA),
+    "long story, large repo": ({"file_count": 2500, "repo_bytes": 30_000_000, "story_chars": 2000, "is_data_analysis_task": False}, ROUTE_ECS),
+}
+
+def run_check() -> Dict[str, Dict[str, object]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        router = StoryRouter(RouteHistory(os.path.join(tmp, "route-history.db")))
+        results = {}
+        for name, (features, expected) in CASES.items():
+            decision = router.route(features)
+            results[name] = {"expected": expected, "target": decision.target, "predicted_seconds": round(decision.predicted_seconds, 1)}
+    return results
+
+def main() -> None:
+    results = run_check()
+    print(json.dumps(results, indent=2))
+    wrong = [name for name, result in results.items() if result["target"] != result["expected"]]
+    if wrong:
+        print(f"❌ Routed to the wrong target: {wrong}")
+        sys.exit(1)
+    print("✅ Every story took its expected route")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Local stand-ins (stdio or streamable HTTP) for the Context7 and AWS Documentation MCP servers.
+
+They expose the same tool names and arguments as the real endpoints and return canned
+documentation after an optional delay, so benchmarks can exercise MCP round trips offline.
+
+Usage:
+    python benchmarks/stub_mcp_server.py --flavor context7 [--latency-ms 50]
+    python benchmarks/stub_mcp_server.py --flavor aws_documentation --transport streamable-http --port 8765
+
+Over streamable HTTP the server listens on http://127.0.0.1:<port>/mcp, so it can stand in for
+the remote servers via NEMO_CONTEXT7_MCP_URL / NEMO_AWS_DOCS_MCP_URL.
+"""
+import sys
+import time
+import argparse
+from typing import Any, Dict, List
+
+from mcp.server.fastmcp import FastMCP
+
+DOC_PARAGRAPH = (
+    "Configure clients once and reuse them across invocations. Timeouts and retries are set "
+    "through the client configuration object; prefer the standard retry mode for throttling.\n"
+)
+
+def build_server(flavor: str, latency_seconds: float, doc_paragraphs: int, port: int = 8000) -> FastMCP:
+    server = FastMCP(f"stub-{flavor}", host="127.0.0.1", port=port)
+
+    def respond(text: str) -> str:
+        if latency_seconds:
+            time.sleep(latency_seconds)
+        return text
+
+    if flavor == "context7":
+        @server.tool(name="resolve-library-id")
+        def resolve_library_id(libraryName: str) -> str:
+            """Resolve a package name to a Context7-compatible library ID."""
+            slug = libraryName.lower().replace(" ", "-")
+            return respond(f"- Title: {libraryName}\n- Context7-compatible library ID: /{slug}/{slug}\n")
+
+        @server.tool(name="get-library-docs")
+        def get_library_docs(context7CompatibleLibraryID: str, topic: str = "", tokens: int = 5000) -> str:
+            """Fetch up-to-date documentation for a library."""
+            header = f"# {context7CompatibleLibraryID} {topic}\n"
+            return respond(header + DOC_PARAGRAPH * doc_paragraphs)
+    elif flavor == "aws_documentation":
+        @server.tool(name="aws___search_documentation")
+        def search_documentation(search_phrase: str, limit: int = 5) -> List[Dict[str, Any]]:
+            """Search AWS documentation."""
+            return respond([
+                {"rank_order": i + 1, "url": f"https://docs.aws.amazon.com/stub/{i}.html", "title": f"{search_phrase} ({i + 1})"}
+                for i in range(limit)
+            ])
+
+        @server.tool(name="aws___read_documentation")
+        def read_documentation(url: str, max_length: int = 5000, start_index: int = 0) -> str:
+            """Fetch an AWS documentation page as markdown."""
+            return respond(f"# {url}\n" + DOC_PARAGRAPH * doc_paragraphs)
+    else:
+        raise ValueError(f"Unknown MCP flavor: {flavor}")
+
+    return server
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flavor", choices=["context7", "aws_documentation"], required=True)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--doc-paragraphs", type=int, default=20)
+    parser.add_argument("--transport", choices=["stdio", "streamable-http"], default="stdio")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+    build_server(args.flavor, args.latency_ms / 1000, args.doc_paragraphs, args.port).run(transport=args.transport)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,176 @@
+"""
+Deterministic stand-in for BedrockModel that replays scripted turns, for offline benchmarks.
+
+The agent role is picked from its system prompt, and the turn from the number of assistant
+messages already in the conversation, so the same model instance can serve every agent:
+
+    set_model_factory(lambda model_id: ScriptedModel(script, model_id=model_id))
+
+When several workflows with different scripts share the process, leave `script` unset and
+set `active_script` in each workflow's task instead.
+
+A script maps a role to its turns. Each turn is either `{"text": "..."}` or
+`{"tools": [{"name": "...", "input": {...}}, ...]}` (several entries run as parallel tool calls).
+"""
+import json
+import asyncio
+import itertools
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, List, Optional
+
+from strands.models import Model
+
+# Substrings of each agent's system prompt (see prompt/agent_prompt.py)
+ROLE_MARKERS = {
+    "You are the Planner Agent": "planner",
+    "You are a Senior Software Engineer": "senior_engineer",
+    "You are a Python Best Practices Expert": "coding_standard",
+    "You are a Python System Design Expert": "system_design",
+    "You are a Data Structure and Algorithm Specialist": "data_structure_algorithms",
+    "You are an Intent Fulfillment & Story Scoring Agent": "story_scoring",
+    "You are a Documentation Agent": "doc",
+    "You are a Senior Code Reviewer": "code_reviewer",
+    "You are a Review Aggregator": "review_aggregator",
+    "data analytics AI agent": "data_analyst",
+}
+
+DEFAULT_REPLY = "Done."
+
+# Script for the current asyncio task, used by models built without an explicit script
+active_script: ContextVar[Dict[str, List[Dict[str, Any]]]] = ContextVar("active_script")
+
+def detect_role(system_prompt: Optional[str]) -> str:
+    for marker, role in ROLE_MARKERS.items():
+        if system_prompt and marker in system_prompt:
+            return role
+    return "default"
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+class ScriptedModel(Model):
+    """
+    strands Model that streams scripted tool calls and replies instead of calling Bedrock.
+
+    `latency_seconds` is slept before every response to emulate model time; keep it at 0
+    to measure pure orchestration overhead.
+    """
+
+    _tool_use_ids = itertools.count(1)
+
+    def __init__(self, script: Optional[Dict[str, List[Dict[str, Any]]]] = None, model_id: str = "scripted", latency_seconds: float = 0.0):
+        self._script = script
+        self.config: Dict[str, Any] = {"model_id": model_id, "latency_seconds": latency_seconds}
+        self.calls: Dict[str, int] = {}
+
+    @property
+    def script(self) -> Dict[str, List[Dict[str, Any]]]:
+        return self._script if self._script is not None else active_script.get()
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    def next_turn(self, messages: List[Dict[str, Any]], system_prompt: Optional[str]) -> Dict[str, Any]:
+        role = detect_role(system_prompt)
+        self.calls[role] = self.calls.get(role, 0) + 1
+        turn_index = sum(1 for message in messages if message["role"] == "assistant")
+        turns = self.script.get(role, [])
+        if turn_index < len(turns):
+            return turns[turn_index]
+        return {"text": DEFAULT_REPLY}
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any
+    ) -> AsyncIterable[Dict[str, Any]]:
+        turn = self.next_turn(messages, system_prompt)
+        if self.config["latency_seconds"]:
+            await asyncio.sleep(self.config["latency_seconds"])
+
+        input_tokens = estimate_tokens((system_prompt or "") + json.dumps(messages, default=str))
+        output_chars = 0
+
+        yield {"messageStart": {"role": "assistant"}}
+        if "tools" in turn:
+            available = {spec["name"] for spec in tool_specs or []}
+            for call in turn["tools"]:
+                if call["name"] not in available:
+                    raise ValueError(f"Scripted tool '{call['name']}' is not available to this agent: {sorted(available)}")
+                payload = json.dumps(call.get("input", {}))
+                output_chars += len(payload)
+                yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"tooluse_{next(self._tool_use_ids)}", "name": call["name"]}}}}
+                yield {"contentBlockDelta": {"delta": {"toolUse": {"input": payload}}}}
+                yield {"contentBlockStop": {}}
+            stop_reason = "tool_use"
+        else:
+            output_chars = len(turn["text"])
+            yield {"contentBlockStart": {"start": {}}}
+            yield {"contentBlockDelta": {"delta": {"text": turn["text"]}}}
+            yield {"contentBlockStop": {}}
+            stop_reason = "end_turn"
+        yield {"messageStop": {"stopReason": stop_reason}}
+
+        output_tokens = max(1, output_chars // 4)
+        yield {
+            "metadata": {
+                "usage": {"inputTokens": input_tokens, "outputTokens": output_tokens, "totalTokens": input_tokens + output_tokens},
+                "metrics": {"latencyMs": int(self.config["latency_seconds"] * 1000)},
+            }
+        }
+
+    async def structured_output(self, output_model: Any, prompt: Any, system_prompt: Optional[str] = None, **kwargs: Any) -> AsyncGenerator[Dict[str, Any], None]:
+        raise NotImplementedError("ScriptedModel does not support structured output")
+        yield {}  # Unreachable; keeps this an async generator like the Model interface
+
+def build_nemo_script(repo_path: str, project_name: str, jira_story_id: str, target_file: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    A representative nemo_workflow run: the planner reads code and AWS docs, the senior engineer
+    looks up library docs and edits `target_file` (then revises once), reviewers and the scorer
+    read the change, and the doc agent writes the PR body.
+    """
+    read_target = {"name": "file_read", "input": {"path": target_file, "mode": "view"}}
+    list_repo = {"name": "shell", "input": {"command": f"ls {repo_path}", "non_interactive": True}}
+    review = [{"tools": [read_target]}, {"text": "No blocking issues. Consider adding a docstring to the new function."}]
+    return {
+        "planner": [
+            {"tools": [list_repo, read_target]},
+            {"tools": [{"name": "aws___search_documentation", "input": {"search_phrase": "lambda timeouts"}}]},
+            {"text": f"1. Add `feature_flag_enabled` to {target_file}.\n2. Keep the change minimal."},
+        ],
+        "senior_engineer": [
+            {"tools": [{"name": "resolve-library-id", "input": {"libraryName": "boto3"}}]},
+            {"tools": [{"name": "get-library-docs", "input": {"context7CompatibleLibraryID": "/boto/boto3", "topic": "config"}}]},
+            {"tools": [read_target]},
+            {"tools": [{"name": "editor", "input": {
+                "command": "insert", "path": target_file, "insert_line": 0,
+                "new_str": "def feature_flag_enabled(name: str) -> bool:\n    return name.startswith('nemo_')\n"
+            }}]},
+            {"text": f"Added `feature_flag_enabled` to {target_file}."},
+            {"tools": [{"name": "editor", "input": {
+                "command": "insert", "path": target_file, "insert_line": 0,
+                "new_str": "\"\"\"Feature flag helpers.\"\"\"\n"
+            }}]},
+            {"text": "Added the module docstring requested in review."},
+        ],
+        "coding_standard": review,
+        "system_design": review,
+        "data_structure_algorithms": review,
+        "code_reviewer": review,
+        "story_scoring": [
+            {"tools": [read_target]},
+            {"text": "Score: 9/10. The story is fulfilled."},
+        ],
+        "doc": [
+            {"tools": [{"name": "file_write", "input": {
+                "path": f"{repo_path}/{jira_story_id}.md",
+                "content": f"## {jira_story_id}\n\nAdds `feature_flag_enabled` to `{project_name}`.\n"
+            }}]},
+            {"text": "PR body written."},
+        ],
+    }
@@ -0,0 +1,62 @@
+"""
+Generates throwaway git repositories of a configurable size for benchmarks.
+"""
+import os
+import random
+import shutil
+import subprocess
+
+MODULE_TEMPLATE = '''"""Synthetic module {index}."""
+from typing import Dict, List
+
+
+class Service{index}:
+    def __init__(self, name: str):
+        self.name = name
+        self.items: Dict[str, int] = {{}}
+
+'''
+
+METHOD_TEMPLATE = '''    def method_{index}(self, values: List[int]) -> int:
+        total = 0
+        for value in values:
+            if value % {modulus} == 0:
+                total += value * {factor}
+        self.items["method_{index}"] = total
+        return total
+
+'''
+
+def create_synthetic_repo(path: str, num_files: int = 50, lines_per_file: int = 200, seed: int = 0) -> str:
+    """
+    Create a git repo at `path` with `num_files` Python modules of roughly `lines_per_file`
+    lines each, committed on `main`. Returns the path of a module agents can edit.
+    """
+    rng = random.Random(seed)
+    shutil.rmtree(path, ignore_errors=True)
+    package_dir = os.path.join(path, "app")
+    os.makedirs(package_dir)
+    with open(os.path.join(package_dir, "__init__.py"), "w", encoding="utf-8") as f:
+        f.write("")
+
+    methods_per_file = max(1, (lines_per_file - 10) // 8)
+    for file_index in range(num_files):
+        parts = [MODULE_TEMPLATE.format(index=file_index)]
+        for method_index in range(methods_per_file):
+            parts.append(METHOD_TEMPLATE.format(index=method_index, modulus=rng.randint(2, 9), factor=rng.randint(1, 5)))
+        with open(os.path.join(package_dir, f"module_{file_index}.py"), "w", encoding="utf-8") as f:
+            f.write("".join(parts))
+
+    with open(os.path.join(path, "README.md"), "w", encoding="utf-8") as f:
+        f.write(f"# Synthetic repo\n\n{num_files} modules, ~{lines_per_file} lines each.\n")
+
+    for cmd in (
+        ["git", "init", "-q", "-b", "main"],
+        ["git", "config", "user.email", "benchmark@example.com"],
+        ["git", "config", "user.name", "benchmark"],
+        ["git", "add", "."],
+        ["git", "commit", "-q", "-m", "Initial synthetic commit"],
+    ):
+        subprocess.run(cmd, cwd=path, check=True, capture_output=True)
+
+    return os.path.join(package_dir, "module_0.py")
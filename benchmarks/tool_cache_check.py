@@ -0,0 +1,58 @@
+"""
+Checks that the tool result cache works for tools called by a real strands Agent.
+
+Runs the same scripted agent twice over a `cache_tools`-wrapped tool backed by a fresh
+SQLite cache: the first run must miss and store the result, the second must be served from
+the cache without calling the tool again. Exits non-zero when either does not happen.
+
+Usage:
+    python -m benchmarks.tool_cache_check
+"""
+import os
+import sys
+import json
+import asyncio
+import tempfile
+from typing import Any, Dict
+
+from strands import Agent, tool
+
+from metrics import metrics
+from tool_cache import CachedAgentTool, ToolResultCache, tool_cache_stats
+from benchmarks.stub_model import ScriptedModel
+
+calls = {"lookup_docs": 0}
+
+@tool
+def lookup_docs(topic: str) -> str:
+    """
+    Look up documentation for a topic.
+
+    Args:
+        topic: The topic to look up
+    """
+    calls["lookup_docs"] += 1
+    return f"Documentation for {topic}."
+
+async def run_check() -> Dict[str, Any]:
+    metrics.reset()
+    script = {"default": [{"tools": [{"name": "lookup_docs", "input": {"topic": "lambda timeouts"}}]}, {"text": "Done."}]}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ToolResultCache(os.path.join(tmp, "tool-cache.db"))
+        cached_tool = CachedAgentTool(lookup_docs, cache)
+        for _ in range(2):
+            agent = Agent(model=ScriptedModel(script), tools=[cached_tool], callback_handler=None)
+            await agent.invoke_async("Look up the lambda timeout docs.")
+        stats = tool_cache_stats()
+    return {"tool_calls": calls["lookup_docs"], "hits": stats["hits"], "misses": stats["misses"]}
+
+def main() -> None:
+    result = asyncio.run(run_check())
+    print(json.dumps(result, indent=2))
+    if result != {"tool_calls": 1, "hits": 1, "misses": 1}:
+        print("❌ Expected one miss, then a cache hit on the second run")
+        sys.exit(1)
+    print("✅ Second run was served from the tool cache")
+
+if __name__ == "__main__":
+    main()
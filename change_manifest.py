@@ -1,7 +1,8 @@
 import subprocess
 import re
 import os
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional
 
 from custom_tools import file_read
 from custom_tools.utils import console_util
@@ -87,6 +88,62 @@ def get_manifest(project_name: str, py_only: bool = True) -> Dict[str, Any]:
 
     return manifest
 
+def get_head_commit(repo_path: str) -> str:
+    """Return the commit SHA the working tree is based on."""
+    return run_cmd(["git", "rev-parse", "HEAD"], cwd=repo_path)
+
+@contextmanager
+def scratch_index(repo_path: str) -> Iterator[Dict[str, str]]:
+    """
+    Yield an environment whose GIT_INDEX_FILE is a throwaway index holding the whole working
+    tree (including untracked files), so the repo's own index (and hence `get_manifest`) is untouched.
+    """
+    # --git-path also resolves inside linked worktrees, where .git is a file
+    index_path = os.path.join(repo_path, run_cmd(["git", "rev-parse", "--git-path", "nemo_checkpoint_index"], cwd=repo_path))
+    env = {**os.environ, "GIT_INDEX_FILE": index_path}
+    try:
+        subprocess.run(["git", "read-tree", "HEAD"], cwd=repo_path, env=env, check=True, capture_output=True)
+        subprocess.run(["git", "add", "-A"], cwd=repo_path, env=env, check=True, capture_output=True)
+        yield env
+    finally:
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+def capture_worktree_patch(repo_path: str) -> str:
+    """Return a binary patch of every change in the working tree, including untracked files."""
+    with scratch_index(repo_path) as env:
+        result = subprocess.run(
+            ["git", "diff", "--cached", "--binary", "HEAD"],
+            cwd=repo_path, env=env, check=True, capture_output=True, text=True
+        )
+        return result.stdout  # Not stripped: git apply needs the trailing newline
+
+def snapshot_worktree(repo_path: str) -> str:
+    """Store the working tree as a git tree object and return its id, for `diff_snapshots`."""
+    with scratch_index(repo_path) as env:
+        result = subprocess.run(["git", "write-tree"], cwd=repo_path, env=env, check=True, capture_output=True, text=True)
+        return result.stdout.strip()
+
+def diff_snapshots(repo_path: str, before: str, after: str, py_only: bool = True) -> str:
+    """Unified diff between two `snapshot_worktree` trees, e.g. just what a revision changed."""
+    cmd = ["git", "diff", "--unified=3", before, after]
+    if py_only:
+        cmd += ["--", "*.py"]
+    return run_cmd(cmd, cwd=repo_path)
+
+def restore_worktree_patch(repo_path: str, patch: str) -> None:
+    """Reset the working tree to HEAD and re-apply a patch from `capture_worktree_patch`."""
+    subprocess.run(["git", "reset", "--hard", "HEAD"], cwd=repo_path, check=True, capture_output=True)
+    subprocess.run(["git", "clean", "-fd"], cwd=repo_path, check=True, capture_output=True)
+    if not patch:
+        return
+    result = subprocess.run(
+        ["git", "apply", "--binary", "--whitespace=nowarn", "-"],
+        cwd=repo_path, input=patch, text=True, capture_output=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not restore checkpointed changes: {result.stderr.strip()}")
+
 def format_manifest_code_diffs(manifest: Dict[str, Any]) -> str:
     """ Generate a human-readable code change summaries from a change manifest."""
     combined_changes: List[str] = []
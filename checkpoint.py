@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class CheckpointStore:
+    """Key/value store for workflow checkpoints. Subclass to plug in another backend."""
+
+    def load(self, key: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def save(self, key: str, state: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+class LocalCheckpointStore(CheckpointStore):
+    """Stores each checkpoint as a JSON file under `root_dir`."""
+
+    def __init__(self, root_dir: str = "/tmp/nemo-checkpoints"):
+        self.root_dir = root_dir
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        safe_key = "".join(c if c.isalnum() or c in "-_." else "_" for c in key)
+        return os.path.join(self.root_dir, f"{safe_key}.json")
+
+    def load(self, key: str) -> Dict[str, Any]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable checkpoint {path}: {e}")
+            return {}
+
+    def save(self, key: str, state: Dict[str, Any]) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)  # Atomic, so a crash never leaves a half-written checkpoint
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+class S3CheckpointStore(CheckpointStore):
+    """Stores checkpoints in S3 so another compute target (e.g. ECS after a Lambda handoff) can resume."""
+
+    def __init__(self, bucket: str, prefix: str = "nemo-checkpoints"):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        import boto3  # Deferred: local checkpoints never need it
+        self.client = boto3.Session().client("s3")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}.json" if self.prefix else f"{key}.json"
+
+    def load(self, key: str) -> Dict[str, Any]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except self.client.exceptions.NoSuchKey:
+            return {}
+        return json.loads(response["Body"].read())
+
+    def save(self, key: str, state: Dict[str, Any]) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=json.dumps(state).encode("utf-8"))
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+def rebase_workspace_paths(value: Any, from_workspace: str, to_workspace: str) -> Any:
+    """`value` (a string, or lists/dicts of them) with `/tmp/<from_workspace>/` paths moved to `to_workspace`."""
+    if isinstance(value, str):
+        return value.replace(f"/tmp/{from_workspace}/", f"/tmp/{to_workspace}/")
+    if isinstance(value, list):
+        return [rebase_workspace_paths(item, from_workspace, to_workspace) for item in value]
+    if isinstance(value, dict):
+        return {key: rebase_workspace_paths(item, from_workspace, to_workspace) for key, item in value.items()}
+    return value
+
+def checkpoint_location() -> str:
+    return os.getenv("NEMO_CHECKPOINT_LOCATION", "/tmp/nemo-checkpoints")
+
+def create_checkpoint_store(location: Optional[str] = None) -> CheckpointStore:
+    """
+    Build a CheckpointStore from NEMO_CHECKPOINT_LOCATION: a local directory (the default,
+    optionally as `file://<dir>`) or `s3://<bucket>/<prefix>`.
+    """
+    location = location or checkpoint_location()
+    if location.startswith("s3://"):
+        bucket, _, prefix = location[len("s3://"):].partition("/")
+        return S3CheckpointStore(bucket, prefix or "nemo-checkpoints")
+    if location.startswith("file://"):
+        location = location[len("file://"):]
+    return LocalCheckpointStore(location)
+
+class WorkflowCheckpoint:
+    """Per-story view over a CheckpointStore that records the outputs of each completed step."""
+
+    def __init__(self, store: CheckpointStore, key: str):
+        self.store = store
+        self.key = key
+        self.state: Dict[str, Any] = store.load(key) or {"steps": {}}
+        self._lock = threading.Lock()  # Concurrent steps may save from worker threads
+
+    @property
+    def completed_steps(self) -> List[str]:
+        """Completed steps in the order they finished (steps of a graph may finish out of order)."""
+        steps = self.state["steps"]
+        return sorted(steps, key=lambda step: steps[step].get("completed_at", 0))
+
+    def is_done(self, step: str) -> bool:
+        return step in self.state["steps"]
+
+    def get(self, step: str) -> Dict[str, Any]:
+        return self.state["steps"].get(step, {})
+
+    def save_step(self, step: str, **outputs: Any) -> None:
+        """Persist a step's outputs as soon as it completes."""
+        with self._lock:
+            self.state["steps"][step] = {**outputs, "completed_at": time.time()}
+            self.store.save(self.key, self.state)
+        print(f"💾 Checkpoint saved for step '{step}' ({self.key})")
+
+    def get_meta(self, name: str, default: Any = None) -> Any:
+        return self.state.get(name, default)
+
+    def set_meta(self, name: str, value: Any) -> None:
+        with self._lock:
+            self.state[name] = value
+            self.store.save(self.key, self.state)
+
+    def latest_worktree_patch(self) -> Optional[str]:
+        """Return the most recent working-tree patch recorded by a completed step."""
+        for step in reversed(self.completed_steps):
+            patch = self.get(step).get("worktree_patch")
+            if patch is not None:
+                return patch
+        return None
+
+    def save_interrupted_patch(self, patch: str) -> None:
+        """Record the working tree of a step that was stopped before it completed (e.g. by a handoff)."""
+        completed = self.completed_steps
+        self.set_meta("interrupted", {"after_step": completed[-1] if completed else None, "worktree_patch": patch})
+
+    def resume_patch(self) -> Optional[str]:
+        """
+        The patch to resume from: the interrupted step's partial changes when nothing completed
+        since it was interrupted, else the patch of the last completed step.
+        """
+        interrupted = self.get_meta("interrupted")
+        completed = self.completed_steps
+        if interrupted and interrupted["after_step"] == (completed[-1] if completed else None):
+            return interrupted["worktree_patch"]
+        return self.latest_worktree_patch()
+
+    def rebase_workspace(self, workspace: str) -> None:
+        """
+        Step outputs (plan, summaries, manifest file paths) hold absolute `/tmp/<workspace>/` paths.
+        When a run resumes in another workspace (a handoff, or a redelivery with a new message id),
+        point them at the current one. Worktree patches use repo-relative paths and are kept as is.
+        """
+        previous = self.get_meta("workspace")
+        if previous and previous != workspace:
+            with self._lock:
+                self.state["steps"] = {
+                    step: {
+                        name: value if name == "worktree_patch" else rebase_workspace_paths(value, previous, workspace)
+                        for name, value in outputs.items()
+                    }
+                    for step, outputs in self.state["steps"].items()
+                }
+            print(f"♻️ Checkpoint paths moved from /tmp/{previous} to /tmp/{workspace}")
+        self.set_meta("workspace", workspace)
+
+    def reset(self) -> None:
+        self.state = {"steps": {}}
+        self.store.delete(self.key)
+
+    def clear(self) -> None:
+        """Drop the checkpoint once the whole run (including the PR) has succeeded."""
+        self.store.delete(self.key)
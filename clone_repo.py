@@ -12,6 +12,23 @@ def run_cmd(cmd, cwd=None):
         raise RuntimeError(f"Command failed: {result}")
     return result.stdout.strip()
 
+def get_authenticated_url(repo_url: str) -> str:
+    """Return the clone URL with the GitHub personal access token embedded."""
+    aws_account_id = os.getenv("AWS_ACCOUNT_ID")
+    secret_arn = GIHUB_SECRET_ARN.format(aws_account_id=aws_account_id)
+    personal_access_token = get_github_personal_access_token(secret_arn=secret_arn)
+    return f"https://{personal_access_token}@{repo_url.split('https://')[1]}"
+
+def get_remote_head_commit(repo_url: str, base_branch: str = "main") -> str:
+    """Return the commit SHA of the remote base branch without cloning."""
+    output = subprocess.run(
+        ["git", "ls-remote", get_authenticated_url(repo_url), f"refs/heads/{base_branch}"],
+        text=True, capture_output=True
+    )
+    if output.returncode != 0 or not output.stdout.strip():
+        raise RuntimeError(f"Could not resolve {base_branch} of {repo_url}: {output.stderr.strip()}")
+    return output.stdout.split()[0]
+
 def clone_github_repo(repo_url: str, project_name: str, base_branch: str = "main") -> str:
     """
     Clone the given GitHub repo into /tmp/{project_name}, checkout base branch, and pull latest code.
@@ -26,13 +43,8 @@ def clone_github_repo(repo_url: str, project_name: str, base_branch: str = "main
         print(f"Cleaning old repo at {local_path}...")
         shutil.rmtree(local_path)
 
-    # Get personal access token
-    aws_account_id = os.getenv("AWS_ACCOUNT_ID")
-    secret_arn = GIHUB_SECRET_ARN.format(aws_account_id=aws_account_id)
-    personal_access_token = get_github_personal_access_token(secret_arn=secret_arn)
-
     # Clone fresh
-    remote_url_with_token = f"https://{personal_access_token}@{repo_url.split('https://')[1]}"
+    remote_url_with_token = get_authenticated_url(repo_url)
     run_cmd(["git", "clone", remote_url_with_token, local_path])
     run_cmd(["git", "checkout", base_branch], cwd=local_path)
     run_cmd(["git", "pull", "origin", base_branch], cwd=local_path)
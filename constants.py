@@ -1,3 +1,36 @@
 import os
 
-GIHUB_SECRET_ARN = 'arn:aws:secretsmanager:us-east-1:{aws_account_id}:secret:github_personal_access_token-mhV2eN'
\ No newline at end of file
+GIHUB_SECRET_ARN = 'arn:aws:secretsmanager:us-east-1:{aws_account_id}:secret:github_personal_access_token-mhV2eN'
+
+# Maximum number of SQS records processed concurrently by a single Lambda invocation
+BATCH_MAX_CONCURRENCY = int(os.getenv("NEMO_BATCH_MAX_CONCURRENCY", "4"))
+
+# ECS worker mode: queue to consume (SQS URL, file://<dir> or memory://) and stories run in parallel
+ECS_WORKER_QUEUE_URL = os.getenv("NEMO_WORKER_QUEUE_URL")
+ECS_WORKER_CONCURRENCY = int(os.getenv("NEMO_WORKER_CONCURRENCY", "2"))
+
+# Seconds before the Lambda deadline at which in-flight stories are checkpointed and handed off to ECS
+HANDOFF_SAFETY_MARGIN_SECONDS = int(os.getenv("NEMO_HANDOFF_SAFETY_MARGIN_SECONDS", "120"))
+
+# How long pooled MCP tool listings are reused before the session is re-listed (and reconnected if dead)
+MCP_TOOLS_TTL_SECONDS = int(os.getenv("NEMO_MCP_TOOLS_TTL_SECONDS", "600"))
+
+# Split the plan into up to this many file-disjoint subtasks, implemented concurrently in git worktrees (1 = serial)
+IMPLEMENTATION_SHARDS = int(os.getenv("NEMO_IMPLEMENTATION_SHARDS", "1"))
+
+# Best-of-N: speculative senior-agent implementations per story (1 = off), cycled over the
+# comma-separated model ids / temperatures, stopping early once one scores at least the threshold
+SPECULATIVE_CANDIDATES = int(os.getenv("NEMO_SPECULATIVE_CANDIDATES", "1"))
+SPECULATIVE_MODELS = [m.strip() for m in os.getenv("NEMO_SPECULATIVE_MODELS", "").split(",") if m.strip()]
+SPECULATIVE_TEMPERATURES = [float(t) for t in os.getenv("NEMO_SPECULATIVE_TEMPERATURES", "").split(",") if t.strip()]
+SPECULATIVE_SCORE_THRESHOLD = float(os.getenv("NEMO_SPECULATIVE_SCORE_THRESHOLD", "9"))
+
+# Review rounds per story: after the first review + revision, each further round re-reviews only the revision delta
+REVIEW_ROUNDS = int(os.getenv("NEMO_REVIEW_ROUNDS", "1"))
+
+# Map-reduce review: diffs over this many tokens are split into per-file chunks reviewed in parallel (0 = off)
+REVIEW_CHUNK_TOKENS = int(os.getenv("NEMO_REVIEW_CHUNK_TOKENS", "6000"))
+REVIEW_MAX_CONCURRENCY = int(os.getenv("NEMO_REVIEW_MAX_CONCURRENCY", "6"))
+
+# Review finding severities that require a revision; with none of these the revision step is skipped
+REVIEW_BLOCKING_SEVERITIES = {s.strip().lower() for s in os.getenv("NEMO_REVIEW_BLOCKING_SEVERITIES", "critical,recommendation").split(",") if s.strip()}
@@ -0,0 +1,146 @@
+import os
+import re
+import json
+import hashlib
+from dataclasses import dataclass
+from typing import List, Optional, Set
+
+from metrics import metrics
+
+CHARS_PER_TOKEN = 4  # Rough estimate for English prose and Python source
+
+# Per-step prompt budgets in tokens; override with NEMO_CONTEXT_TOKEN_BUDGETS='{"score": 6000}'
+DEFAULT_TOKEN_BUDGETS = {"revision": 12000, "re_review": 8000, "score": 10000, "doc": 8000}
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def get_token_budget(step: str) -> Optional[int]:
+    budgets = {**DEFAULT_TOKEN_BUDGETS, **json.loads(os.getenv("NEMO_CONTEXT_TOKEN_BUDGETS", "{}"))}
+    return budgets.get(step)
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Keep the head and tail of `text` (by line) within `max_tokens`, marking what was cut."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return f"[... ~{estimate_tokens(text)} tokens omitted ...]"
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    head_chars, tail_chars = max_chars * 2 // 3, max_chars // 3
+    head = text[:head_chars].rsplit("\n", 1)[0]
+    tail = text[len(text) - tail_chars:].split("\n", 1)[-1] if tail_chars else ""
+    omitted = estimate_tokens(text) - estimate_tokens(head) - estimate_tokens(tail)
+    return f"{head}\n[... ~{omitted} tokens omitted ...]\n{tail}"
+
+def split_code_diffs(code_diffs: str) -> List[str]:
+    """The per-file blocks of `format_manifest_code_diffs` output."""
+    return [block for block in re.split(r"(?=^File: )", code_diffs, flags=re.MULTILINE) if block.strip()]
+
+def chunk_code_diffs(code_diffs: str, max_tokens: int) -> List[str]:
+    """
+    Pack the per-file blocks into chunks of at most `max_tokens`, keeping blocks of the same
+    file and directory (module) next to each other. A block larger than `max_tokens` gets a
+    chunk of its own and is truncated.
+    """
+    blocks = sorted(split_code_diffs(code_diffs), key=lambda block: block.split("\n", 1)[0])
+    chunks: List[str] = []
+    current = ""
+    for block in blocks:
+        if current and estimate_tokens(current + block) > max_tokens:
+            chunks.append(current)
+            current = ""
+        current += block if estimate_tokens(block) <= max_tokens else truncate_text(block, max_tokens)
+    if current:
+        chunks.append(current)
+    return chunks
+
+def truncate_code_diffs(code_diffs: str, max_tokens: int) -> str:
+    """Share the budget across the per-file blocks of `format_manifest_code_diffs` output."""
+    blocks = split_code_diffs(code_diffs)
+    if len(blocks) <= 1:
+        return truncate_text(code_diffs, max_tokens)
+    shares = allocate([estimate_tokens(block) for block in blocks], max_tokens)
+    return "".join(truncate_text(block, share) for block, share in zip(blocks, shares))
+
+def allocate(sizes: List[int], budget: int) -> List[int]:
+    """
+    Water-fill `budget` across sections: small sections keep their full size and what they
+    leave unused is shared among the larger ones.
+    """
+    shares = [0] * len(sizes)
+    remaining = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    while remaining:
+        fair_share = budget // len(remaining)
+        i = remaining.pop(0)
+        shares[i] = min(sizes[i], fair_share)
+        budget -= shares[i]
+    return shares
+
+@dataclass
+class ContextSection:
+    title: str
+    text: str
+    is_code: bool = False
+
+class ContextBuilder:
+    """
+    Assembles a task prompt from named sections within a per-step token budget.
+
+    Paragraphs already included by an earlier section are dropped (e.g. the implementation
+    summary repeated inside the revised summary), then sections over their share of the
+    budget are truncated, code diffs per file. Token counts before and after are recorded
+    as `context_tokens_*{step=...}` metrics.
+    """
+
+    def __init__(self, step: str, max_tokens: Optional[int] = None):
+        self.step = step
+        self.max_tokens = max_tokens if max_tokens is not None else get_token_budget(step)
+        self.sections: List[ContextSection] = []
+
+    def add(self, title: str, text: str, is_code: bool = False) -> "ContextBuilder":
+        self.sections.append(ContextSection(title, text or "", is_code))
+        return self
+
+    @staticmethod
+    def _dedup(sections: List[ContextSection]) -> List[ContextSection]:
+        seen: Set[str] = set()
+        deduped = []
+        for section in sections:
+            if section.is_code:
+                deduped.append(section)
+                continue
+            kept = []
+            for paragraph in re.split(r"\n\s*\n", section.text):
+                digest = hashlib.sha1(" ".join(paragraph.split()).encode("utf-8")).hexdigest()
+                if not paragraph.strip() or digest in seen:
+                    continue
+                seen.add(digest)
+                kept.append(paragraph)
+            deduped.append(ContextSection(section.title, "\n\n".join(kept), section.is_code))
+        return deduped
+
+    def build(self) -> str:
+        raw_tokens = sum(estimate_tokens(s.text) for s in self.sections)
+        sections = self._dedup(self.sections)
+
+        if self.max_tokens is not None:
+            # Reserve room for the section titles themselves
+            budget = max(self.max_tokens - sum(estimate_tokens(s.title) + 2 for s in sections), 0)
+            shares = allocate([estimate_tokens(s.text) for s in sections], budget)
+            sections = [
+                ContextSection(
+                    s.title,
+                    truncate_code_diffs(s.text, share) if s.is_code else truncate_text(s.text, share),
+                    s.is_code
+                )
+                for s, share in zip(sections, shares)
+            ]
+
+        prompt = "\n\n".join(f"{s.title}:\n{s.text}" for s in sections)
+        final_tokens = estimate_tokens(prompt)
+        saved = max(raw_tokens - final_tokens, 0)
+        metrics.observe("context_tokens_raw", raw_tokens, step=self.step)
+        metrics.observe("context_tokens_final", final_tokens, step=self.step)
+        metrics.observe("context_tokens_saved", saved, step=self.step)
+        print(f"📐 {self.step} context: ~{final_tokens} tokens (saved ~{saved} of {raw_tokens})")
+        return prompt
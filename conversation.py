@@ -0,0 +1,120 @@
+import os
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from strands.agent.conversation_manager import ConversationManager
+from strands.types.exceptions import ContextWindowOverflowException
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+MAX_KEPT_INPUT_CHARS = 500  # Longer tool inputs (e.g. file_write content) are cut when compacted
+
+def estimate_message_tokens(messages: List[Dict[str, Any]]) -> int:
+    return len(json.dumps(messages, default=str)) // CHARS_PER_TOKEN
+
+class CompactingConversationManager(ConversationManager):
+    """
+    Keeps an agent's history under `max_tokens` by compacting stale tool calls instead of
+    dropping messages, so every toolUse keeps its toolResult.
+
+    Once the history crosses `max_tokens`, tool results are replaced by a one-line stub (and
+    long tool inputs cut) until it is back under `target_ratio * max_tokens`. Superseded
+    results go first (older views of a file that was viewed or edited again later), then the
+    oldest. The latest result per file path and the last `keep_recent_messages` messages are
+    never compacted, so the agent always sees the current state of the files it works on.
+
+    Runs before every model call via `agent_hooks.ConversationHook`, and at the end of each
+    invocation or on a context window overflow via the ConversationManager interface.
+    """
+
+    def __init__(self, max_tokens: int = 60000, target_ratio: float = 0.7, keep_recent_messages: int = 4):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.target_ratio = target_ratio
+        self.keep_recent_messages = keep_recent_messages
+
+    def apply_management(self, agent: Any, **kwargs: Any) -> None:
+        tokens = estimate_message_tokens(agent.messages)
+        if tokens > self.max_tokens:
+            self.compact(agent, tokens, int(self.max_tokens * self.target_ratio))
+
+    def reduce_context(self, agent: Any, e: Optional[Exception] = None, **kwargs: Any) -> None:
+        tokens = estimate_message_tokens(agent.messages)
+        if not self.compact(agent, tokens, 0):
+            raise e or ContextWindowOverflowException("Nothing left to compact in the conversation history")
+
+    def _tool_uses(self, messages: List[Dict[str, Any]]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        uses = {}
+        for message in messages:
+            for block in message.get("content", []):
+                if "toolUse" in block:
+                    tool_use = block["toolUse"]
+                    uses[tool_use["toolUseId"]] = (tool_use.get("name", ""), tool_use.get("input") or {})
+        return uses
+
+    def _candidates(self, messages: List[Dict[str, Any]]) -> List[Tuple[int, int]]:
+        """(message index, block index) of compactable tool results, most stale first."""
+        uses = self._tool_uses(messages)
+        protected_from = max(len(messages) - self.keep_recent_messages, 0)
+        latest_per_path: Dict[str, Tuple[int, int]] = {}
+        results: List[Tuple[int, int, Optional[str]]] = []
+        for i, message in enumerate(messages):
+            for j, block in enumerate(message.get("content", [])):
+                if "toolResult" not in block or block["toolResult"].get("compacted"):
+                    continue
+                _, tool_input = uses.get(block["toolResult"].get("toolUseId"), ("", {}))
+                path = tool_input.get("path") or tool_input.get("file_path") if isinstance(tool_input, dict) else None
+                if path:
+                    latest_per_path[path] = (i, j)
+                results.append((i, j, path))
+
+        keep: Set[Tuple[int, int]] = set(latest_per_path.values())
+        candidates = [(i, j, path) for i, j, path in results if i < protected_from and (i, j) not in keep]
+        # Superseded file results (a later result exists for the same path) before everything else
+        candidates.sort(key=lambda c: (c[2] is None, c[0], c[1]))
+        return [(i, j) for i, j, _ in candidates]
+
+    def compact(self, agent: Any, tokens: int, target_tokens: int) -> int:
+        """Compact stale tool calls until the history is under `target_tokens`; returns tokens saved."""
+        messages = agent.messages
+        uses = self._tool_uses(messages)
+        before = tokens
+        for i, j in self._candidates(messages):
+            if tokens <= target_tokens:
+                break
+            result = messages[i]["content"][j]["toolResult"]
+            name, tool_input = uses.get(result.get("toolUseId"), ("tool", {}))
+            old_tokens = estimate_message_tokens([messages[i]])
+            result["content"] = [{"text": f"[Compacted stale {name} result of ~{estimate_message_tokens(result.get('content', []))} tokens]"}]
+            result["compacted"] = True
+            self._cut_tool_input(messages, result.get("toolUseId"))
+            tokens -= old_tokens - estimate_message_tokens([messages[i]])
+
+        # Re-measure: cutting tool inputs also shrank the assistant messages
+        tokens = estimate_message_tokens(messages)
+        saved = max(before - tokens, 0)
+        if saved:
+            name = getattr(agent, "name", "agent")
+            metrics.incr("conversation_compacted_tokens", saved, agent=name)
+            logger.info(f"🗜️ Compacted {name} history from ~{before} to ~{tokens} tokens")
+        return saved
+
+    @staticmethod
+    def _cut_tool_input(messages: List[Dict[str, Any]], tool_use_id: Optional[str]) -> None:
+        for message in messages:
+            for block in message.get("content", []):
+                tool_use = block.get("toolUse")
+                if tool_use and tool_use.get("toolUseId") == tool_use_id and isinstance(tool_use.get("input"), dict):
+                    tool_use["input"] = {
+                        key: value[:MAX_KEPT_INPUT_CHARS] + " [...]" if isinstance(value, str) and len(value) > MAX_KEPT_INPUT_CHARS else value
+                        for key, value in tool_use["input"].items()
+                    }
+                    return
+
+def create_conversation_manager() -> CompactingConversationManager:
+    """Per-agent manager configured by NEMO_CONVERSATION_MAX_TOKENS (history size that triggers compaction)."""
+    return CompactingConversationManager(max_tokens=int(os.getenv("NEMO_CONVERSATION_MAX_TOKENS", "60000")))
@@ -89,5 +89,6 @@ class GitHubPRManager:
         pr_url = self.create_pr(pr_body)
         return {
             "statusCode": 200,
-            "body": f"✅ Pull request created: {pr_url}"
+            "body": f"✅ Pull request created: {pr_url}",
+            "pr_url": pr_url
         }
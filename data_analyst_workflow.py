@@ -1,21 +1,27 @@
 import os
+import asyncio
 import logging
 import json
+from functools import lru_cache
 from urllib.parse import urlparse
 from typing import Dict, Any, List, Optional
 
 import boto3
-from botocore.config import Config
 from bedrock_agentcore.tools.code_interpreter_client import CodeInterpreter
 from strands import Agent, tool
-from strands.models import BedrockModel
 
+from model_router import get_step_model
+from agent_hooks import get_agent_hooks
+from tool_output import read_tool_output
 from prompt.agent_prompt import data_analyst_prompt
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-session = boto3.Session()
+@lru_cache(maxsize=None)
+def get_session() -> boto3.Session:
+    """Create the boto3 session on first use instead of at import (Lambda init)."""
+    return boto3.Session()
 
 class FileHandler:
     """Handles file operations for the data analyst workflow."""
@@ -54,7 +60,7 @@ class CodeInterpreterSession:
 
     def start(self) -> None:
         """Start the Code Interpreter session."""
-        self.client = CodeInterpreter(region="us-east-1", session=session)
+        self.client = CodeInterpreter(region="us-east-1", session=get_session())
         self.client.start(session_timeout_seconds=self.session_timeout, identifier=self.code_interpreter_id)
         logger.info(f"Code Interpreter session started in us-east-1")
 
@@ -66,7 +72,7 @@ class CodeInterpreterSession:
 
     def get_or_create_code_interpreter_id(self, interpreter_name: str = "nemo_ai_code_interpreter_v1") -> str:
         """Get or create the Code Interpreter session ID."""
-        agentcore_control_client = session.client(
+        agentcore_control_client = get_session().client(
             'bedrock-agentcore-control',
             region_name='us-east-1',
             endpoint_url=f"https://bedrock-agentcore-control.us-east-1.amazonaws.com"
@@ -188,14 +194,7 @@ class DataAnalystAgent:
     
     def _setup_agent(self) -> Agent:
         """Set up the Strands agent with the model and tools."""
-        model = BedrockModel(
-            model_id = 'us.anthropic.claude-sonnet-4-20250514-v1:0',
-            boto_session = session,
-            boto_client_config = Config(
-                retries={'max_attempts': 5, 'mode': 'standard'},
-                read_timeout=180
-            )
-        )
+        model = get_step_model("data_analyst")
         system_prompt = data_analyst_prompt.format(
             project_name=self.project_name,
             jira_story_id=self.jira_story_id
@@ -233,8 +232,9 @@ class DataAnalystAgent:
 
         return Agent(
             model=model,
-            tools=[execute_python, execute_command],
-            system_prompt=system_prompt
+            tools=[execute_python, execute_command, read_tool_output],
+            system_prompt=system_prompt,
+            hooks=get_agent_hooks()
         )
 
     async def run(self, jira_story: str) -> str:
@@ -288,12 +288,13 @@ class DataAnalystWorkflow:
 
 async def data_analyst_workflow(project_name: str, jira_story: str, jira_story_id: str):
     """Run the full data analyst workflow."""
-    workflow = DataAnalystWorkflow(project_name, jira_story_id)
+    # Code Interpreter calls are blocking boto3 requests, keep them off the event loop
+    workflow = await asyncio.to_thread(DataAnalystWorkflow, project_name, jira_story_id)
     try:
-        workflow.setup()
+        await asyncio.to_thread(workflow.setup)
         response_text = await workflow.start_analysis(jira_story)
         logger.info(f"\n\nComplete Response Text:\n{response_text}\n")
-        workflow.export_outputs()
+        await asyncio.to_thread(workflow.export_outputs)
         return {"response_text": response_text, "project_path": workflow.project_path}
     finally:
-        workflow.cleanup()
+        await asyncio.to_thread(workflow.cleanup)
@@ -5,6 +5,7 @@ import asyncio
 
 from dotenv import load_dotenv
 
+from constants import ECS_WORKER_QUEUE_URL, ECS_WORKER_CONCURRENCY
 from run_workflow import run_nemo_agent_workflow
 
 load_dotenv()
@@ -17,6 +18,7 @@ def start_ecs_task():
     jira_story = os.getenv("JIRA_STORY")
     jira_story_id = os.getenv("JIRA_STORY_ID")
     is_data_analysis_task = os.getenv("IS_DATA_ANALYSIS_TASK")
+    speculative_candidates = os.getenv("SPECULATIVE_CANDIDATES")
 
     if not all([github_link, jira_story, jira_story_id, is_data_analysis_task]):
         logger.error("Missing required environment variables.")
@@ -28,7 +30,7 @@ def start_ecs_task():
     
     try:
         is_data_analysis_task = str(is_data_analysis_task).lower() == "true"
-        output = asyncio.run(run_nemo_agent_workflow(github_link=github_link, jira_story=jira_story, jira_story_id=jira_story_id, is_data_analysis_task=is_data_analysis_task))
+        output = asyncio.run(run_nemo_agent_workflow(github_link=github_link, jira_story=jira_story, jira_story_id=jira_story_id, is_data_analysis_task=is_data_analysis_task, runtime="ecs", speculative_candidates=int(speculative_candidates) if speculative_candidates else None))
         logger.info(f"✅ Workflow result: {output}")
         logger.info("✅ ECS Task completed successfully.")
         exit(0)
@@ -37,5 +39,19 @@ def start_ecs_task():
         traceback.print_exc()
         exit(1)
 
+def start_ecs_worker():
+    """Keep the task alive and consume stories from NEMO_WORKER_QUEUE_URL until SIGTERM."""
+    from job_queue import create_job_queue
+    from ecs_worker import NemoWorker
+
+    logger.info(f"Starting ECS worker on {ECS_WORKER_QUEUE_URL} with concurrency {ECS_WORKER_CONCURRENCY}")
+    worker = NemoWorker(queue=create_job_queue(ECS_WORKER_QUEUE_URL), concurrency=ECS_WORKER_CONCURRENCY)
+    stats = asyncio.run(worker.run())
+    # Failed stories go back to the queue; only the worker's own errors make the task look crashed
+    exit(1 if stats["worker_errors"] else 0)
+
 if __name__ == "__main__":
-    start_ecs_task()
\ No newline at end of file
+    if ECS_WORKER_QUEUE_URL:
+        start_ecs_worker()
+    else:
+        start_ecs_task()
\ No newline at end of file
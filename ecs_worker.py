@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import signal
+import traceback
+from typing import Dict
+
+from job_queue import JobQueue, QueueMessage
+from run_workflow import REQUIRED_FIELDS, run_nemo_agent_workflow, cleanup_workspace
+from workflow import get_mcp_pool
+
+logger = logging.getLogger(__name__)
+
+class NemoWorker:
+    """
+    Long-running consumer that runs up to `concurrency` stories at a time.
+
+    Models, boto3 sessions and MCP connections (see `workflow.get_mcp_pool`) are created
+    once per process and reused by every job; `use_mcp` connects MCP before the first job. On SIGTERM/SIGINT the worker stops pulling new messages, waits up to
+    `shutdown_timeout` seconds for in-flight stories and releases the rest to the queue.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: int = 2,
+        wait_seconds: int = 20,
+        visibility_timeout: int = 900,
+        shutdown_timeout: int = 100,
+        use_mcp: bool = True
+    ):
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.wait_seconds = wait_seconds
+        self.visibility_timeout = visibility_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.use_mcp = use_mcp
+        self.stop_event = asyncio.Event()
+        self.stats = {"succeeded": 0, "failed": 0, "released": 0, "skipped": 0, "worker_errors": 0}
+
+    def stop(self) -> None:
+        """Stop pulling new messages; in-flight jobs are allowed to finish."""
+        if not self.stop_event.is_set():
+            logger.info("🛑 Shutdown requested, draining in-flight jobs...")
+            self.stop_event.set()
+
+    async def _keep_invisible(self, message: QueueMessage) -> None:
+        """Periodically extend the visibility timeout while a story is running."""
+        interval = max(self.visibility_timeout // 2, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.queue.extend_visibility, message, self.visibility_timeout)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not extend visibility for {message.message_id}: {e}")
+
+    async def handle_message(self, message: QueueMessage) -> None:
+        """Run one story and ack, or release it for redelivery on failure."""
+        payload = message.body
+        if not all(field in payload for field in REQUIRED_FIELDS):
+            missing = [field for field in REQUIRED_FIELDS if field not in payload]
+            logger.warning(f"⚠️ Dropping message {message.message_id}: missing fields: {missing}")
+            self.stats["skipped"] += 1
+            await asyncio.to_thread(self.queue.ack, message)
+            return
+
+        heartbeat = asyncio.create_task(self._keep_invisible(message))
+        try:
+            output = await run_nemo_agent_workflow(
+                github_link=payload["github_link"],
+                jira_story=payload["jira_story"],
+                jira_story_id=payload["jira_story_id"],
+                is_data_analysis_task=str(payload["is_data_analysis_task"]).lower() == "true",
+                workspace_id=message.message_id,
+                runtime="ecs",
+                speculative_candidates=payload.get("speculative_candidates")
+            )
+            logger.info(f"✅ Workflow result for {payload['jira_story_id']}: {output}")
+            self.stats["succeeded"] += 1
+            await asyncio.to_thread(self.queue.ack, message)
+        except asyncio.CancelledError:
+            self.stats["released"] += 1
+            await asyncio.to_thread(self.queue.release, message)
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error processing {message.message_id}: {str(e)}")
+            traceback.print_exc()
+            self.stats["failed"] += 1
+            await asyncio.to_thread(self.queue.release, message)
+        finally:
+            heartbeat.cancel()
+            cleanup_workspace(payload["github_link"], message.message_id)  # Best effort, never raises
+
+    async def _consume(self, slot: int) -> None:
+        """One concurrency slot: receive a message, process it, repeat until stopped."""
+        while not self.stop_event.is_set():
+            try:
+                messages = await asyncio.to_thread(self.queue.receive, 1, self.wait_seconds)
+            except Exception as e:
+                logger.error(f"❌ [slot {slot}] Could not receive messages: {e}")
+                self.stats["worker_errors"] += 1
+                await asyncio.sleep(5)  # Back off instead of spinning on a queue outage
+                continue
+            for message in messages:
+                if self.stop_event.is_set():
+                    await asyncio.to_thread(self.queue.release, message)
+                    self.stats["released"] += 1
+                    continue
+                logger.info(f"[slot {slot}] Processing message {message.message_id}")
+                try:
+                    await self.handle_message(message)
+                except Exception as e:
+                    # Keep the slot alive: a failure around one message must not shrink the pool
+                    logger.error(f"❌ [slot {slot}] Unexpected error handling {message.message_id}: {e}")
+                    traceback.print_exc()
+                    self.stats["worker_errors"] += 1
+
+    async def run(self) -> Dict[str, int]:
+        """
+        Run until stopped and return job counters. `worker_errors` counts failures of the worker
+        itself (queue access, errors outside a job), as opposed to failed stories.
+        """
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not on the main thread / unsupported platform
+
+        if self.use_mcp:
+            # Connect before taking jobs; workflows then reuse the pooled sessions
+            await get_mcp_pool().get_tools_async()
+
+        consumers = [asyncio.create_task(self._consume(slot)) for slot in range(self.concurrency)]
+        await self.stop_event.wait()
+
+        # Give in-flight stories a chance to finish; the rest are released back to the queue
+        _, pending = await asyncio.wait(consumers, timeout=self.shutdown_timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await asyncio.to_thread(get_mcp_pool().close)
+
+        logger.info(f"✅ Worker stopped: {self.stats}")
+        return self.stats
@@ -0,0 +1,114 @@
+import os
+import logging
+from typing import Any, Dict, Optional
+
+from checkpoint import checkpoint_location
+from job_queue import JobQueue, create_job_queue
+
+logger = logging.getLogger(__name__)
+
+class JobDispatcher:
+    """Hands a story off to another compute target that continues from its checkpoint."""
+
+    def dispatch(self, payload: Dict[str, Any]) -> str:
+        """Start the story elsewhere and return an identifier for the new run."""
+        raise NotImplementedError
+
+class EcsTaskDispatcher(JobDispatcher):
+    """Starts a Fargate task running `ecs_main.start_ecs_task` for the story."""
+
+    def __init__(
+        self,
+        cluster: str,
+        task_definition: str,
+        container_name: str,
+        subnets: list,
+        security_groups: Optional[list] = None,
+        region_name: str = "us-east-1"
+    ):
+        self.cluster = cluster
+        self.task_definition = task_definition
+        self.container_name = container_name
+        self.subnets = subnets
+        self.security_groups = security_groups or []
+        import boto3  # Deferred: only needed once a story is handed off
+        self.client = boto3.Session().client("ecs", region_name=region_name)
+
+    def dispatch(self, payload: Dict[str, Any]) -> str:
+        environment = [
+            {"name": "GITHUB_LINK", "value": payload["github_link"]},
+            {"name": "JIRA_STORY", "value": payload["jira_story"]},
+            {"name": "JIRA_STORY_ID", "value": payload["jira_story_id"]},
+            {"name": "IS_DATA_ANALYSIS_TASK", "value": str(payload["is_data_analysis_task"]).lower()},
+        ]
+        # Resume with the settings the story started with
+        if payload.get("speculative_candidates"):
+            environment.append({"name": "SPECULATIVE_CANDIDATES", "value": str(payload["speculative_candidates"])})
+        # The task must read the same checkpoints the Lambda wrote
+        environment.append({"name": "NEMO_CHECKPOINT_LOCATION", "value": checkpoint_location()})
+
+        response = self.client.run_task(
+            cluster=self.cluster,
+            taskDefinition=self.task_definition,
+            launchType="FARGATE",
+            count=1,
+            networkConfiguration={
+                "awsvpcConfiguration": {
+                    "subnets": self.subnets,
+                    "securityGroups": self.security_groups,
+                    "assignPublicIp": "ENABLED",
+                }
+            },
+            overrides={"containerOverrides": [{"name": self.container_name, "environment": environment}]},
+        )
+        if response.get("failures"):
+            raise RuntimeError(f"ECS run_task failed: {response['failures']}")
+        return response["tasks"][0]["taskArn"]
+
+class QueueDispatcher(JobDispatcher):
+    """
+    Enqueues the story for an ECS worker (see `ecs_worker.NemoWorker`).
+
+    With a `file://` or `memory://` queue this is the local stand-in used for testing handoffs.
+    """
+
+    def __init__(self, queue: JobQueue):
+        self.queue = queue
+
+    def dispatch(self, payload: Dict[str, Any]) -> str:
+        return self.queue.send(payload, group_id=payload.get("jira_story_id"))
+
+def create_dispatcher() -> Optional[JobDispatcher]:
+    """
+    Build the handoff dispatcher from NEMO_HANDOFF_TARGET:
+    - `ecs`: run a Fargate task (configured via NEMO_ECS_* variables)
+    - any queue URL accepted by `create_job_queue` (SQS, `file://<dir>`, `memory://`)
+    Returns None when handoff is not configured.
+
+    ECS tasks and SQS workers run on other hosts, so they only resume from the checkpoint when
+    it is on S3; with a local NEMO_CHECKPOINT_LOCATION a handed-off story starts over.
+    """
+    target = os.getenv("NEMO_HANDOFF_TARGET")
+    if not target:
+        return None
+    is_remote_target = not target.startswith(("file://", "memory://"))
+    if is_remote_target and not checkpoint_location().startswith("s3://"):
+        logger.warning(
+            f"⚠️ NEMO_HANDOFF_TARGET={target} but checkpoints are stored locally at {checkpoint_location()}: "
+            "handed-off stories will restart from scratch. Set NEMO_CHECKPOINT_LOCATION=s3://<bucket>/<prefix>."
+        )
+    if target == "ecs":
+        return EcsTaskDispatcher(
+            cluster=os.environ["NEMO_ECS_CLUSTER"],
+            task_definition=os.environ["NEMO_ECS_TASK_DEFINITION"],
+            container_name=os.getenv("NEMO_ECS_CONTAINER_NAME", "nemo-ai-container"),
+            subnets=[s for s in os.getenv("NEMO_ECS_SUBNETS", "").split(",") if s],
+            security_groups=[s for s in os.getenv("NEMO_ECS_SECURITY_GROUPS", "").split(",") if s],
+        )
+    return QueueDispatcher(create_job_queue(target))
+
+def handoff_story(dispatcher: JobDispatcher, payload: Dict[str, Any]) -> str:
+    """Dispatch a story and log where it went."""
+    run_id = dispatcher.dispatch(payload)
+    print(f"🚚 Handed off {payload['jira_story_id']} to {type(dispatcher).__name__}: {run_id}")
+    return run_id
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STATUS_IN_FLIGHT = "in_flight"
+STATUS_COMPLETED = "completed"
+
+class StoryInProgressError(RuntimeError):
+    """Raised when an identical story is already running in another process."""
+
+def make_idempotency_key(repo_url: str, jira_story_id: str, base_commit: str, is_data_analysis_task: bool) -> str:
+    """Stable key for one story run against one base commit of one repo."""
+    raw = json.dumps([repo_url.lower().rstrip("/"), jira_story_id, base_commit, bool(is_data_analysis_task)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class IdempotencyStore:
+    """Records in-flight and completed story runs. Subclass to plug in another backend."""
+
+    def claim(self, key: str, owner: str, lease_seconds: int) -> Optional[Dict[str, Any]]:
+        """
+        Atomically mark `key` as in flight for `owner`.
+
+        Returns None if the claim succeeded, otherwise the existing record
+        (a completed run, or an in-flight run whose lease has not expired).
+        """
+        raise NotImplementedError
+
+    def complete(self, key: str, owner: str, result: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def release(self, key: str, owner: str) -> None:
+        """Drop an in-flight claim after a failed run so the story can be retried."""
+        raise NotImplementedError
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """IdempotencyStore backed by a local SQLite file."""
+
+    def __init__(self, db_path: str = "/tmp/nemo-idempotency.db"):
+        self.db_path = db_path
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS story_runs ("
+                "key TEXT PRIMARY KEY, status TEXT NOT NULL, owner TEXT NOT NULL, "
+                "lease_expires_at REAL, result TEXT, updated_at REAL NOT NULL)"
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps the store safe to use from worker threads
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def claim(self, key: str, owner: str, lease_seconds: int) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT status, owner, lease_expires_at, result FROM story_runs WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                status, current_owner, lease_expires_at, result = row
+                if status == STATUS_COMPLETED:
+                    conn.execute("COMMIT")
+                    return {"status": status, "owner": current_owner, "result": json.loads(result)}
+                if lease_expires_at and lease_expires_at > now:
+                    conn.execute("COMMIT")
+                    return {"status": status, "owner": current_owner, "lease_expires_at": lease_expires_at}
+            conn.execute(
+                "INSERT OR REPLACE INTO story_runs (key, status, owner, lease_expires_at, result, updated_at) "
+                "VALUES (?, ?, ?, ?, NULL, ?)",
+                (key, STATUS_IN_FLIGHT, owner, now + lease_seconds, now)
+            )
+            conn.execute("COMMIT")
+            return None
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, key: str, owner: str, result: Dict[str, Any]) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE story_runs SET status = ?, result = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE key = ? AND owner = ?",
+                (STATUS_COMPLETED, json.dumps(result, default=str), time.time(), key, owner)
+            )
+        finally:
+            conn.close()
+
+    def release(self, key: str, owner: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM story_runs WHERE key = ? AND owner = ? AND status = ?",
+                (key, owner, STATUS_IN_FLIGHT)
+            )
+        finally:
+            conn.close()
+
+def create_idempotency_store(location: Optional[str] = None) -> IdempotencyStore:
+    """Build an IdempotencyStore from NEMO_IDEMPOTENCY_LOCATION (a local SQLite file by default)."""
+    location = location or os.getenv("NEMO_IDEMPOTENCY_LOCATION", "/tmp/nemo-idempotency.db")
+    if location.startswith("sqlite://"):
+        location = location[len("sqlite://"):]
+    return SQLiteIdempotencyStore(location)
+
+class IdempotencyGuard:
+    """
+    Runs each story at most once per idempotency key.
+
+    Callers in the same process attach to the in-flight run and share its result. A run
+    that already completed returns its cached result. A run in flight in another process
+    raises StoryInProgressError, so the message is redelivered and later hits the cache.
+    """
+
+    def __init__(self, store: IdempotencyStore, lease_seconds: int = 1800):
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, run_story: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        if key in self._in_flight:
+            logger.info(f"♻️ Attaching to in-flight run {key[:12]}")
+            return await asyncio.shield(self._in_flight[key])
+
+        # Register before the first await so concurrent callers in this process attach to us
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        claimed = False
+        try:
+            existing = await asyncio.to_thread(self.store.claim, key, self.owner, self.lease_seconds)
+            if existing and existing["status"] == STATUS_COMPLETED:
+                logger.info(f"♻️ Returning cached result for {key[:12]}")
+                result = {**existing["result"], "cached": True}
+            elif existing:
+                raise StoryInProgressError(f"Story run {key[:12]} is already in progress on {existing['owner']}")
+            else:
+                claimed = True
+                result = await run_story()
+                await asyncio.to_thread(self.store.complete, key, self.owner, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            if claimed:
+                await asyncio.to_thread(self.store.release, key, self.owner)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Mark as retrieved when nobody attached
+            raise
+        finally:
+            self._in_flight.pop(key, None)
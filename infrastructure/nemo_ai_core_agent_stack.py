@@ -5,6 +5,7 @@ from aws_cdk import (
     Stack,
     Duration,
     aws_lambda as _lambda,
+    aws_s3 as _s3,
     aws_sqs as _sqs,
     aws_lambda_event_sources as _event_sources,
     aws_iam as _iam,
@@ -18,6 +19,21 @@ open_telemetry_envs = {
     key: value for key, value in os.environ.items() if key.startswith("OTEL_")
 }
 
+# Lambda-to-ECS handoff: the ECS cluster and task definition are deployed outside this stack.
+# Handoff is enabled when NEMO_ECS_TASK_DEFINITION (a task definition ARN) is set in .lambda.env.
+ecs_handoff_config = {
+    key: os.getenv(key, "")
+    for key in (
+        "NEMO_ECS_CLUSTER",
+        "NEMO_ECS_TASK_DEFINITION",
+        "NEMO_ECS_CONTAINER_NAME",
+        "NEMO_ECS_SUBNETS",
+        "NEMO_ECS_SECURITY_GROUPS",
+        "NEMO_ECS_TASK_ROLE_ARN",
+        "NEMO_ECS_EXECUTION_ROLE_ARN",
+    )
+}
+
 class NemoCoreAgentStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -30,6 +46,22 @@ class NemoCoreAgentStack(Stack):
             display_name='nemo-ai-agentic-lambda-container'
         )
 
+        # Checkpoints live on S3 so an ECS task (or a redelivery on another Lambda) resumes them
+        checkpoint_bucket = _s3.Bucket(
+            self, "NemoCheckpointBucket",
+            encryption=_s3.BucketEncryption.S3_MANAGED,
+            block_public_access=_s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            lifecycle_rules=[_s3.LifecycleRule(expiration=Duration.days(14))]
+        )
+
+        handoff_envs = {}
+        if ecs_handoff_config["NEMO_ECS_TASK_DEFINITION"]:
+            handoff_envs = {
+                "NEMO_HANDOFF_TARGET": "ecs",
+                **{key: value for key, value in ecs_handoff_config.items() if value and not key.endswith("_ROLE_ARN")},
+            }
+
         docker_lambda = _lambda.DockerImageFunction(
             self, "NemoAgentDockerLambda",
             code=_lambda.DockerImageCode.from_ecr(
@@ -42,6 +74,9 @@ class NemoCoreAgentStack(Stack):
                 "LOG_LEVEL": "INFO",
                 "AWS_ACCOUNT_ID": aws_account,
                 "AGENT_OBSERVABILITY_ENABLED": "true",
+                "NEMO_BATCH_MAX_CONCURRENCY": "4",
+                "NEMO_CHECKPOINT_LOCATION": f"s3://{checkpoint_bucket.bucket_name}/nemo-checkpoints",
+                **handoff_envs,
                 **open_telemetry_envs
             }
         )
@@ -54,7 +89,8 @@ class NemoCoreAgentStack(Stack):
         docker_lambda.add_event_source(
             _event_sources.SqsEventSource(
                 queue,
-                batch_size=1,
+                batch_size=4,
+                report_batch_item_failures=True,
                 enabled=True
             )
         )
@@ -104,6 +140,44 @@ class NemoCoreAgentStack(Stack):
             )
         )
 
+        checkpoint_bucket.grant_read_write(docker_lambda)
+
+        # Lambda-to-ECS handoff when a story is about to outlive the invocation
+        if handoff_envs:
+            # Any revision of the task definition family: arn:aws:ecs:<region>:<account>:task-definition/<family>:*
+            task_definition_family_arn = ":".join(ecs_handoff_config["NEMO_ECS_TASK_DEFINITION"].split(":")[:6])
+            run_task_statement = _iam.PolicyStatement(
+                actions=["ecs:RunTask"],
+                resources=[f"{task_definition_family_arn}:*"],
+            )
+            if ecs_handoff_config["NEMO_ECS_CLUSTER"].startswith("arn:"):
+                run_task_statement.add_condition("ArnEquals", {"ecs:cluster": ecs_handoff_config["NEMO_ECS_CLUSTER"]})
+            docker_lambda.add_to_role_policy(run_task_statement)
+
+            task_role_arns = [
+                ecs_handoff_config[key] for key in ("NEMO_ECS_TASK_ROLE_ARN", "NEMO_ECS_EXECUTION_ROLE_ARN")
+                if ecs_handoff_config[key]
+            ]
+            if task_role_arns:
+                docker_lambda.add_to_role_policy(
+                    _iam.PolicyStatement(
+                        actions=["iam:PassRole"],
+                        resources=task_role_arns,
+                        conditions={"StringEquals": {"iam:PassedToService": "ecs-tasks.amazonaws.com"}},
+                    )
+                )
+            if ecs_handoff_config["NEMO_ECS_TASK_ROLE_ARN"]:
+                # The task resumes the checkpoints the Lambda wrote
+                checkpoint_bucket.grant_read_write(
+                    _iam.Role.from_role_arn(self, "NemoEcsTaskRole", ecs_handoff_config["NEMO_ECS_TASK_ROLE_ARN"])
+                )
+
+        CfnOutput(
+            self, "CheckpointBucketName",
+            value=checkpoint_bucket.bucket_name,
+            description="S3 bucket for workflow checkpoints (set NEMO_CHECKPOINT_LOCATION on ECS tasks to s3://<bucket>/nemo-checkpoints)"
+        )
+
         CfnOutput(
             self, "LambdaFunctionName",
             value=docker_lambda.function_name,
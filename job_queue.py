@@ -0,0 +1,198 @@
+import os
+import json
+import uuid
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class QueueMessage:
+    """A single story job pulled from a queue."""
+    message_id: str
+    body: Dict[str, Any]
+    receipt_handle: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+class JobQueue:
+    """Minimal queue interface consumed by the ECS worker."""
+
+    def receive(self, max_messages: int = 1, wait_seconds: int = 20) -> List[QueueMessage]:
+        """Return up to `max_messages` messages, blocking at most `wait_seconds`."""
+        raise NotImplementedError
+
+    def ack(self, message: QueueMessage) -> None:
+        """Delete a message that was processed successfully."""
+        raise NotImplementedError
+
+    def release(self, message: QueueMessage) -> None:
+        """Make a message visible again so it is redelivered."""
+        raise NotImplementedError
+
+    def extend_visibility(self, message: QueueMessage, seconds: int) -> None:
+        """Keep an in-flight message hidden from other consumers for `seconds` more."""
+
+    def send(self, body: Dict[str, Any], group_id: Optional[str] = None) -> str:
+        """Enqueue a new message and return its id."""
+        raise NotImplementedError
+
+class SQSJobQueue(JobQueue):
+    """JobQueue backed by an Amazon SQS (standard or FIFO) queue."""
+
+    def __init__(self, queue_url: str, session: Optional["boto3.Session"] = None, region_name: str = "us-east-1"):
+        import boto3  # Deferred: in-memory and local queues never need it
+        self.queue_url = queue_url
+        self.is_fifo = queue_url.endswith(".fifo")
+        self.client = (session or boto3.Session()).client("sqs", region_name=region_name)
+
+    def receive(self, max_messages: int = 1, wait_seconds: int = 20) -> List[QueueMessage]:
+        response = self.client.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=min(max(max_messages, 1), 10),
+            WaitTimeSeconds=min(wait_seconds, 20),
+            AttributeNames=["All"],
+        )
+        messages = []
+        for raw in response.get("Messages", []):
+            try:
+                body = json.loads(raw["Body"])
+            except json.JSONDecodeError:
+                logger.warning(f"⚠️ Dropping message with invalid JSON body: {raw['MessageId']}")
+                self.client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=raw["ReceiptHandle"])
+                continue
+            messages.append(QueueMessage(
+                message_id=raw["MessageId"],
+                body=body,
+                receipt_handle=raw["ReceiptHandle"],
+                attributes=raw.get("Attributes", {}),
+            ))
+        return messages
+
+    def ack(self, message: QueueMessage) -> None:
+        self.client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=message.receipt_handle)
+
+    def release(self, message: QueueMessage) -> None:
+        self.extend_visibility(message, 0)
+
+    def extend_visibility(self, message: QueueMessage, seconds: int) -> None:
+        self.client.change_message_visibility(
+            QueueUrl=self.queue_url,
+            ReceiptHandle=message.receipt_handle,
+            VisibilityTimeout=seconds,
+        )
+
+    def send(self, body: Dict[str, Any], group_id: Optional[str] = None) -> str:
+        params: Dict[str, Any] = {"QueueUrl": self.queue_url, "MessageBody": json.dumps(body)}
+        if self.is_fifo:
+            params["MessageGroupId"] = group_id or body.get("jira_story_id", "nemo-ai")
+            params["MessageDeduplicationId"] = str(uuid.uuid4())
+        return self.client.send_message(**params)["MessageId"]
+
+class InMemoryJobQueue(JobQueue):
+    """Process-local JobQueue, used for tests and local runs."""
+
+    def __init__(self, bodies: Optional[List[Dict[str, Any]]] = None):
+        self._pending: Deque[QueueMessage] = deque()
+        self._in_flight: Dict[str, QueueMessage] = {}
+        self._lock = threading.Lock()
+        self.acked: List[QueueMessage] = []
+        for body in bodies or []:
+            self.send(body)
+
+    def receive(self, max_messages: int = 1, wait_seconds: int = 20) -> List[QueueMessage]:
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            with self._lock:
+                messages = []
+                while self._pending and len(messages) < max_messages:
+                    message = self._pending.popleft()
+                    self._in_flight[message.message_id] = message
+                    messages.append(message)
+            if messages or time.monotonic() >= deadline:
+                return messages
+            time.sleep(min(0.1, wait_seconds))
+
+    def ack(self, message: QueueMessage) -> None:
+        with self._lock:
+            self._in_flight.pop(message.message_id, None)
+            self.acked.append(message)
+
+    def release(self, message: QueueMessage) -> None:
+        with self._lock:
+            if self._in_flight.pop(message.message_id, None):
+                self._pending.append(message)
+
+    def send(self, body: Dict[str, Any], group_id: Optional[str] = None) -> str:
+        message = QueueMessage(message_id=str(uuid.uuid4()), body=body)
+        with self._lock:
+            self._pending.append(message)
+        return message.message_id
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+class FileJobQueue(JobQueue):
+    """
+    JobQueue backed by a directory of JSON files, for local runs without SQS.
+
+    Pending jobs live in `<root>/pending/*.json`; receiving a job moves it to
+    `<root>/in_flight/`, acking deletes it and releasing moves it back.
+    """
+
+    def __init__(self, root_dir: str):
+        self.pending_dir = os.path.join(root_dir, "pending")
+        self.in_flight_dir = os.path.join(root_dir, "in_flight")
+        os.makedirs(self.pending_dir, exist_ok=True)
+        os.makedirs(self.in_flight_dir, exist_ok=True)
+
+    def receive(self, max_messages: int = 1, wait_seconds: int = 20) -> List[QueueMessage]:
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            messages = []
+            for file_name in sorted(os.listdir(self.pending_dir)):
+                if len(messages) >= max_messages:
+                    break
+                if not file_name.endswith(".json"):
+                    continue
+                source = os.path.join(self.pending_dir, file_name)
+                target = os.path.join(self.in_flight_dir, file_name)
+                try:
+                    os.rename(source, target)  # Atomic claim; another consumer may have won
+                except FileNotFoundError:
+                    continue
+                with open(target, "r", encoding="utf-8") as f:
+                    body = json.load(f)
+                messages.append(QueueMessage(message_id=file_name[:-len(".json")], body=body, receipt_handle=target))
+            if messages or time.monotonic() >= deadline:
+                return messages
+            time.sleep(min(0.5, wait_seconds))
+
+    def ack(self, message: QueueMessage) -> None:
+        if message.receipt_handle and os.path.exists(message.receipt_handle):
+            os.remove(message.receipt_handle)
+
+    def release(self, message: QueueMessage) -> None:
+        if message.receipt_handle and os.path.exists(message.receipt_handle):
+            os.rename(message.receipt_handle, os.path.join(self.pending_dir, f"{message.message_id}.json"))
+
+    def send(self, body: Dict[str, Any], group_id: Optional[str] = None) -> str:
+        # Time-prefixed names keep FIFO order when listing the directory
+        message_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        tmp_path = os.path.join(self.pending_dir, f".{message_id}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(body, f)
+        os.rename(tmp_path, os.path.join(self.pending_dir, f"{message_id}.json"))
+        return message_id
+
+def create_job_queue(queue_url: str) -> JobQueue:
+    """Build a JobQueue from a URL: `file://<dir>`, `memory://` or an SQS queue URL."""
+    if queue_url.startswith("file://"):
+        return FileJobQueue(queue_url[len("file://"):])
+    if queue_url.startswith("memory://"):
+        return InMemoryJobQueue()
+    return SQSJobQueue(queue_url)
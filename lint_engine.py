@@ -0,0 +1,272 @@
+import os
+import ast
+import atexit
+import asyncio
+import hashlib
+import logging
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import metrics, timed
+
+logger = logging.getLogger(__name__)
+
+PYLINT_TEMPLATE = "{abspath}:{line}:{column}: {msg_id}: {msg} ({symbol})"
+LINT_STATE_DIR = "/tmp/nemo-lint"  # dmypy status files and mypy caches, kept out of the checkouts
+
+async def run_command(cmd: List[str], cwd: Optional[str] = None) -> Dict[str, Any]:
+    """Run a command without blocking the event loop; a missing executable gives returncode 127."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd, cwd=cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+    except FileNotFoundError:
+        return {"returncode": 127, "stdout": f"{cmd[0]}: command not found"}
+    stdout, _ = await process.communicate()
+    return {"returncode": process.returncode, "stdout": stdout.decode(errors="replace").strip()}
+
+def file_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def project_root(files: List[str]) -> str:
+    """The git checkout (repo or worktree) containing `files`, else their common directory."""
+    common = os.path.commonpath([os.path.dirname(f) for f in files])
+    path = common
+    while path != os.path.dirname(path):
+        if os.path.exists(os.path.join(path, ".git")):
+            return path
+        path = os.path.dirname(path)
+    return common
+
+def local_imports(path: str, root: str) -> List[str]:
+    """Files under `root` that `path` imports directly, by absolute or relative import."""
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError):
+        return []
+    here = os.path.dirname(path)
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules += [(base, alias.name) for alias in node.names for base in (root, here)]
+        elif isinstance(node, ast.ImportFrom):
+            bases = (root, here)
+            if node.level:
+                base = here
+                for _ in range(node.level - 1):
+                    base = os.path.dirname(base)
+                bases = (base,)
+            for base in bases:
+                if node.module:
+                    modules.append((base, node.module))
+                # `from package import module` imports a module too
+                modules += [(base, f"{node.module}.{alias.name}" if node.module else alias.name) for alias in node.names]
+
+    files = set()
+    for base, module in modules:
+        module_path = os.path.join(base, *module.split("."))
+        for candidate in (f"{module_path}.py", os.path.join(module_path, "__init__.py")):
+            if os.path.isfile(candidate):
+                files.add(os.path.abspath(candidate))
+    files.discard(path)
+    return sorted(files)
+
+def split_output(output: str, files: List[str]) -> Dict[str, List[str]]:
+    """Group `path:...` lines of a batch run by file; indented lines continue the previous message."""
+    by_file: Dict[str, List[str]] = {f: [] for f in files}
+    current = None
+    for line in output.splitlines():
+        if line[:1].isspace():
+            if current is not None:
+                by_file[current].append(line)
+            continue
+        current = next((f for f in files if line.startswith(f"{f}:")), None)
+        if current is not None:
+            by_file[current].append(line)
+    return by_file
+
+class LintEngine:
+    """
+    Runs pylint (errors only) and mypy over a batch of files, each linter once for the whole batch
+    and both concurrently. mypy goes through a `dmypy` daemon per project root, kept warm across
+    calls, with plain `mypy` as the fallback. A root's daemon is stopped when its workspace or
+    worktree is removed (`release`), and at most `max_daemons` run at once (least recently used
+    ones are stopped first).
+
+    Results are cached per file and content hash, so a file unchanged since it was last linted
+    (e.g. across revisions) is not linted again. mypy results are also keyed on the content
+    hashes of the local modules the file imports, since its type errors depend on them.
+    """
+
+    def __init__(self, use_dmypy: bool = True, cache_size: int = 4096, max_daemons: int = 4):
+        self.use_dmypy = use_dmypy and shutil.which("dmypy") is not None
+        self.cache_size = cache_size
+        self.max_daemons = max(1, max_daemons)
+        self.cache: "OrderedDict[Tuple[str, ...], Dict[str, Any]]" = OrderedDict()
+        self.daemons: "OrderedDict[str, str]" = OrderedDict()  # project root -> dmypy status file
+        self.lock = threading.Lock()
+
+    def _cache_get(self, key: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            result = self.cache.get(key)
+            if result is not None:
+                self.cache.move_to_end(key)
+            return result
+
+    def _cache_put(self, key: Tuple[str, ...], result: Dict[str, Any]) -> None:
+        with self.lock:
+            self.cache[key] = result
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    async def lint(self, files: List[str]) -> Dict[str, Dict[str, Any]]:
+        """{file: {"pylint": {returncode, stdout}, "mypy": {returncode, stdout}}} for each of `files`."""
+        files = sorted({os.path.abspath(f) for f in files})
+        if not files:
+            return {}
+        root = project_root(files)
+        keys = await asyncio.to_thread(self._cache_keys, files, root)
+
+        async def run_linter(name: str) -> Dict[str, Dict[str, Any]]:
+            results: Dict[str, Dict[str, Any]] = {}
+            for f in files:
+                cached = self._cache_get(keys[name][f])
+                if cached is not None:
+                    results[f] = cached
+            metrics.incr("lint_cache_hits", len(results), tool=name)
+            pending = [f for f in files if f not in results]
+            if not pending:
+                return results
+            metrics.incr("lint_cache_misses", len(pending), tool=name)
+            with timed("lint_seconds", tool=name):
+                if name == "pylint":
+                    fresh = await self._pylint(pending, root)
+                else:
+                    fresh = await self._mypy(pending, root)
+            for f, result in fresh.items():
+                if result.pop("cacheable", False):
+                    self._cache_put(keys[name][f], result)
+                results[f] = result
+            return results
+
+        pylint_results, mypy_results = await asyncio.gather(run_linter("pylint"), run_linter("mypy"))
+        return {f: {"pylint": pylint_results[f], "mypy": mypy_results[f]} for f in files}
+
+    @staticmethod
+    def _cache_keys(files: List[str], root: str) -> Dict[str, Dict[str, Tuple[str, ...]]]:
+        hashes: Dict[str, str] = {}
+
+        def hashed(path: str) -> str:
+            if path not in hashes:
+                hashes[path] = file_hash(path) or "missing"
+            return hashes[path]
+
+        keys: Dict[str, Dict[str, Tuple[str, ...]]] = {"pylint": {}, "mypy": {}}
+        for f in files:
+            imports_hash = hashlib.sha256("".join(dep + hashed(dep) for dep in local_imports(f, root)).encode()).hexdigest()
+            keys["pylint"][f] = ("pylint", f, hashed(f))
+            keys["mypy"][f] = ("mypy", f, hashed(f), imports_hash)
+        return keys
+
+    @staticmethod
+    def _per_file(output: Dict[str, Any], files: List[str], failed: bool, error_marker: str = "") -> Dict[str, Dict[str, Any]]:
+        """Split a batch result per file; a run that failed without per-file output goes to every file, uncached."""
+        by_file = split_output(output["stdout"], files)
+        if failed and not any(by_file.values()):
+            return {f: {"returncode": output["returncode"], "stdout": output["stdout"]} for f in files}
+        return {
+            f: {
+                "returncode": 1 if any(error_marker in line for line in lines) else 0,
+                "stdout": "\n".join(lines),
+                "cacheable": True,
+            }
+            for f, lines in by_file.items()
+        }
+
+    async def _pylint(self, files: List[str], root: str) -> Dict[str, Dict[str, Any]]:
+        output = await run_command(
+            ["pylint", "--errors-only", "--jobs=0", "--score=n", f"--msg-template={PYLINT_TEMPLATE}", *files], cwd=root
+        )
+        # Bits 1 (fatal) and 32 (usage error) mean pylint could not check the files
+        failed = output["returncode"] == 127 or bool(output["returncode"] & 33)
+        return self._per_file(output, files, failed)
+
+    async def _mypy(self, files: List[str], root: str) -> Dict[str, Dict[str, Any]]:
+        state = self.state_path(root)
+        mypy_args = ["--show-absolute-path", "--cache-dir", f"{state}.mypy_cache"]
+        if self.use_dmypy:
+            status_file = f"{state}.dmypy.json"
+            with self.lock:
+                self.daemons[root] = status_file
+                self.daemons.move_to_end(root)
+                evicted = []
+                while len(self.daemons) > self.max_daemons:
+                    evicted.append(self.daemons.popitem(last=False))
+            for evicted_root, evicted_status_file in evicted:
+                await asyncio.to_thread(self._stop_daemon, evicted_root, evicted_status_file)
+            output = await run_command(["dmypy", "--status-file", status_file, "run", "--", *mypy_args, *files], cwd=root)
+            if output["returncode"] != 2:
+                return self._per_file(output, files, failed=False, error_marker=": error:")
+            logger.warning(f"⚠️ dmypy failed in {root}, falling back to mypy: {output['stdout'][:200]}")
+            metrics.incr("lint_dmypy_failures")
+        output = await run_command(["mypy", *mypy_args, *files], cwd=root)
+        return self._per_file(output, files, failed=output["returncode"] not in (0, 1), error_marker=": error:")
+
+    @staticmethod
+    def state_path(root: str) -> str:
+        """Prefix for the lint state of `root` outside the checkout, so it never shows up in diffs."""
+        os.makedirs(LINT_STATE_DIR, exist_ok=True)
+        return os.path.join(LINT_STATE_DIR, hashlib.sha1(root.encode()).hexdigest()[:16])
+
+    @staticmethod
+    def _stop_daemon(root: str, status_file: str) -> None:
+        if os.path.exists(status_file):
+            subprocess.run(["dmypy", "--status-file", status_file, "stop"], cwd=root if os.path.isdir(root) else None, capture_output=True)
+            metrics.incr("lint_dmypy_stops")
+
+    def release(self, root: str) -> None:
+        """Stop the daemon of `root` and drop its mypy cache, once its checkout is removed."""
+        root = os.path.abspath(root)
+        with self.lock:
+            status_file = self.daemons.pop(root, None)
+        if status_file:
+            self._stop_daemon(root, status_file)
+        shutil.rmtree(f"{self.state_path(root)}.mypy_cache", ignore_errors=True)
+
+    def close(self) -> None:
+        """Stop the dmypy daemons started by this engine."""
+        with self.lock:
+            daemons = list(self.daemons.items())
+            self.daemons.clear()
+        for root, status_file in daemons:
+            self._stop_daemon(root, status_file)
+
+_lint_engine: Optional[LintEngine] = None
+
+def get_lint_engine() -> LintEngine:
+    """
+    Process-wide engine, configured by NEMO_LINT_DMYPY (`off` runs plain mypy), NEMO_LINT_CACHE_SIZE
+    and NEMO_LINT_MAX_DAEMONS.
+    """
+    global _lint_engine
+    if _lint_engine is None:
+        _lint_engine = LintEngine(
+            use_dmypy=os.getenv("NEMO_LINT_DMYPY", "on").lower() not in ("off", "false", "0"),
+            cache_size=int(os.getenv("NEMO_LINT_CACHE_SIZE", "4096")),
+            max_daemons=int(os.getenv("NEMO_LINT_MAX_DAEMONS", "4"))
+        )
+        atexit.register(_lint_engine.close)
+    return _lint_engine
+
+def release_lint_workspace(root: str) -> None:
+    """Stop the dmypy daemon of a removed workspace or worktree (no-op when nothing was linted)."""
+    if _lint_engine is not None:
+        _lint_engine.release(root)
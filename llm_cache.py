@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, List, Optional
+
+from strands.models import Model
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MODE_PASSTHROUGH = "passthrough"  # Always call the model, never touch the cache
+MODE_RECORD = "record"            # Serve hits from the cache, call the model on a miss and record it
+MODE_REPLAY = "replay"            # Serve hits only; a miss raises LLMCacheMissError (deterministic reruns)
+CACHE_MODES = (MODE_PASSTHROUGH, MODE_RECORD, MODE_REPLAY)
+
+class LLMCacheMissError(RuntimeError):
+    """Raised in replay mode when a model call has no recorded response."""
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Replace tool use ids (random per run) with their order of appearance, so the same
+    conversation with the same tool results hashes identically across runs.
+    """
+    tool_use_ids: Dict[str, str] = {}
+
+    def normalize(value: Any) -> Any:
+        if isinstance(value, dict):
+            normalized = {}
+            for k, v in value.items():
+                if k == "toolUseId" and isinstance(v, str):
+                    normalized[k] = tool_use_ids.setdefault(v, f"tool-{len(tool_use_ids)}")
+                else:
+                    normalized[k] = normalize(v)
+            return normalized
+        if isinstance(value, list):
+            return [normalize(v) for v in value]
+        if isinstance(value, bytes):
+            return hashlib.sha256(value).hexdigest()
+        return value
+
+    return normalize(messages)
+
+def make_llm_cache_key(
+    model_id: str,
+    system_prompt: Optional[str],
+    messages: List[Dict[str, Any]],
+    tool_specs: Optional[List[Dict[str, Any]]] = None
+) -> str:
+    """Stable key over the model id, system prompt, message history (incl. tool results) and available tools."""
+    raw = json.dumps({
+        "model_id": model_id,
+        "system_prompt": system_prompt or "",
+        "messages": normalize_messages(messages),
+        "tool_specs": sorted((tool_specs or []), key=lambda spec: spec.get("name", "")),
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class LLMCacheStore:
+    """Stores recorded model responses as lists of stream events. Subclass to plug in another backend."""
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def put(self, key: str, model_id: str, events: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+class SQLiteLLMCacheStore(LLMCacheStore):
+    """
+    LLMCacheStore backed by a local SQLite file, bounded by entry count and total size.
+
+    When either bound is exceeded the least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path: str = "/tmp/nemo-llm-cache.db", max_entries: int = 5000, max_bytes: int = 500_000_000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                "key TEXT PRIMARY KEY, model_id TEXT NOT NULL, events TEXT NOT NULL, "
+                "size INTEGER NOT NULL, created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_responses_last_used ON llm_responses (last_used_at)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT events FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE llm_responses SET last_used_at = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+        finally:
+            conn.close()
+
+    def put(self, key: str, model_id: str, events: List[Dict[str, Any]]) -> None:
+        payload = json.dumps(events, default=str)
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model_id, events, size, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_id, payload, len(payload), now, now)
+            )
+            evicted = self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        if evicted:
+            metrics.incr("llm_cache_evictions", evicted)
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        count, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+        evicted = 0
+        rows = conn.execute("SELECT key, size FROM llm_responses ORDER BY last_used_at ASC").fetchall()
+        for key, size in rows:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            count -= 1
+            total_bytes -= size
+            evicted += 1
+        return evicted
+
+def create_llm_cache_store(location: Optional[str] = None) -> LLMCacheStore:
+    """Build the cache store from NEMO_LLM_CACHE_LOCATION (a local SQLite file by default)."""
+    location = location or os.getenv("NEMO_LLM_CACHE_LOCATION", "/tmp/nemo-llm-cache.db")
+    if location.startswith("file://"):
+        location = location[len("file://"):]
+    return SQLiteLLMCacheStore(
+        location,
+        max_entries=int(os.getenv("NEMO_LLM_CACHE_MAX_ENTRIES", "5000")),
+        max_bytes=int(os.getenv("NEMO_LLM_CACHE_MAX_MB", "500")) * 1_000_000
+    )
+
+class CachingModel(Model):
+    """
+    Wraps a strands Model and records or replays its streamed responses.
+
+    Only complete responses (ending in messageStop) are recorded, so a call interrupted
+    mid-stream is simply made again on the next run. Store reads and writes run in a thread,
+    off the event loop shared by concurrent stories.
+    """
+
+    def __init__(self, model: Model, store: LLMCacheStore, mode: str = MODE_RECORD):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}', expected one of {CACHE_MODES}")
+        self.model = model
+        self.store = store
+        self.mode = mode
+
+    @property
+    def model_id(self) -> str:
+        config = self.model.get_config()
+        return str(config.get("model_id", type(self.model).__name__)) if isinstance(config, dict) else type(self.model).__name__
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any
+    ) -> AsyncIterable[Dict[str, Any]]:
+        if self.mode == MODE_PASSTHROUGH:
+            async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                yield event
+            return
+
+        model_id = self.model_id
+        key = make_llm_cache_key(model_id, system_prompt, messages, tool_specs)
+        cached = await asyncio.to_thread(self.store.get, key)
+        if cached is not None:
+            metrics.incr("llm_cache_hits", model=model_id)
+            for event in cached:
+                yield event
+            return
+
+        metrics.incr("llm_cache_misses", model=model_id)
+        if self.mode == MODE_REPLAY:
+            raise LLMCacheMissError(f"No recorded response for {model_id} call {key[:12]}")
+
+        events: List[Dict[str, Any]] = []
+        async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+            events.append(event)
+            yield event
+        if any("messageStop" in event for event in events):
+            await asyncio.to_thread(self.store.put, key, model_id, events)
+
+    def structured_output(self, output_model: Any, prompt: Any, system_prompt: Optional[str] = None, **kwargs: Any) -> AsyncGenerator[Dict[str, Any], None]:
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+_llm_cache_store: Optional[LLMCacheStore] = None
+
+def wrap_with_llm_cache(model: Model, mode: Optional[str] = None) -> Model:
+    """Wrap `model` according to NEMO_LLM_CACHE_MODE (passthrough by default, i.e. unwrapped)."""
+    global _llm_cache_store
+    mode = mode or os.getenv("NEMO_LLM_CACHE_MODE", MODE_PASSTHROUGH)
+    if mode == MODE_PASSTHROUGH:
+        return model
+    if _llm_cache_store is None:
+        _llm_cache_store = create_llm_cache_store()
+    return CachingModel(model, _llm_cache_store, mode)
+
+def llm_cache_stats() -> Dict[str, Any]:
+    """Hit/miss/eviction counters recorded so far in this process."""
+    counters = metrics.snapshot(prefix="llm_cache_")["counters"]
+    hits = sum(v for k, v in counters.items() if k.startswith("llm_cache_hits"))
+    misses = sum(v for k, v in counters.items() if k.startswith("llm_cache_misses"))
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        "evictions": counters.get("llm_cache_evictions", 0),
+        "by_model": counters,
+    }
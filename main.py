@@ -1,12 +1,169 @@
 import json
+import time
 import asyncio
+from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
 
-from run_workflow import run_nemo_agent_workflow
+from constants import BATCH_MAX_CONCURRENCY, HANDOFF_SAFETY_MARGIN_SECONDS
+from handoff import JobDispatcher, create_dispatcher, handoff_story
+from router import RerouteRequired
+from run_workflow import (
+    REQUIRED_FIELDS,
+    run_nemo_agent_workflow,
+    cleanup_workspace,
+    save_interrupted_work,
+    track_run_threads,
+    wait_for_run_threads,
+)
+from utils import parse_github_url
 
 load_dotenv()
 
+# How long a stopped run's threads get to finish before its changes are saved and its workspace removed
+THREAD_DRAIN_TIMEOUT_SECONDS = HANDOFF_SAFETY_MARGIN_SECONDS / 4
+
+def parse_record(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the record payload, or None if it is missing required fields."""
+    payload = json.loads(record["body"])
+    print("payload", payload)
+
+    if not all(field in payload for field in REQUIRED_FIELDS):
+        missing = [field for field in REQUIRED_FIELDS if field not in payload]
+        print(f"⚠️ Skipping message: missing fields: {missing} {str(record)}")
+        return None
+    try:
+        parse_github_url(payload["github_link"])
+    except ValueError as e:
+        print(f"⚠️ Skipping message: {e} {str(record)}")
+        return None
+    return payload
+
+async def run_until_deadline(
+    payload: Dict[str, Any],
+    message_id: Optional[str],
+    deadline: Optional[float],
+    runtime: str = "local"
+) -> bool:
+    """
+    Run the workflow, cancelling it at `deadline` (a time.monotonic() value). A run already
+    opening its PR is never cancelled: it is left to finish, since a handoff would open it again.
+
+    Returns True if it finished, False if it was stopped or rerouted for a handoff. Completed
+    steps are already persisted by the workflow checkpoint, so the next runner resumes from there.
+    """
+    finalizing = asyncio.Event()
+    workflow_task = asyncio.create_task(run_nemo_agent_workflow(
+        github_link=payload["github_link"],
+        jira_story=payload["jira_story"],
+        jira_story_id=payload["jira_story_id"],
+        is_data_analysis_task=payload['is_data_analysis_task'],
+        workspace_id=message_id,
+        runtime=runtime,
+        speculative_candidates=payload.get("speculative_candidates"),
+        finalizing=finalizing
+    ))
+    timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+    done, _ = await asyncio.wait({workflow_task}, timeout=timeout)
+    if not done and finalizing.is_set():
+        print(f"⏳ Lambda deadline approaching while opening the PR for {payload['jira_story_id']}, finishing it here")
+        done, _ = await asyncio.wait({workflow_task})
+    if done and isinstance(workflow_task.exception(), RerouteRequired):
+        print(f"🧭 {workflow_task.exception()}, handing off {payload['jira_story_id']}")
+        return False
+    if not done:
+        print(f"⏳ Lambda deadline approaching, stopping {payload['jira_story_id']} for handoff")
+        workflow_task.cancel()
+        await asyncio.gather(workflow_task, return_exceptions=True)
+        return False
+
+    output = workflow_task.result()
+    print(f"✅ Workflow complete for {payload['jira_story_id']}: {output}")
+    return True
+
+async def process_record(
+    record: Dict[str, Any],
+    semaphore: asyncio.Semaphore,
+    deadline: Optional[float] = None,
+    dispatcher: Optional[JobDispatcher] = None
+) -> Optional[str]:
+    """Run the workflow for one SQS record. Returns the messageId if it should be redelivered."""
+    message_id = record.get("messageId")
+    try:
+        payload = parse_record(record)
+    except (json.JSONDecodeError, TypeError) as e:
+        print(f"⚠️ Skipping message: invalid body: {e} {str(record)}")
+        return None
+    if payload is None:
+        return None  # Malformed messages will never succeed, so don't redeliver them
+
+    async with semaphore:
+        # Cancelling the workflow does not stop what it already runs in threads (clone, lint, tools)
+        threads = track_run_threads()
+        try:
+            # Without a dispatcher there is nowhere to hand off to, so run everything here
+            if dispatcher is None:
+                await run_until_deadline(payload, message_id, deadline=None)
+                return None
+            if await run_until_deadline(payload, message_id, deadline, runtime="lambda"):
+                return None
+            if await wait_for_run_threads(threads, timeout=THREAD_DRAIN_TIMEOUT_SECONDS) and not payload["is_data_analysis_task"]:
+                await asyncio.to_thread(save_interrupted_work, payload["github_link"], payload["jira_story_id"], message_id)
+            await asyncio.to_thread(handoff_story, dispatcher, payload)
+            return None  # The handoff target owns the story now
+        except Exception as e:
+            print(f"❌ Error processing record {message_id}: {str(e)}")
+            return message_id
+        finally:
+            if message_id:
+                # Never remove a workspace a thread is still writing to; /tmp is cleaned up with the container
+                if await wait_for_run_threads(threads, timeout=THREAD_DRAIN_TIMEOUT_SECONDS):
+                    cleanup_workspace(payload["github_link"], message_id)
+                else:
+                    print(f"⚠️ Threads of {message_id} still running, leaving its workspace in place")
+
+async def process_batch(
+    records: List[Dict[str, Any]],
+    max_concurrency: int = BATCH_MAX_CONCURRENCY,
+    deadline: Optional[float] = None,
+    dispatcher: Optional[JobDispatcher] = None
+) -> List[str]:
+    """
+    Run all records concurrently on one event loop and return the messageIds that failed.
+
+    When a `dispatcher` is given, records still running at `deadline` are handed off to it.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    results = await asyncio.gather(*[
+        process_record(record, semaphore, deadline=deadline, dispatcher=dispatcher) for record in records
+    ], return_exceptions=True)
+
+    failed_message_ids = []
+    for record, result in zip(records, results):
+        # An exception escaping process_record only fails its own record, never the whole batch
+        if isinstance(result, BaseException):
+            print(f"❌ Unexpected error processing record {record.get('messageId')}: {result}")
+            result = record.get("messageId")
+        if result:
+            failed_message_ids.append(result)
+    return failed_message_ids
+
+class LocalLambdaContext:
+    """Minimal stand-in for the Lambda context, so deadline handoffs can be exercised locally."""
+
+    def __init__(self, timeout_seconds: float = 900):
+        self._deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self) -> int:
+        return int(max(self._deadline - time.monotonic(), 0) * 1000)
+
+def get_handoff_deadline(context) -> Optional[float]:
+    """Return the time.monotonic() at which running stories must be handed off, if known."""
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return None
+    remaining_seconds = context.get_remaining_time_in_millis() / 1000
+    return time.monotonic() + remaining_seconds - HANDOFF_SAFETY_MARGIN_SECONDS
+
 def lambda_handler(event, context):
 
     # if context.log_group_name and context.log_stream_name:
@@ -18,39 +175,24 @@ def lambda_handler(event, context):
             "statusCode": 200,
             "body": "No records found in the event payload."
         }
-    
-    required_fields = ["github_link", "jira_story", "jira_story_id", "is_data_analysis_task"]
-    for record in event["Records"]:
-        try:
-            payload = json.loads(record["body"])
-            print("payload", payload)
-
-            if not all(field in payload for field in required_fields):
-                missing = [field for field in required_fields if field not in payload]
-                print(f"⚠️ Skipping message: missing fields: {missing} {str(record)}")
-                continue  # Skip this message but continue processing others
-            
-            output = asyncio.run(run_nemo_agent_workflow(
-                github_link=payload["github_link"],
-                jira_story=payload["jira_story"],
-                jira_story_id=payload["jira_story_id"],
-                is_data_analysis_task=payload['is_data_analysis_task']
-            ))
-            print(f"✅ Lambda workflow complete: {output}")
-            return {"statusCode": 200, "body": "Workflow complete."}
 
-        except Exception as e:
-            print(f"❌ Error processing record: {str(e)}")
-        
+    failed_message_ids = asyncio.run(process_batch(
+        event["Records"],
+        deadline=get_handoff_deadline(context),
+        dispatcher=create_dispatcher()
+    ))
+    print(f"✅ Lambda batch complete: {len(event['Records']) - len(failed_message_ids)}/{len(event['Records'])} records succeeded")
+
+    # Partial batch response: only the failed messages are returned to the queue
     return {
-        "statusCode": 200,
-        "body": "Lambda executed. All messages processed."
+        "batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed_message_ids]
     }
 
 if __name__ == "__main__":
     payload = {
         'Records': [
             {
+                'messageId': 'local-test-1',
                 'body': json.dumps({
                     "github_link": "https://github.com/harshitsinghai77/nemo-ai-demo-1",
                     "jira_story": "Create a new route inside the agentRoutes.py which takes two numbers from the query parameter and return the sum of it in JSON format, with keys like num1, num2, total",
@@ -59,6 +201,7 @@ if __name__ == "__main__":
                 })
             }
         ]}
-    response = lambda_handler(payload, context=None)
+    # Set NEMO_HANDOFF_TARGET=file:///tmp/nemo-handoff to exercise the deadline handoff locally
+    response = lambda_handler(payload, context=LocalLambdaContext())
     print("=== Lambda Response ===")
-    print(response)
\ No newline at end of file
+    print(response)
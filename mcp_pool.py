@@ -0,0 +1,165 @@
+import time
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from strands.tools.mcp import MCPClient
+from strands.types.tools import AgentTool
+
+from metrics import metrics, timed
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PooledConnection:
+    name: str
+    factory: Callable[[], MCPClient]
+    client: Optional[MCPClient] = None
+    tools: Optional[List[Any]] = None
+    connected_at: Optional[float] = None
+    listed_at: Optional[float] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+class PooledMCPTool(AgentTool):
+    """
+    One tool of a pooled server, resolved from the pool on every call. Tools listed from a
+    session are bound to its client, so without this an agent that got its tools before the
+    pool reconnected the server would keep calling the old, stopped client.
+    """
+
+    def __init__(self, pool: "MCPConnectionPool", server: str, tool: AgentTool):
+        super().__init__()
+        self.pool = pool
+        self.server = server
+        self.tool = tool
+
+    @property
+    def tool_name(self) -> str:
+        return self.tool.tool_name
+
+    @property
+    def tool_spec(self) -> Dict[str, Any]:
+        return self.tool.tool_spec
+
+    @property
+    def tool_type(self) -> str:
+        return self.tool.tool_type
+
+    def current(self) -> AgentTool:
+        """The tool of the server's current session (the listed one if the server no longer has it)."""
+        for tool in self.pool.get_server_tools(self.server):
+            if tool.tool_name == self.tool_name:
+                return tool
+        return self.tool
+
+    async def stream(self, tool_use: Dict[str, Any], invocation_state: Dict[str, Any], **kwargs: Any):
+        tool = await asyncio.to_thread(self.current)
+        async for event in tool.stream(tool_use, invocation_state, **kwargs):
+            yield event
+
+class MCPConnectionPool:
+    """
+    Keeps one MCP session per server alive for the life of the process and caches each
+    server's tool listing for `tools_ttl_seconds`.
+
+    Re-listing after the TTL doubles as a health check: if it fails, the session is torn down
+    and reconnected (up to `connect_retries` times). `get_tools` hands out PooledMCPTools, which
+    follow the server to its new session when that happens mid-run.
+
+    Methods are blocking and thread-safe, so the pool works across event loops (e.g. one
+    `asyncio.run` per warm Lambda invocation); async callers should use `get_tools_async`.
+    """
+
+    def __init__(
+        self,
+        factories: Dict[str, Callable[[], MCPClient]],
+        tools_ttl_seconds: float = 600,
+        connect_retries: int = 2,
+        retry_backoff_seconds: float = 1.0
+    ):
+        self.connections = {name: PooledConnection(name, factory) for name, factory in factories.items()}
+        self.tools_ttl_seconds = tools_ttl_seconds
+        self.connect_retries = connect_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+    def _connect(self, conn: PooledConnection) -> None:
+        client = conn.factory()
+        with timed("mcp_connect_seconds", server=conn.name):
+            client.start()
+        conn.client = client
+        conn.connected_at = time.monotonic()
+        metrics.incr("mcp_connects", server=conn.name)
+        logger.info(f"🔌 Connected MCP server '{conn.name}'")
+
+    def _disconnect(self, conn: PooledConnection) -> None:
+        if conn.client is not None:
+            try:
+                conn.client.stop(None, None, None)
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing MCP server '{conn.name}': {e}")
+        conn.client = None
+        conn.tools = None
+        conn.connected_at = None
+        conn.listed_at = None
+
+    def get_server_tools(self, name: str) -> List[Any]:
+        """Return the tools of one server's current session, connecting or reconnecting as needed."""
+        conn = self.connections[name]
+        with conn.lock:
+            if conn.tools is not None and time.monotonic() - conn.listed_at < self.tools_ttl_seconds:
+                metrics.incr("mcp_tools_cache_hits", server=name)
+                return conn.tools
+
+            metrics.incr("mcp_tools_cache_misses", server=name)
+            for attempt in range(self.connect_retries + 1):
+                try:
+                    if conn.client is None:
+                        self._connect(conn)
+                    with timed("mcp_list_tools_seconds", server=name):
+                        conn.tools = conn.client.list_tools_sync()
+                    conn.listed_at = time.monotonic()
+                    return conn.tools
+                except Exception as e:
+                    logger.warning(f"⚠️ MCP server '{name}' failed (attempt {attempt + 1}): {e}")
+                    self._disconnect(conn)
+                    if attempt == self.connect_retries:
+                        raise
+                    metrics.incr("mcp_reconnects", server=name)
+                    time.sleep(self.retry_backoff_seconds * (2 ** attempt))
+
+    def get_tools(self) -> Dict[str, List[Any]]:
+        """Tools of every server for agents, keyed like `workflow.create_mcp_clients`."""
+        return {name: self._pooled(name, self.get_server_tools(name)) for name in self.connections}
+
+    async def get_tools_async(self) -> Dict[str, List[Any]]:
+        """Like `get_tools`, with cold servers connected concurrently off the event loop."""
+        names = list(self.connections)
+        tools = await asyncio.gather(*[asyncio.to_thread(self.get_server_tools, name) for name in names])
+        return {name: self._pooled(name, server_tools) for name, server_tools in zip(names, tools)}
+
+    def _pooled(self, name: str, tools: List[Any]) -> List[PooledMCPTool]:
+        return [PooledMCPTool(self, name, tool) for tool in tools]
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop a server's session (or all of them) so the next call reconnects."""
+        for conn in self.connections.values():
+            if name is None or conn.name == name:
+                with conn.lock:
+                    self._disconnect(conn)
+
+    def close(self) -> None:
+        self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            name: {
+                "connected": conn.client is not None,
+                "tools": len(conn.tools) if conn.tools is not None else None,
+                "connected_seconds": round(now - conn.connected_at, 1) if conn.connected_at else None,
+                "listing_age_seconds": round(now - conn.listed_at, 1) if conn.listed_at else None,
+            }
+            for name, conn in self.connections.items()
+        }
@@ -0,0 +1,94 @@
+import time
+import threading
+import statistics
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+def _metric_key(name: str, labels: Dict[str, Any]) -> str:
+    if not labels:
+        return name
+    return f"{name}{{{','.join(f'{k}={v}' for k, v in sorted(labels.items()))}}}"
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+class MetricsRegistry:
+    """
+    Process-wide, thread-safe counters, gauges and timing samples.
+
+    Metrics are keyed by name plus optional labels, e.g. `tool_latency_seconds{tool=shell}`.
+    `snapshot()` returns plain dicts that can be logged or attached to workflow results.
+    """
+
+    def __init__(self, max_samples: int = 2000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._samples: Dict[str, List[float]] = {}
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels: Any) -> None:
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _metric_key(name, labels)
+        with self._lock:
+            samples = self._samples.setdefault(key, [])
+            samples.append(value)
+            if len(samples) > self.max_samples:
+                del samples[: len(samples) - self.max_samples]
+
+    def samples(self, name: str, **labels: Any) -> List[float]:
+        with self._lock:
+            return list(self._samples.get(_metric_key(name, labels), []))
+
+    def percentile(self, name: str, pct: float, default: Optional[float] = None, **labels: Any) -> Optional[float]:
+        values = self.samples(name, **labels)
+        return _percentile(values, pct) if values else default
+
+    def counter(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get(_metric_key(name, labels), 0)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, Any]:
+        with self._lock:
+            counters = {k: v for k, v in self._counters.items() if k.startswith(prefix)}
+            gauges = {k: v for k, v in self._gauges.items() if k.startswith(prefix)}
+            samples = {k: list(v) for k, v in self._samples.items() if k.startswith(prefix)}
+        timings = {
+            key: {
+                "count": len(values),
+                "sum": round(sum(values), 4),
+                "p50": round(statistics.median(values), 4),
+                "p95": round(_percentile(values, 95), 4),
+                "max": round(max(values), 4),
+            }
+            for key, values in samples.items() if values
+        }
+        return {"counters": counters, "gauges": gauges, "timings": timings}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._samples.clear()
+
+metrics = MetricsRegistry()
+
+@contextmanager
+def timed(name: str, **labels: Any) -> Iterator[None]:
+    """Record the wall time of a block as a `name` sample."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(name, time.perf_counter() - start, **labels)
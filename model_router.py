@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
+from strands.models import Model
+from strands.types.exceptions import ModelThrottledException
+
+from metrics import metrics
+from models import CLAUDE_SONNET_4, NOVA_PRO, get_model
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+# Per step type: `models` in order of preference, plus optional
+# - `max_p95_seconds`: skip a model whose observed p95 call latency is above this
+# - `large_input_tokens` / `large_input_models`: candidates for inputs at least that large
+DEFAULT_ROUTING_POLICY: Dict[str, Dict[str, Any]] = {
+    "planner": {"models": [CLAUDE_SONNET_4, NOVA_PRO]},
+    "senior_engineer": {"models": [CLAUDE_SONNET_4, NOVA_PRO]},
+    "code_reviewer": {"models": [CLAUDE_SONNET_4, NOVA_PRO]},
+    "review": {"models": [NOVA_PRO, CLAUDE_SONNET_4]},
+    "review_aggregator": {"models": [NOVA_PRO, CLAUDE_SONNET_4]},
+    "story_scoring": {"models": [NOVA_PRO, CLAUDE_SONNET_4]},
+    "doc": {"models": [NOVA_PRO, CLAUDE_SONNET_4]},
+    "data_analyst": {"models": [CLAUDE_SONNET_4, NOVA_PRO]},
+}
+
+# Bedrock error codes worth retrying on another model rather than backing off on the same one
+FALLBACK_ERROR_CODES = {"ThrottlingException", "ServiceUnavailableException", "ModelNotReadyException", "ModelTimeoutException"}
+
+MIN_LATENCY_SAMPLES = 5
+
+def load_routing_policy(raw: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    DEFAULT_ROUTING_POLICY updated per step from NEMO_MODEL_ROUTING, either inline JSON or the
+    path of a JSON file, e.g. {"doc": {"models": ["us.amazon.nova-lite-v1:0"]}}.
+    """
+    raw = raw if raw is not None else os.getenv("NEMO_MODEL_ROUTING", "")
+    policy = {step: dict(rule) for step, rule in DEFAULT_ROUTING_POLICY.items()}
+    if not raw:
+        return policy
+    if not raw.lstrip().startswith("{"):
+        with open(raw, "r", encoding="utf-8") as f:
+            raw = f.read()
+    for step, rule in json.loads(raw).items():
+        policy.setdefault(step, {}).update(rule)
+    return policy
+
+def is_fallback_error(error: Exception) -> bool:
+    """Throttling, capacity and timeout errors, which another model may well not hit."""
+    if isinstance(error, (ModelThrottledException, ReadTimeoutError, ConnectTimeoutError, EndpointConnectionError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code") in FALLBACK_ERROR_CODES
+    return False
+
+class ModelRouter:
+    """
+    Picks the model for each call of a step from its routing policy, using the input size, the
+    observed p95 latency per model (`model_call_seconds`) and which models are cooling down
+    after throttling. Decisions are counted in `model_route_decisions{step,model,reason}`.
+    """
+
+    def __init__(self, policy: Optional[Dict[str, Dict[str, Any]]] = None, throttle_cooldown_seconds: float = 30):
+        self.policy = policy if policy is not None else load_routing_policy()
+        self.throttle_cooldown_seconds = throttle_cooldown_seconds
+        self.throttled_until: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def mark_throttled(self, model_id: str) -> None:
+        with self.lock:
+            self.throttled_until[model_id] = time.monotonic() + self.throttle_cooldown_seconds
+
+    def is_throttled(self, model_id: str) -> bool:
+        with self.lock:
+            return self.throttled_until.get(model_id, 0) > time.monotonic()
+
+    def candidates(self, step: str, input_tokens: int) -> List[str]:
+        rule = self.policy.get(step) or {"models": [CLAUDE_SONNET_4]}
+        threshold = rule.get("large_input_tokens")
+        if threshold and input_tokens >= threshold and rule.get("large_input_models"):
+            return list(rule["large_input_models"])
+        return list(rule["models"])
+
+    def route(self, step: str, input_tokens: int, exclude: Tuple[str, ...] = ()) -> Optional[Tuple[str, str]]:
+        """Return (model_id, reason), or None when every candidate has already been tried."""
+        candidates = self.candidates(step, input_tokens)
+        available = [m for m in candidates if m not in exclude]
+        if not available:
+            return None
+        max_p95 = (self.policy.get(step) or {}).get("max_p95_seconds")
+
+        decision = None
+        for index, model_id in enumerate(candidates):
+            if model_id in exclude or self.is_throttled(model_id):
+                continue
+            # The last available model is used however slow it is
+            if max_p95 and model_id != available[-1] and len(metrics.samples("model_call_seconds", model=model_id)) >= MIN_LATENCY_SAMPLES:
+                if metrics.percentile("model_call_seconds", 95, model=model_id) > max_p95:
+                    continue
+            decision = (model_id, "preferred" if index == 0 else "fallback" if exclude else "rerouted")
+            break
+        if decision is None:
+            # Everything is cooling down: use the model that recovers first
+            with self.lock:
+                model_id = min(available, key=lambda m: self.throttled_until.get(m, 0))
+            decision = (model_id, "all_throttled")
+
+        metrics.incr("model_route_decisions", step=step, model=decision[0], reason=decision[1])
+        return decision
+
+class RoutedModel(Model):
+    """
+    strands Model that asks the router for a model on every call, and retries the call on the
+    next candidate when it fails with a throttling or timeout error before streaming anything.
+    """
+
+    def __init__(self, step: str, router: "ModelRouter"):
+        self.step = step
+        self.router = router
+        self.config: Dict[str, Any] = {"model_id": f"routed:{step}"}
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any
+    ) -> AsyncIterable[Dict[str, Any]]:
+        input_tokens = (len(system_prompt or "") + len(json.dumps(messages, default=str))) // CHARS_PER_TOKEN
+        tried: Tuple[str, ...] = ()
+        last_error: Optional[Exception] = None
+        while True:
+            decision = self.router.route(self.step, input_tokens, exclude=tried)
+            if decision is None:
+                raise last_error  # Every candidate failed; let the agent's own retry handle it
+            model_id, _ = decision
+            streamed = False
+            start = time.perf_counter()
+            try:
+                async for event in get_model(model_id).stream(messages, tool_specs, system_prompt, **kwargs):
+                    streamed = True
+                    yield event
+            except Exception as e:
+                if streamed or not is_fallback_error(e):
+                    raise
+                logger.warning(f"⚠️ {model_id} failed for step '{self.step}' ({type(e).__name__}), falling back")
+                metrics.incr("model_fallbacks", step=self.step, model=model_id, error=type(e).__name__)
+                self.router.mark_throttled(model_id)
+                tried += (model_id,)
+                last_error = e
+                continue
+            metrics.observe("model_call_seconds", time.perf_counter() - start, model=model_id)
+            return
+
+    def structured_output(self, output_model: Any, prompt: Any, system_prompt: Optional[str] = None, **kwargs: Any) -> AsyncGenerator[Dict[str, Any], None]:
+        model_id, _ = self.router.route(self.step, 0)
+        return get_model(model_id).structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+_model_router: Optional[ModelRouter] = None
+
+def get_model_router() -> ModelRouter:
+    """Process-wide router, so throttling seen by one workflow steers the others too."""
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter(
+            throttle_cooldown_seconds=float(os.getenv("NEMO_MODEL_THROTTLE_COOLDOWN_SECONDS", "30"))
+        )
+    return _model_router
+
+@lru_cache(maxsize=None)
+def get_step_model(step: str) -> Model:
+    """The routed model for agents of `step` (a key of the routing policy)."""
+    return RoutedModel(step, get_model_router())
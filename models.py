@@ -0,0 +1,69 @@
+from functools import lru_cache
+from typing import Callable, Optional
+
+import boto3
+from botocore.config import Config
+from strands.models import BedrockModel, Model
+
+from llm_cache import wrap_with_llm_cache
+from rate_limiter import rate_limit
+from prompt_cache import PromptCachingModel, bedrock_cache_config, prompt_cache_enabled
+
+CLAUDE_SONNET_4 = 'us.anthropic.claude-sonnet-4-20250514-v1:0'
+NOVA_PRO = 'us.amazon.nova-pro-v1:0'
+
+retry_config = Config(
+    retries={
+        'max_attempts': 5,
+        'mode': 'standard'  # or 'adaptive'
+    },
+    read_timeout=180
+)
+
+# For clients behind the rate limiter: botocore does not retry throttles on its own, so each one
+# reaches the limiter (which backs off, cuts concurrency and retries through its buckets)
+rate_limited_retry_config = Config(
+    retries={
+        'max_attempts': 1,
+        'mode': 'standard'
+    },
+    read_timeout=180
+)
+
+# Optional override for where agent models come from (e.g. the offline benchmark's scripted model)
+_model_factory: Optional[Callable[[str], Model]] = None
+
+def set_model_factory(factory: Optional[Callable[[str], Model]]) -> None:
+    """Build every agent model with `factory(model_id)` instead of Bedrock. Pass None to restore Bedrock."""
+    global _model_factory
+    _model_factory = factory
+    get_model.cache_clear()
+
+@lru_cache(maxsize=None)
+def get_boto_session() -> boto3.Session:
+    return boto3.Session()
+
+@lru_cache(maxsize=None)
+def get_model(model_id: str, temperature: Optional[float] = None) -> Model:
+    """
+    Return the shared model for `model_id` (and sampling `temperature`, if set), built on first use.
+
+    Bedrock models cache their stable prompt prefix (system prompt, tools and conversation so far,
+    see prompt_cache.py) and share a process-wide rate limiter per model id (see rate_limiter.py). The
+    model is wrapped in the record/replay cache when NEMO_LLM_CACHE_MODE is set (see llm_cache.py),
+    outside the limiter so cache hits cost no quota.
+    """
+    if _model_factory is not None:
+        model = _model_factory(model_id)
+    else:
+        model = BedrockModel(
+            model_id=model_id,
+            boto_session=get_boto_session(),
+            boto_client_config=rate_limited_retry_config,
+            **({"temperature": temperature} if temperature is not None else {}),
+            **bedrock_cache_config(model_id)
+        )
+        if prompt_cache_enabled():
+            model = PromptCachingModel(model, model_id)
+        model = rate_limit(model, model_id)
+    return wrap_with_llm_cache(model)
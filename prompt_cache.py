@@ -0,0 +1,102 @@
+import os
+import logging
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, List, Optional
+
+from strands.models import Model
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+def prompt_cache_enabled() -> bool:
+    return os.getenv("NEMO_BEDROCK_PROMPT_CACHE", "on").lower() not in ("off", "false", "0")
+
+def bedrock_cache_config(model_id: str) -> Dict[str, str]:
+    """
+    BedrockModel options that put cache points after the system prompt and, for Claude (Nova
+    does not cache tool definitions), after the tool specs.
+    """
+    if not prompt_cache_enabled():
+        return {}
+    config = {"cache_prompt": "default"}
+    if "anthropic" in model_id:
+        config["cache_tools"] = "default"
+    return config
+
+def with_message_cache_point(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Copy of `messages` with a single cache point closing the last message, so the next turn
+    of the conversation reads everything up to here from the cache. Earlier points are dropped
+    (Bedrock allows four per request, and the system prompt and tools use two).
+    """
+    if not messages:
+        return messages
+    formatted = [
+        {**message, "content": [block for block in message.get("content", []) if "cachePoint" not in block]}
+        for message in messages
+    ]
+    formatted[-1]["content"].append(dict(CACHE_POINT))
+    return formatted
+
+class PromptCachingModel(Model):
+    """
+    Wraps a BedrockModel (configured with `bedrock_cache_config`) to add a cache point to the
+    message history on every call, and records cached vs uncached input tokens per call as
+    `bedrock_input_tokens{model,kind}`.
+    """
+
+    def __init__(self, model: Model, model_id: str):
+        self.model = model
+        self.model_id = model_id
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any
+    ) -> AsyncIterable[Dict[str, Any]]:
+        async for event in self.model.stream(with_message_cache_point(messages), tool_specs, system_prompt, **kwargs):
+            usage = event.get("metadata", {}).get("usage") if isinstance(event, dict) else None
+            if usage:
+                self.record_usage(usage)
+            yield event
+
+    def record_usage(self, usage: Dict[str, Any]) -> None:
+        tokens = {
+            "uncached": int(usage.get("inputTokens", 0)),
+            "cache_read": int(usage.get("cacheReadInputTokens", 0)),
+            "cache_write": int(usage.get("cacheWriteInputTokens", 0)),
+        }
+        for kind, count in tokens.items():
+            metrics.incr("bedrock_input_tokens", count, model=self.model_id, kind=kind)
+        total = sum(tokens.values())
+        if total:
+            metrics.observe("prompt_cache_read_ratio", tokens["cache_read"] / total, model=self.model_id)
+        logger.info(
+            f"🗄️ {self.model_id} input tokens: {tokens['uncached']} uncached, "
+            f"{tokens['cache_read']} read from cache, {tokens['cache_write']} written to cache"
+        )
+
+    def structured_output(self, output_model: Any, prompt: Any, system_prompt: Optional[str] = None, **kwargs: Any) -> AsyncGenerator[Dict[str, Any], None]:
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+def prompt_cache_stats() -> Dict[str, Any]:
+    """Cached vs uncached input tokens per model recorded so far in this process."""
+    counters = metrics.snapshot(prefix="bedrock_input_tokens")["counters"]
+    by_model: Dict[str, Dict[str, float]] = {}
+    for key, value in counters.items():
+        labels = dict(part.split("=", 1) for part in key[key.index("{") + 1:-1].split(","))
+        by_model.setdefault(labels["model"], {})[labels["kind"]] = value
+    for tokens in by_model.values():
+        total = sum(tokens.values())
+        tokens["cache_read_ratio"] = round(tokens.get("cache_read", 0) / total, 3) if total else None
+    return by_model
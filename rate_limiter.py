@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterable, AsyncIterator, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+from strands.models import Model
+from strands.types.exceptions import ModelThrottledException
+
+from metrics import metrics
+
+CHARS_PER_TOKEN = 4
+
+# Per model id (or "default"); override with NEMO_BEDROCK_RATE_LIMITS='{"default": {"requests_per_minute": 50}}'
+DEFAULT_RATE_LIMITS: Dict[str, Dict[str, float]] = {
+    "default": {"requests_per_minute": 200, "tokens_per_minute": 400_000, "max_concurrency": 16, "min_concurrency": 1},
+}
+
+def is_throttling_error(error: Exception) -> bool:
+    if isinstance(error, ModelThrottledException):
+        return True
+    return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") == "ThrottlingException"
+
+class TokenBucket:
+    """Refills at `rate_per_second` up to `capacity`. Not thread-safe; callers hold a lock."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (requests bigger than the bucket only need it full)."""
+        self._refill()
+        needed = min(amount, self.capacity)
+        return 0.0 if self.tokens >= needed else (needed - self.tokens) / self.rate_per_second
+
+    def take(self, amount: float) -> None:
+        """Take `amount`, which may leave the bucket in debt (e.g. to settle actual usage)."""
+        self._refill()
+        self.tokens -= amount
+
+    def drain(self) -> None:
+        self._refill()
+        self.tokens = min(self.tokens, 0)
+
+class ModelRateLimiter:
+    """
+    Request and token buckets plus an adaptive concurrency limit for one model id.
+
+    Concurrency follows AIMD: it is halved on a throttling response and grows by one after a
+    window of successes. Only calls started after the last decrease can halve it again, so one
+    burst of throttled calls counts as a single congestion event. A throttle also drains both
+    buckets, so queued calls wait for the quota to refill instead of retrying straight into it.
+    """
+
+    def __init__(self, model_id: str, requests_per_minute: float, tokens_per_minute: float, max_concurrency: int, min_concurrency: int = 1):
+        self.model_id = model_id
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute / 60 * 10)
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute / 60 * 10)
+        self.max_concurrency = int(max_concurrency)
+        self.min_concurrency = int(min_concurrency)
+        self.concurrency_limit = self.max_concurrency
+        self.in_flight = 0
+        self.successes = 0
+        self.last_decrease_at = 0.0
+        self.lock = threading.Lock()
+
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int) -> AsyncIterator["Permit"]:
+        """Wait for a concurrency slot, one request and `estimated_tokens`, then hold the slot."""
+        start = time.perf_counter()
+        while True:
+            with self.lock:
+                if self.in_flight < self.concurrency_limit:
+                    wait = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                    if wait == 0:
+                        self.requests.take(1)
+                        self.tokens.take(estimated_tokens)
+                        self.in_flight += 1
+                        in_flight = self.in_flight
+                        break
+                else:
+                    wait = 0.05  # Poll for a free slot
+            await asyncio.sleep(min(max(wait, 0.01), 1.0))
+
+        waited = time.perf_counter() - start
+        metrics.observe("bedrock_queue_wait_seconds", waited, model=self.model_id)
+        metrics.gauge("bedrock_in_flight", in_flight, model=self.model_id)
+        permit = Permit(self, estimated_tokens, started_at=time.monotonic())
+        try:
+            yield permit
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        with self.lock:
+            self.tokens.take(actual_tokens - estimated_tokens)
+        metrics.incr("bedrock_tokens", actual_tokens, model=self.model_id)
+
+    def on_success(self) -> None:
+        with self.lock:
+            self.successes += 1
+            if self.successes >= self.concurrency_limit and self.concurrency_limit < self.max_concurrency:
+                self.concurrency_limit += 1
+                self.successes = 0
+            limit = self.concurrency_limit
+        metrics.incr("bedrock_requests", model=self.model_id)
+        metrics.gauge("bedrock_concurrency_limit", limit, model=self.model_id)
+
+    def on_throttle(self, started_at: float) -> None:
+        with self.lock:
+            if started_at >= self.last_decrease_at:
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit // 2)
+                self.last_decrease_at = time.monotonic()
+            self.successes = 0
+            self.requests.drain()
+            self.tokens.drain()
+            limit = self.concurrency_limit
+        metrics.incr("bedrock_throttles", model=self.model_id)
+        metrics.gauge("bedrock_concurrency_limit", limit, model=self.model_id)
+
+class Permit:
+    """A held concurrency slot; reports the call's actual token usage back to the limiter."""
+
+    def __init__(self, limiter: ModelRateLimiter, estimated_tokens: int, started_at: float):
+        self.limiter = limiter
+        self.estimated_tokens = estimated_tokens
+        self.started_at = started_at
+
+    def record_usage(self, total_tokens: int) -> None:
+        self.limiter.settle(self.estimated_tokens, total_tokens)
+
+class RateLimitedModel(Model):
+    """
+    Wraps a strands Model so every call goes through the shared limiter of its model id.
+
+    The limiter owns throttling retries: the wrapped Bedrock client is built without them (see
+    models.py), so every throttle reaches `on_throttle` and every retry goes back through the
+    buckets. A call throttled before streaming anything is retried up to `max_throttle_retries`
+    times, after an exponential backoff with jitter.
+    """
+
+    def __init__(self, model: Model, limiter: ModelRateLimiter, max_throttle_retries: int = 2, backoff_seconds: float = 1.0):
+        self.model = model
+        self.limiter = limiter
+        self.max_throttle_retries = max_throttle_retries
+        self.backoff_seconds = backoff_seconds
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any
+    ) -> AsyncIterable[Dict[str, Any]]:
+        estimated_tokens = (len(system_prompt or "") + len(json.dumps(messages, default=str))) // CHARS_PER_TOKEN
+        attempt = 0
+        while True:
+            streamed = False
+            async with self.limiter.acquire(estimated_tokens) as permit:
+                try:
+                    async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                        streamed = True
+                        usage = event.get("metadata", {}).get("usage") if isinstance(event, dict) else None
+                        if usage:
+                            permit.record_usage(int(usage.get("totalTokens", 0)))
+                        yield event
+                except Exception as e:
+                    if not is_throttling_error(e):
+                        raise
+                    self.limiter.on_throttle(permit.started_at)
+                    if streamed or attempt >= self.max_throttle_retries:
+                        raise
+                else:
+                    self.limiter.on_success()
+                    return
+            attempt += 1
+            metrics.incr("bedrock_throttle_retries", model=self.limiter.model_id)
+            await asyncio.sleep(self.backoff_seconds * 2 ** (attempt - 1) * random.uniform(0.5, 1.0))
+
+    def structured_output(self, output_model: Any, prompt: Any, system_prompt: Optional[str] = None, **kwargs: Any) -> AsyncGenerator[Dict[str, Any], None]:
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+_rate_limiters: Dict[str, ModelRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(model_id: str) -> ModelRateLimiter:
+    """Process-wide limiter per model id, configured by NEMO_BEDROCK_RATE_LIMITS."""
+    with _rate_limiters_lock:
+        if model_id not in _rate_limiters:
+            overrides = json.loads(os.getenv("NEMO_BEDROCK_RATE_LIMITS", "{}"))
+            limits = {
+                **DEFAULT_RATE_LIMITS["default"],
+                **overrides.get("default", {}),
+                **DEFAULT_RATE_LIMITS.get(model_id, {}),
+                **overrides.get(model_id, {}),
+            }
+            _rate_limiters[model_id] = ModelRateLimiter(model_id, **limits)
+        return _rate_limiters[model_id]
+
+def rate_limit(model: Model, model_id: str) -> Model:
+    """Wrap `model` in the limiter of `model_id`, retrying throttles NEMO_BEDROCK_THROTTLE_RETRIES times."""
+    return RateLimitedModel(model, get_rate_limiter(model_id), max_throttle_retries=int(os.getenv("NEMO_BEDROCK_THROTTLE_RETRIES", "2")))
+
+def rate_limiter_stats() -> Dict[str, Any]:
+    return {
+        model_id: {"concurrency_limit": limiter.concurrency_limit, "in_flight": limiter.in_flight}
+        for model_id, limiter in _rate_limiters.items()
+    }
@@ -0,0 +1,52 @@
+import re
+import json
+from typing import Any, Dict, List, Optional
+
+from constants import REVIEW_BLOCKING_SEVERITIES
+
+SEVERITIES = ("critical", "recommendation", "minor")
+
+def parse_review_verdict(feedback: str) -> Optional[Dict[str, Any]]:
+    """
+    The last ```json verdict block of a reviewer's reply (see `review_verdict_prompt`), or None
+    when the reply has no parseable verdict.
+    """
+    blocks = re.findall(r"```json\s*(\{.*?\})\s*```", feedback, re.DOTALL | re.IGNORECASE)
+    if not blocks:
+        return None
+    try:
+        verdict = json.loads(blocks[-1])
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(verdict, dict) or not isinstance(verdict.get("findings", []), list):
+        return None
+    return verdict
+
+def blocking_findings(verdict: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        finding for finding in verdict.get("findings", [])
+        if isinstance(finding, dict) and str(finding.get("severity", "")).lower() in REVIEW_BLOCKING_SEVERITIES
+    ]
+
+def review_approved(feedback: str) -> bool:
+    """
+    True when the reviewer raised nothing that needs a revision. Replies without a verdict
+    only count as approved if they are a bare LGTM, so a malformed verdict never skips work.
+    """
+    verdict = parse_review_verdict(feedback)
+    if verdict is None:
+        return re.search(r"^\W*LGTM\W*$", feedback, re.MULTILINE) is not None
+    return not blocking_findings(verdict)
+
+def count_findings(feedback: Dict[str, str]) -> Dict[str, int]:
+    """Findings per severity across all reviewers (unparseable replies are counted as `unparsed`)."""
+    counts = {severity: 0 for severity in (*SEVERITIES, "unparsed")}
+    for fb in feedback.values():
+        verdict = parse_review_verdict(fb)
+        if verdict is None:
+            counts["unparsed"] += 1
+            continue
+        for finding in verdict.get("findings", []):
+            severity = str(finding.get("severity", "")).lower() if isinstance(finding, dict) else ""
+            counts[severity if severity in counts else "minor"] += 1
+    return counts
@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import statistics
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from utils import filter_files
+
+logger = logging.getLogger(__name__)
+
+ROUTE_FAST = "fast"      # Reduced pipeline: plan, implement, score, doc (no review/revision)
+ROUTE_LAMBDA = "lambda"  # Full pipeline in the current Lambda invocation
+ROUTE_ECS = "ecs"        # Full pipeline, handed off to ECS straight away
+
+# Prior cost model in seconds, before calibration against recorded runs
+BASE_SECONDS = {ROUTE_FAST: 120.0, ROUTE_LAMBDA: 240.0, ROUTE_ECS: 240.0}
+SECONDS_PER_FILE = 0.15
+SECONDS_PER_MB = 20.0
+SECONDS_PER_STORY_CHAR = 0.2
+FAST_PATH_REVIEW_SHARE = 0.45  # Share of a full run spent in review + revision
+
+class RerouteRequired(Exception):
+    """Raised when a story should run on another compute target instead of here."""
+
+    def __init__(self, decision: "RouteDecision"):
+        super().__init__(f"Story routed to {decision.target} (predicted {decision.predicted_seconds:.0f}s)")
+        self.decision = decision
+
+@dataclass
+class RouteDecision:
+    target: str
+    predicted_seconds: float
+    prior_seconds: float
+    features: Dict[str, Any] = field(default_factory=dict)
+    run_id: Optional[int] = None
+
+def collect_features(repo_path: str, jira_story: str, is_data_analysis_task: bool) -> Dict[str, Any]:
+    """Cheap signals: repo file count and bytes (as seen by filter_files) and story length."""
+    files = json.loads(filter_files(repo_path))["files"]
+    total_bytes = 0
+    for path in files:
+        try:
+            total_bytes += os.path.getsize(path)
+        except OSError:
+            continue
+    return {
+        "file_count": len(files),
+        "repo_bytes": total_bytes,
+        "story_chars": len(jira_story),
+        "is_data_analysis_task": bool(is_data_analysis_task),
+    }
+
+class RouteHistory:
+    """SQLite log of predictions against actual run durations."""
+
+    def __init__(self, db_path: str = "/tmp/nemo-route-history.db"):
+        self.db_path = db_path
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS route_runs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, jira_story_id TEXT, target TEXT NOT NULL, "
+                "features TEXT NOT NULL, prior_seconds REAL NOT NULL, predicted_seconds REAL NOT NULL, actual_seconds REAL, "
+                "status TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def add(self, jira_story_id: str, decision: RouteDecision) -> int:
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO route_runs "
+                "(jira_story_id, target, features, prior_seconds, predicted_seconds, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, 'running', ?)",
+                (
+                    jira_story_id, decision.target, json.dumps(decision.features),
+                    decision.prior_seconds, decision.predicted_seconds, time.time()
+                )
+            )
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def finish(self, run_id: int, status: str, actual_seconds: Optional[float] = None) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE route_runs SET status = ?, actual_seconds = ? WHERE id = ?",
+                (status, actual_seconds, run_id)
+            )
+        finally:
+            conn.close()
+
+    def completed(self, targets: Optional[List[str]] = None, limit: int = 200) -> List[Dict[str, Any]]:
+        query = "SELECT target, prior_seconds, predicted_seconds, actual_seconds FROM route_runs WHERE status = 'success'"
+        params: tuple = ()
+        if targets:
+            query += f" AND target IN ({', '.join('?' for _ in targets)})"
+            params = tuple(targets)
+        query += " ORDER BY id DESC LIMIT ?"
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, params + (limit,)).fetchall()
+        finally:
+            conn.close()
+        return [
+            {"target": t, "prior_seconds": prior, "predicted_seconds": p, "actual_seconds": a}
+            for t, prior, p, a in rows
+        ]
+
+class StoryRouter:
+    """
+    Predicts a story's duration from cheap signals and picks where to run it.
+
+    Each prior estimate is scaled by the median actual/prior ratio of recent runs of the same
+    pipeline (fast, or full on Lambda/ECS), so the model calibrates itself as history accumulates.
+    """
+
+    def __init__(
+        self,
+        history: RouteHistory,
+        lambda_budget_seconds: float = 720,
+        fast_path_max_seconds: float = 180,
+        fast_path_max_story_chars: int = 400,
+        min_calibration_runs: int = 5
+    ):
+        self.history = history
+        self.lambda_budget_seconds = lambda_budget_seconds
+        self.fast_path_max_seconds = fast_path_max_seconds
+        self.fast_path_max_story_chars = fast_path_max_story_chars
+        self.min_calibration_runs = min_calibration_runs
+
+    @staticmethod
+    def _pipeline_targets(target: str) -> List[str]:
+        return [ROUTE_FAST] if target == ROUTE_FAST else [ROUTE_LAMBDA, ROUTE_ECS]
+
+    def calibration_factor(self, target: str) -> float:
+        runs = [r for r in self.history.completed(self._pipeline_targets(target)) if r["prior_seconds"] > 0]
+        if len(runs) < self.min_calibration_runs:
+            return 1.0
+        return statistics.median(r["actual_seconds"] / r["prior_seconds"] for r in runs)
+
+    def prior(self, features: Dict[str, Any], target: str) -> float:
+        seconds = (
+            BASE_SECONDS[target]
+            + SECONDS_PER_FILE * features["file_count"]
+            + SECONDS_PER_MB * features["repo_bytes"] / 1_000_000
+            + SECONDS_PER_STORY_CHAR * features["story_chars"]
+        )
+        if target == ROUTE_FAST:
+            seconds *= 1 - FAST_PATH_REVIEW_SHARE
+        return seconds
+
+    def decide(self, features: Dict[str, Any], target: str) -> RouteDecision:
+        prior = self.prior(features, target)
+        return RouteDecision(target, prior * self.calibration_factor(target), prior, features)
+
+    def route(self, features: Dict[str, Any]) -> RouteDecision:
+        """Pick the fast path, a full run within the Lambda budget, or ECS for long stories."""
+        if not features["is_data_analysis_task"] and features["story_chars"] <= self.fast_path_max_story_chars:
+            fast = self.decide(features, ROUTE_FAST)
+            if fast.predicted_seconds <= self.fast_path_max_seconds:
+                return fast
+        full = self.decide(features, ROUTE_LAMBDA)
+        if full.predicted_seconds > self.lambda_budget_seconds:
+            return self.decide(features, ROUTE_ECS)
+        return full
+
+    def start(self, jira_story_id: str, decision: RouteDecision) -> RouteDecision:
+        decision.run_id = self.history.add(jira_story_id, decision)
+        print(f"🧭 Routed {jira_story_id} to '{decision.target}' (predicted {decision.predicted_seconds:.0f}s, {decision.features})")
+        return decision
+
+    def finish(self, decision: RouteDecision, status: str, actual_seconds: Optional[float] = None) -> None:
+        if decision.run_id is None:
+            return
+        self.history.finish(decision.run_id, status, actual_seconds)
+        if actual_seconds is not None:
+            print(f"🧭 {decision.target}: predicted {decision.predicted_seconds:.0f}s, actual {actual_seconds:.0f}s")
+
+    def report(self) -> Dict[str, Any]:
+        """Prediction accuracy per route, for calibration dashboards."""
+        report: Dict[str, Any] = {}
+        for target in (ROUTE_FAST, ROUTE_LAMBDA, ROUTE_ECS):
+            runs = self.history.completed([target])
+            if not runs:
+                continue
+            errors = [abs(r["actual_seconds"] - r["predicted_seconds"]) for r in runs]
+            report[target] = {
+                "runs": len(runs),
+                "mean_abs_error_seconds": round(statistics.mean(errors), 1),
+                "median_actual_seconds": round(statistics.median(r["actual_seconds"] for r in runs), 1),
+                "calibration_factor": round(self.calibration_factor(target), 3),
+            }
+        return report
+
+_story_router: Optional[StoryRouter] = None
+
+def get_story_router() -> StoryRouter:
+    """Process-wide router backed by NEMO_ROUTE_HISTORY_LOCATION (a local SQLite file by default)."""
+    global _story_router
+    if _story_router is None:
+        history = RouteHistory(os.getenv("NEMO_ROUTE_HISTORY_LOCATION", "/tmp/nemo-route-history.db"))
+        _story_router = StoryRouter(history)
+    return _story_router
+
+if __name__ == "__main__":
+    print(json.dumps(get_story_router().report(), indent=2))
@@ -1,47 +1,269 @@
+import os
+import time
+import weakref
+import asyncio
+import shutil
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Set
 
 from utils import parse_github_url
-from clone_repo import clone_github_repo, validate_cloned_repo
-from workflow import nemo_workflow
-from data_analyst_workflow import data_analyst_workflow
-from create_pr import GitHubPRManager
+from checkpoint import WorkflowCheckpoint, create_checkpoint_store
+from clone_repo import clone_github_repo, validate_cloned_repo, get_remote_head_commit
+from idempotency import IdempotencyGuard, create_idempotency_store, make_idempotency_key
+from router import ROUTE_ECS, ROUTE_FAST, RerouteRequired, collect_features, get_story_router
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def run_nemo_agent_workflow(github_link: str, jira_story: str, jira_story_id: str, is_data_analysis_task: bool) -> dict:
-    """Runs the Agentic Workflow."""
-    # Extract repo details
+REQUIRED_FIELDS = ["github_link", "jira_story", "jira_story_id", "is_data_analysis_task"]
+
+_idempotency_guard: Optional[IdempotencyGuard] = None
+
+def get_idempotency_guard() -> IdempotencyGuard:
+    """Process-wide guard, so concurrent duplicates in one worker attach to the same run."""
+    global _idempotency_guard
+    if _idempotency_guard is None:
+        _idempotency_guard = IdempotencyGuard(create_idempotency_store())
+    return _idempotency_guard
+
+def get_workspace_name(project_name: str, workspace_id: Optional[str] = None) -> str:
+    """Return the /tmp directory name used for a run, isolated per workspace_id when given."""
+    if not workspace_id:
+        return project_name
+    return f"{project_name}-{workspace_id}"
+
+def get_checkpoint_key(project_name: str, jira_story_id: str) -> str:
+    """Checkpoints are keyed by repo and story so redeliveries and resubmissions share them."""
+    return f"{project_name}-{jira_story_id}"
+
+# Calls the current run started with asyncio.to_thread (its own, strands' and the tools'), which
+# keep running after the run is cancelled; see `track_run_threads`
+run_threads: ContextVar[Optional[Set[Future]]] = ContextVar("run_threads", default=None)
+_tracking_loops: "weakref.WeakSet[asyncio.AbstractEventLoop]" = weakref.WeakSet()
+
+class RunThreadsExecutor(ThreadPoolExecutor):
+    """Default executor that records each call in the `run_threads` of the run submitting it."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = super().submit(fn, *args, **kwargs)
+        threads = run_threads.get()
+        if threads is not None:
+            threads.add(future)
+            future.add_done_callback(threads.discard)
+        return future
+
+def track_run_threads() -> Set[Future]:
+    """
+    Start tracking the threads of the current task (and the tasks it creates) and return them.
+    Must be called before the loop runs anything in its default executor.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _tracking_loops:
+        loop.set_default_executor(RunThreadsExecutor())
+        _tracking_loops.add(loop)
+    threads: Set[Future] = set()
+    run_threads.set(threads)
+    return threads
+
+async def wait_for_run_threads(threads: Set[Future], timeout: Optional[float] = None) -> bool:
+    """Wait for the tracked threads of a run to finish; False if some still run after `timeout`."""
+    pending = [asyncio.wrap_future(future) for future in list(threads)]
+    if not pending:
+        return True
+    _, still_running = await asyncio.wait(pending, timeout=timeout)
+    return not still_running
+
+def save_interrupted_work(github_link: str, jira_story_id: str, workspace_id: Optional[str]) -> None:
+    """
+    Record the working tree of a run stopped mid-step in its checkpoint, so the run that resumes
+    it starts from the partial changes instead of losing them. Call once the run's threads are done.
+    """
+    from change_manifest import capture_worktree_patch
+
+    _, project_name = parse_github_url(github_link)
+    repo_path = f"/tmp/{get_workspace_name(project_name, workspace_id)}"
+    if not os.path.isdir(os.path.join(repo_path, ".git")):
+        return
+    patch = capture_worktree_patch(repo_path)
+    checkpoint = WorkflowCheckpoint(create_checkpoint_store(), key=get_checkpoint_key(project_name, jira_story_id))
+    if patch and patch != (checkpoint.latest_worktree_patch() or ""):
+        checkpoint.save_interrupted_patch(patch)
+        print(f"💾 Saved the interrupted step's changes to the checkpoint ({checkpoint.key})")
+
+def cleanup_workspace(github_link: str, workspace_id: str) -> None:
+    """
+    Remove a per-run clone so /tmp does not fill up on warm containers. Best effort: called
+    from `finally` blocks, so it logs instead of raising.
+    """
+    try:
+        _, project_name = parse_github_url(github_link)
+        workspace_name = get_workspace_name(project_name, workspace_id)
+        shutil.rmtree(f"/tmp/{workspace_name}", ignore_errors=True)
+
+        from tool_output import remove_spilled_outputs
+        from lint_engine import release_lint_workspace
+        remove_spilled_outputs(workspace_name)
+        release_lint_workspace(f"/tmp/{workspace_name}")
+    except Exception as e:
+        logger.warning(f"⚠️ Could not clean up workspace {workspace_id} for {github_link}: {e}")
+
+async def run_nemo_agent_workflow(
+    github_link: str,
+    jira_story: str,
+    jira_story_id: str,
+    is_data_analysis_task: bool,
+    workspace_id: Optional[str] = None,
+    mcp_tools: Optional[Dict[str, List[Any]]] = None,
+    runtime: str = "local",
+    speculative_candidates: Optional[int] = None,
+    finalizing: Optional[asyncio.Event] = None
+) -> dict:
+    """
+    Runs the Agentic Workflow.
+
+    Runs are idempotent per (repo, story id, base commit): a duplicate delivery returns the
+    cached result and PR URL, or attaches to the identical run already in flight.
+
+    `runtime` is where this process runs ("lambda", "ecs" or "local"). On "lambda", stories
+    the router predicts to outlive the invocation raise RerouteRequired so they can be handed off.
+
+    `speculative_candidates` asks for a best-of-N implementation (see `workflow.implement_speculatively`).
+
+    `finalizing` is set once the workflow is done and the PR is being opened: from then on the
+    run must be allowed to finish rather than be cancelled and handed off, or the PR could be
+    opened twice.
+    """
     clone_url, project_name = parse_github_url(github_link)
+    base_commit = await asyncio.to_thread(get_remote_head_commit, clone_url)
+    key = make_idempotency_key(clone_url, jira_story_id, base_commit, is_data_analysis_task)
+
+    return await get_idempotency_guard().run(key, lambda: _run_story(
+        clone_url=clone_url,
+        project_name=project_name,
+        jira_story=jira_story,
+        jira_story_id=jira_story_id,
+        is_data_analysis_task=is_data_analysis_task,
+        workspace_id=workspace_id,
+        mcp_tools=mcp_tools,
+        base_commit=base_commit,
+        runtime=runtime,
+        speculative_candidates=speculative_candidates,
+        finalizing=finalizing
+    ))
+
+async def _run_story(
+    clone_url: str,
+    project_name: str,
+    jira_story: str,
+    jira_story_id: str,
+    is_data_analysis_task: bool,
+    workspace_id: Optional[str],
+    mcp_tools: Optional[Dict[str, List[Any]]],
+    base_commit: str,
+    runtime: str,
+    speculative_candidates: Optional[int] = None,
+    finalizing: Optional[asyncio.Event] = None
+) -> dict:
+    """Clone, route, run the AI workflow and open the PR for one story."""
+    workspace_name = get_workspace_name(project_name, workspace_id)
 
     # Clone and validate
-    clone_github_repo(repo_url=clone_url, project_name=project_name)
-    validate_cloned_repo(project_name=project_name)
+    await asyncio.to_thread(clone_github_repo, repo_url=clone_url, project_name=workspace_name)
+    validate_cloned_repo(project_name=workspace_name)
+
+    # Route on cheap signals before spending any tokens
+    router = get_story_router()
+    features = await asyncio.to_thread(collect_features, f"/tmp/{workspace_name}", jira_story, is_data_analysis_task)
+    decision = router.start(jira_story_id, router.route(features))
+    if decision.target == ROUTE_ECS and runtime == "lambda":
+        router.finish(decision, "rerouted")
+        raise RerouteRequired(decision)
+
+    start_time = time.perf_counter()
+    try:
+        output = await _run_workflow_and_pr(
+            clone_url=clone_url,
+            project_name=project_name,
+            workspace_name=workspace_name,
+            jira_story=jira_story,
+            jira_story_id=jira_story_id,
+            is_data_analysis_task=is_data_analysis_task,
+            mcp_tools=mcp_tools,
+            skip_review=decision.target == ROUTE_FAST,
+            speculative_candidates=speculative_candidates,
+            finalizing=finalizing
+        )
+    except BaseException:
+        router.finish(decision, "failed", time.perf_counter() - start_time)
+        raise
+    router.finish(decision, "success", time.perf_counter() - start_time)
+    return {**output, "base_commit": base_commit, "route": decision.target}
+
+async def _run_workflow_and_pr(
+    clone_url: str,
+    project_name: str,
+    workspace_name: str,
+    jira_story: str,
+    jira_story_id: str,
+    is_data_analysis_task: bool,
+    mcp_tools: Optional[Dict[str, List[Any]]],
+    skip_review: bool,
+    speculative_candidates: Optional[int] = None,
+    finalizing: Optional[asyncio.Event] = None
+) -> dict:
+    """Run the AI workflow on an already cloned repo and open the PR."""
+    # Imported here, not at module level: strands, mcp, PyGithub and the agent modules are slow to
+    # import, and each job only needs one of the two workflows. This keeps Lambda init time low.
+    from create_pr import GitHubPRManager
+    from tool_output import spill_workspace
+
+    # Oversized tool outputs of this run are spilled next to, not inside, the workspace
+    spill_workspace.set(workspace_name)
 
     # Run AI workflow
+    checkpoint: Optional[WorkflowCheckpoint] = None
     if is_data_analysis_task:
+        from data_analyst_workflow import data_analyst_workflow
+
         logger.info("Running data analyst workflow.")
         result = await data_analyst_workflow(
-            project_name=project_name,
+            project_name=workspace_name,
             jira_story=jira_story,
             jira_story_id=jira_story_id
         )
     else:
+        from workflow import nemo_workflow
+
         logger.info("Running nemo workflow.")
+        checkpoint = WorkflowCheckpoint(
+            create_checkpoint_store(),
+            key=get_checkpoint_key(project_name, jira_story_id)
+        )
         result = await nemo_workflow(
-            project_name=project_name,
+            project_name=workspace_name,
             jira_story=jira_story,
-            jira_story_id=jira_story_id
+            jira_story_id=jira_story_id,
+            mcp_tools=mcp_tools,
+            checkpoint=checkpoint,
+            skip_review=skip_review,
+            speculative_candidates=speculative_candidates
         )
 
-    # Create PR
+    # Create PR. Past this point a handoff would open it a second time, see run_nemo_agent_workflow
+    if finalizing is not None:
+        finalizing.set()
     github_manager = GitHubPRManager(
-        project_name=project_name,
+        project_name=workspace_name,
         repo_url=clone_url,
         story_id=jira_story_id
     )
-    pr_status = github_manager.run_pull_request_workflow()
+    pr_status = await asyncio.to_thread(github_manager.run_pull_request_workflow)
+    if checkpoint:
+        checkpoint.clear()
     return {
         "result": result,
-        "pr_status": pr_status
+        "pr_status": pr_status,
+        "pr_url": pr_status.get("pr_url")
     }
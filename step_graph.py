@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import importlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+StepFunction = Callable[[Any, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+class StopWorkflow(Exception):
+    """Raised by the executor when a step's `stop_when` check ends the run early."""
+
+    def __init__(self, step: str, message: str):
+        super().__init__(message)
+        self.step = step
+        self.message = message
+
+@dataclass
+class Step:
+    """
+    A node of the workflow graph.
+
+    `run(context, inputs)` receives the values named in `inputs` and returns a dict holding at
+    least the names in `outputs`. Any extra keys (e.g. a worktree patch) are only checkpointed.
+
+    When the step is skipped, `passthrough` maps each output to an input whose value is forwarded
+    instead (e.g. the revision step forwards the unrevised summary). Steps whose inputs are missing
+    because an upstream step was skipped without a passthrough are skipped too, as are steps whose
+    `skip_when(inputs)` returns a reason (e.g. revision when no reviewer found a blocking issue).
+    """
+    name: str
+    run: StepFunction
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    after: List[str] = field(default_factory=list)  # Ordering-only dependencies (shared repo state)
+    passthrough: Dict[str, str] = field(default_factory=dict)
+    stop_when: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None
+    skip_when: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None
+
+@dataclass
+class GraphConfig:
+    """How to adapt a graph per deployment: skip steps, add ordering edges, add steps, cap concurrency."""
+    skip: Set[str] = field(default_factory=set)
+    after: Dict[str, List[str]] = field(default_factory=dict)
+    add: List[Step] = field(default_factory=list)
+    max_concurrency: Optional[int] = None
+
+def load_graph_config(path: Optional[str] = None) -> GraphConfig:
+    """
+    Load a GraphConfig from the JSON file at NEMO_WORKFLOW_GRAPH_CONFIG (empty config when unset):
+
+        {"skip": ["review"], "after": {"doc": ["score"]}, "max_concurrency": 2,
+         "add": [{"name": "lint", "callable": "my_steps:lint", "inputs": ["final_change_manifest"],
+                  "outputs": ["lint_report"]}]}
+    """
+    path = path or os.getenv("NEMO_WORKFLOW_GRAPH_CONFIG")
+    if not path:
+        return GraphConfig()
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    added = []
+    for spec in raw.get("add", []):
+        module_name, _, function_name = spec["callable"].partition(":")
+        added.append(Step(
+            name=spec["name"],
+            run=getattr(importlib.import_module(module_name), function_name),
+            inputs=spec.get("inputs", []),
+            outputs=spec.get("outputs", []),
+            after=spec.get("after", []),
+            passthrough=spec.get("passthrough", {}),
+        ))
+    return GraphConfig(
+        skip=set(raw.get("skip", [])),
+        after=raw.get("after", {}),
+        add=added,
+        max_concurrency=raw.get("max_concurrency"),
+    )
+
+class StepGraph:
+    """
+    Runs steps as soon as the steps producing their inputs have finished, so independent
+    steps run concurrently. Each step is timed, and checkpointed when a checkpoint is given.
+    """
+
+    def __init__(self, steps: List[Step], initial_inputs: Optional[List[str]] = None, config: Optional[GraphConfig] = None):
+        config = config or GraphConfig()
+        self.steps: Dict[str, Step] = {}
+        for step in [*steps, *config.add]:
+            if step.name in self.steps:
+                raise ValueError(f"Duplicate step '{step.name}'")
+            self.steps[step.name] = step
+        self.skip = set(config.skip)
+        self.max_concurrency = config.max_concurrency
+        self.initial_inputs = set(initial_inputs or [])
+
+        self.producers: Dict[str, str] = {}
+        for step in self.steps.values():
+            for output in step.outputs:
+                if output in self.producers or output in self.initial_inputs:
+                    raise ValueError(f"'{output}' is produced by both '{self.producers.get(output, 'the caller')}' and '{step.name}'")
+                self.producers[output] = step.name
+
+        self.dependencies: Dict[str, Set[str]] = {}
+        for step in self.steps.values():
+            deps = set(step.after) | set(config.after.get(step.name, []))
+            for name in step.inputs:
+                if name in self.producers:
+                    deps.add(self.producers[name])
+                elif name not in self.initial_inputs:
+                    raise ValueError(f"Step '{step.name}' needs '{name}', which no step produces")
+            unknown = deps - set(self.steps)
+            if unknown:
+                raise ValueError(f"Step '{step.name}' depends on unknown steps {sorted(unknown)}")
+            self.dependencies[step.name] = deps
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        remaining = dict(self.dependencies)
+        while remaining:
+            ready = [name for name, deps in remaining.items() if deps <= set(order)]
+            if not ready:
+                raise ValueError(f"Cycle between steps {sorted(remaining)}")
+            order.extend(ready)
+            for name in ready:
+                del remaining[name]
+        return order
+
+    def _load_checkpointed(self, step: Step, checkpoint: Any) -> Optional[Dict[str, Any]]:
+        if checkpoint is None or not checkpoint.is_done(step.name):
+            return None
+        saved = checkpoint.get(step.name)
+        if not all(output in saved for output in step.outputs):
+            return None  # Checkpoint from an older graph layout, run the step again
+        return saved
+
+    async def run(self, context: Any, initial: Dict[str, Any], checkpoint: Any = None) -> Dict[str, Any]:
+        """
+        Execute the graph and return every produced value plus `step_timings`,
+        `resumed_steps` and `skipped_steps`.
+        """
+        values = dict(initial)
+        finished: Set[str] = set()
+        timings: Dict[str, float] = {}
+        resumed: List[str] = []
+        skipped: List[str] = []
+        running: Dict[asyncio.Task, Step] = {}
+        running_names: Set[str] = set()
+        unchanged: Set[str] = set()  # Steps whose outputs match the checkpoint this run resumes from
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+
+        async def execute(step: Step, inputs: Dict[str, Any]) -> Dict[str, Any]:
+            if semaphore is None:
+                return await self._timed_run(step, context, inputs, timings)
+            async with semaphore:
+                return await self._timed_run(step, context, inputs, timings)
+
+        def complete(step: Step, outputs: Dict[str, Any]) -> None:
+            values.update({name: outputs[name] for name in step.outputs})
+            finished.add(step.name)
+            if step.stop_when is not None:
+                message = step.stop_when(outputs)
+                if message:
+                    raise StopWorkflow(step.name, message)
+
+        try:
+            while len(finished) < len(self.steps):
+                for name in self.order:
+                    step = self.steps[name]
+                    if name in finished or name in running_names or not self.dependencies[name] <= finished:
+                        continue
+
+                    skip_reason = None
+                    if name in self.skip:
+                        skip_reason = "disabled"
+                    elif not all(i in values for i in step.inputs):
+                        skip_reason = "upstream skipped"
+                    elif step.skip_when is not None:
+                        skip_reason = step.skip_when({i: values[i] for i in step.inputs})
+                    if skip_reason:
+                        print(f"⏭️ Skipping step '{name}' ({skip_reason})")
+                        skipped.append(name)
+                        values.update({out: values[src] for out, src in step.passthrough.items() if src in values})
+                        finished.add(name)
+                        if checkpoint is None or not checkpoint.is_done(name):
+                            unchanged.add(name)  # Skipped last time too
+                        continue
+
+                    # Only trust a checkpoint if nothing upstream ran (or was skipped) differently this time
+                    saved = self._load_checkpointed(step, checkpoint) if self.dependencies[name] <= unchanged else None
+                    if saved is not None:
+                        print(f"♻️ Step '{name}' restored from checkpoint")
+                        resumed.append(name)
+                        unchanged.add(name)
+                        complete(step, saved)
+                        continue
+
+                    inputs = {i: values[i] for i in step.inputs}
+                    running[asyncio.create_task(execute(step, inputs))] = step
+                    running_names.add(name)
+
+                if not running:
+                    if len(finished) < len(self.steps):
+                        raise RuntimeError(f"Steps cannot make progress: {sorted(set(self.steps) - finished)}")
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step = running.pop(task)
+                    running_names.discard(step.name)
+                    outputs = task.result()
+                    missing = [name for name in step.outputs if name not in outputs]
+                    if missing:
+                        raise RuntimeError(f"Step '{step.name}' did not return {missing}")
+                    if checkpoint is not None:
+                        await asyncio.to_thread(checkpoint.save_step, step.name, **outputs)
+                    complete(step, outputs)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return {**values, "step_timings": timings, "resumed_steps": resumed, "skipped_steps": skipped}
+
+    @staticmethod
+    async def _timed_run(step: Step, context: Any, inputs: Dict[str, Any], timings: Dict[str, float]) -> Dict[str, Any]:
+        print(f"▶️ Step '{step.name}' started")
+        start = time.perf_counter()
+        try:
+            return await step.run(context, inputs)
+        finally:
+            elapsed = time.perf_counter() - start
+            timings[step.name] = round(elapsed, 3)
+            metrics.observe("workflow_step_seconds", elapsed, step=step.name)
+            print(f"⏱️ Step '{step.name}' finished in {elapsed:.2f}s")
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from strands.types.tools import AgentTool
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def normalize_tool_input(value: Any) -> Any:
+    """Drop unset arguments and collapse whitespace so equivalent lookups share a cache entry."""
+    if isinstance(value, dict):
+        return {k: normalize_tool_input(v) for k, v in sorted(value.items()) if v is not None}
+    if isinstance(value, list):
+        return [normalize_tool_input(v) for v in value]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+def make_tool_cache_key(tool_name: str, tool_input: Any) -> str:
+    raw = json.dumps([tool_name, normalize_tool_input(tool_input)], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class ToolResultCache:
+    """
+    On-disk SQLite cache of tool results with a TTL and a total size bound.
+
+    Entries older than `ttl_seconds` are ignored and removed; when the cache grows past
+    `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path: str = "/tmp/nemo-tool-cache.db", ttl_seconds: float = 86400, max_bytes: int = 200_000_000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        conn = self._connect()
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_results ("
+                "key TEXT PRIMARY KEY, tool_name TEXT NOT NULL, content TEXT NOT NULL, "
+                "size INTEGER NOT NULL, created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tool_results_last_used ON tool_results (last_used_at)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT content, created_at FROM tool_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM tool_results WHERE key = ?", (key,))
+                metrics.incr("tool_cache_expired")
+                return None
+            conn.execute("UPDATE tool_results SET last_used_at = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+        finally:
+            conn.close()
+
+    def put(self, key: str, tool_name: str, content: List[Dict[str, Any]]) -> None:
+        payload = json.dumps(content, default=str)
+        if len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO tool_results (key, tool_name, content, size, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, tool_name, payload, len(payload), now, now)
+            )
+            conn.execute("DELETE FROM tool_results WHERE created_at < ?", (now - self.ttl_seconds,))
+            total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM tool_results").fetchone()[0]
+            evicted = 0
+            if total_bytes > self.max_bytes:
+                for old_key, size in conn.execute("SELECT key, size FROM tool_results ORDER BY last_used_at ASC").fetchall():
+                    if total_bytes <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM tool_results WHERE key = ?", (old_key,))
+                    total_bytes -= size
+                    evicted += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        if evicted:
+            metrics.incr("tool_cache_evictions", evicted)
+
+class CachedAgentTool(AgentTool):
+    """
+    Wraps a read-only tool (e.g. an MCP documentation lookup) so identical calls are served
+    from a ToolResultCache. Only successful results are cached. Cache reads and writes run in
+    a thread, off the event loop shared by concurrent stories.
+    """
+
+    def __init__(self, tool: AgentTool, cache: ToolResultCache):
+        super().__init__()
+        self.tool = tool
+        self.cache = cache
+
+    @property
+    def tool_name(self) -> str:
+        return self.tool.tool_name
+
+    @property
+    def tool_spec(self) -> Dict[str, Any]:
+        return self.tool.tool_spec
+
+    @property
+    def tool_type(self) -> str:
+        return self.tool.tool_type
+
+    async def stream(self, tool_use: Dict[str, Any], invocation_state: Dict[str, Any], **kwargs: Any):
+        key = make_tool_cache_key(self.tool_name, tool_use.get("input", {}))
+        content = await asyncio.to_thread(self.cache.get, key)
+        if content is not None:
+            metrics.incr("tool_cache_hits", tool=self.tool_name)
+            yield {"toolUseId": tool_use["toolUseId"], "status": "success", "content": content}
+            return
+
+        metrics.incr("tool_cache_misses", tool=self.tool_name)
+        async for event in self.tool.stream(tool_use, invocation_state, **kwargs):
+            # Built-in tools end with a ToolResultEvent, plain tools with the ToolResult itself.
+            # Cache before yielding: the agent's tool executor stops reading at the result.
+            result = getattr(event, "tool_result", event)
+            if isinstance(result, dict) and "toolUseId" in result and result.get("status") == "success":
+                await asyncio.to_thread(self.cache.put, key, self.tool_name, result.get("content", []))
+            yield event
+
+_tool_result_cache: Optional[ToolResultCache] = None
+
+def get_tool_result_cache() -> Optional[ToolResultCache]:
+    """
+    Process-wide cache configured by NEMO_TOOL_CACHE_LOCATION (a SQLite file, or `off`),
+    NEMO_TOOL_CACHE_TTL_SECONDS and NEMO_TOOL_CACHE_MAX_MB.
+    """
+    global _tool_result_cache
+    location = os.getenv("NEMO_TOOL_CACHE_LOCATION", "/tmp/nemo-tool-cache.db")
+    if location == "off":
+        return None
+    if _tool_result_cache is None:
+        _tool_result_cache = ToolResultCache(
+            location[len("file://"):] if location.startswith("file://") else location,
+            ttl_seconds=float(os.getenv("NEMO_TOOL_CACHE_TTL_SECONDS", "86400")),
+            max_bytes=int(os.getenv("NEMO_TOOL_CACHE_MAX_MB", "200")) * 1_000_000
+        )
+    return _tool_result_cache
+
+def cache_tools(tools: List[AgentTool]) -> List[AgentTool]:
+    """Wrap `tools` with the process-wide result cache (unchanged when caching is off)."""
+    cache = get_tool_result_cache()
+    if cache is None:
+        return tools
+    return [tool if isinstance(tool, CachedAgentTool) else CachedAgentTool(tool, cache) for tool in tools]
+
+def tool_cache_stats() -> Dict[str, Any]:
+    counters = metrics.snapshot(prefix="tool_cache_")["counters"]
+    hits = sum(v for k, v in counters.items() if k.startswith("tool_cache_hits"))
+    misses = sum(v for k, v in counters.items() if k.startswith("tool_cache_misses"))
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        "by_tool": counters,
+    }
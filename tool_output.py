@@ -0,0 +1,155 @@
+import os
+import re
+import uuid
+import shutil
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from strands import tool
+from strands.hooks import AfterToolCallEvent, HookProvider, HookRegistry
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+HEAD_RATIO = 0.6  # Share of the kept output taken from the start; the rest comes from the end
+HANDLE_PATTERN = re.compile(r"^out-[0-9a-f]{12}$")
+
+def tool_output_limit() -> int:
+    """Per-call limit in characters: NEMO_TOOL_OUTPUT_MAX_BYTES or NEMO_TOOL_OUTPUT_MAX_TOKENS, whichever is lower."""
+    max_bytes = int(os.getenv("NEMO_TOOL_OUTPUT_MAX_BYTES", "32000"))
+    max_tokens = int(os.getenv("NEMO_TOOL_OUTPUT_MAX_TOKENS", "8000"))
+    return min(max_bytes, max_tokens * CHARS_PER_TOKEN)
+
+# Workspace of the current run; its spill files are removed with it (see run_workflow.cleanup_workspace)
+spill_workspace: ContextVar[str] = ContextVar("spill_workspace", default="shared")
+
+def spill_dir(workspace: Optional[str] = None) -> str:
+    return os.path.join(os.getenv("NEMO_TOOL_OUTPUT_SPILL_DIR", "/tmp/nemo-tool-output"), workspace or spill_workspace.get())
+
+def remove_spilled_outputs(workspace: str) -> None:
+    shutil.rmtree(spill_dir(workspace), ignore_errors=True)
+
+def spill_path(handle: str) -> str:
+    if not HANDLE_PATTERN.match(handle):
+        raise ValueError(f"Invalid tool output handle: {handle}")
+    return os.path.join(spill_dir(), f"{handle}.txt")
+
+def spill(text: str) -> str:
+    """Write `text` to a new spill file and return its handle."""
+    handle = f"out-{uuid.uuid4().hex[:12]}"
+    os.makedirs(spill_dir(), exist_ok=True)
+    with open(spill_path(handle), "w", encoding="utf-8") as f:
+        f.write(text)
+    return handle
+
+def head_and_tail(text: str, limit: int) -> Dict[str, Any]:
+    """Whole lines from the start and end of `text` fitting in `limit` characters."""
+    lines = text.splitlines(keepends=True)
+    head: List[str] = []
+    size = 0
+    for line in lines:
+        if size + len(line) > limit * HEAD_RATIO:
+            break
+        head.append(line)
+        size += len(line)
+    tail: List[str] = []
+    for line in reversed(lines[len(head):]):
+        if size + len(line) > limit:
+            break
+        tail.append(line)
+        size += len(line)
+    tail.reverse()
+    if not head and not tail:
+        # A single huge line: fall back to characters
+        return {"head": text[:int(limit * HEAD_RATIO)], "tail": "", "head_lines": 0, "tail_start": None, "total_lines": len(lines)}
+    return {
+        "head": "".join(head),
+        "tail": "".join(tail),
+        "head_lines": len(head),
+        "tail_start": len(lines) - len(tail) + 1,
+        "total_lines": len(lines),
+    }
+
+def govern_output(text: str, tool_name: str, limit: Optional[int] = None) -> Optional[str]:
+    """
+    None if `text` fits the per-call limit; otherwise spill it and return the head and tail with
+    a note on how to page through the rest.
+    """
+    limit = limit or tool_output_limit()
+    if len(text) <= limit:
+        return None
+    handle = spill(text)
+    parts = head_and_tail(text, limit)
+    if parts["tail_start"] is None:
+        omitted = "the rest of a single long line"
+        how = f"read it in pieces with shell, e.g. fold -w 200 {spill_path(handle)} | sed -n 1,100p"
+    else:
+        omitted = f"lines {parts['head_lines'] + 1}-{parts['tail_start'] - 1} of {parts['total_lines']}"
+        how = f"page through it with read_tool_output(handle=\"{handle}\", start_line={parts['head_lines'] + 1}) or grep the file with shell"
+    metrics.incr("tool_output_spills", tool=tool_name)
+    metrics.incr("tool_output_chars_withheld", len(text) - len(parts["head"]) - len(parts["tail"]), tool=tool_name)
+    logger.info(f"📦 {tool_name} output of {len(text)} chars spilled to {handle}")
+    return (
+        f"{parts['head']}"
+        f"\n[... output truncated: {omitted} omitted ({len(text)} chars in total). "
+        f"Full output saved as handle {handle} at {spill_path(handle)}; "
+        f"{how} ...]\n"
+        f"{parts['tail']}"
+    )
+
+@tool
+def read_tool_output(handle: str, start_line: int = 1, max_lines: int = 200) -> str:
+    """
+    Read a page of a tool output that was too large to return in full.
+
+    Args:
+        handle: The handle given in the truncated output (e.g. out-0123456789ab)
+        start_line: First line to return, starting at 1
+        max_lines: Maximum number of lines to return
+
+    Returns:
+        The requested lines, cut short if they exceed the per-call output limit, and where the next page starts
+    """
+    try:
+        with open(spill_path(handle), "r", encoding="utf-8") as f:
+            lines = f.readlines()
+    except (ValueError, FileNotFoundError):
+        return f"Error: no tool output found for handle {handle}"
+
+    start = max(start_line, 1)
+    limit = tool_output_limit()
+    page: List[str] = []
+    size = 0
+    for line in lines[start - 1:start - 1 + max_lines]:
+        if page and size + len(line) > limit:
+            break
+        page.append(line[:limit])
+        size += len(line)
+    end = start + len(page) - 1
+    metrics.incr("tool_output_pages")
+    footer = f"next page: start_line={end + 1}" if end < len(lines) else "end of output"
+    return f"[{handle} lines {start}-{end} of {len(lines)}; {footer}]\n{''.join(page)}"
+
+class ToolOutputGovernor(HookProvider):
+    """
+    Enforces the per-call output limit on every tool: text results over the limit are spilled
+    to disk and replaced by their head and tail plus a handle for `read_tool_output`.
+    """
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(AfterToolCallEvent, self.after_tool_call)
+
+    def after_tool_call(self, event: AfterToolCallEvent) -> None:
+        tool_name = event.tool_use["name"]
+        result = event.result
+        if tool_name == "read_tool_output" or not result:
+            return
+        content = result.get("content", [])
+        if not all("text" in block for block in content):
+            return
+        governed = govern_output("\n".join(block["text"] for block in content), tool_name)
+        if governed is not None:
+            event.result = {**result, "content": [{"text": governed}]}
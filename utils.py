@@ -1,14 +1,35 @@
 import os
 import json
+from functools import lru_cache
+from typing import List
 from urllib.parse import urlparse
 
-import requests
-import boto3
 import logging
 
 logger = logging.getLogger(__name__)
 
-secrets_manager_client = boto3.client('secretsmanager', region_name='us-east-1')
+@lru_cache(maxsize=None)
+def get_secrets_manager_client():
+    """Create the Secrets Manager client on first use instead of at import (Lambda init)."""
+    import boto3
+    return boto3.client('secretsmanager', region_name='us-east-1')
+
+def filter_files(directory: str, allowed_extensions: List[str] = ['.py', '.md', '.json', '.txt', '.yml', '.yaml']) -> str:
+    """Return JSON string of file paths excluding .bak and irrelevant files."""
+    files = []
+    exclude_dirs = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', 'env'}
+    
+    for root, dirs, filenames in os.walk(directory):
+        # Remove excluded directories from traversal
+        dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        
+        for filename in filenames:
+            if any(filename.endswith(ext) for ext in allowed_extensions) and not filename.endswith('.bak'):
+                files.append(os.path.join(root, filename))
+    
+    file_context = {"files": files, "total_files": len(files)}
+    print(f"Filtered {len(files)} files from {directory}")
+    return json.dumps(file_context, indent=2)
 
 def parse_github_url(github_url: str):
     """
@@ -37,7 +58,7 @@ def parse_github_url(github_url: str):
 def get_github_personal_access_token(secret_arn: str) -> str:
     """Fetch a secret from AWS Secrets Manager using its ARN."""
     try:
-        response = secrets_manager_client.get_secret_value(SecretId=secret_arn)
+        response = get_secrets_manager_client().get_secret_value(SecretId=secret_arn)
         secret_str = response.get('SecretString')
 
         if not secret_str:
@@ -66,6 +87,8 @@ def set_otel_exporter_otlp_log_headers(log_group_name: str, log_stream_name: str
 def set_otel_exporter_otlp_log_headers_for_ecs(metric_namespace: str = 'nemo-ai-core-agent-ecs'):
     """Set OTEL_EXPORTER_OTLP_LOGS_HEADERS environment variable for ECS Fargate."""
 
+    import requests  # Only needed on ECS; keeps it out of the Lambda import path
+
     metadata_uri = os.getenv("ECS_CONTAINER_METADATA_URI_V4")
     if not metadata_uri:
         raise ValueError("ECS_CONTAINER_METADATA_URI_V4 environment variable not set.")
@@ -1,26 +1,66 @@
 import os
+import atexit
 import re
 import json
 import logging
-import time
 import asyncio
 import traceback
-import subprocess
-from typing import Any, Dict, List
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Any, Dict, List, Optional
 
 import httpcore
 import httpx
-import boto3
-from botocore.config import Config
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from strands import Agent, tool
-from strands.models import BedrockModel
+from strands.models import Model
 from strands.tools.mcp import MCPClient
 from mcp.client.streamable_http import streamablehttp_client
 
 # from ast_reader import MemoryCodeIndex
+from utils import filter_files
 from custom_tools import editor, file_read, file_write, shell
-from change_manifest import get_manifest, format_manifest_code_diffs
+from change_manifest import (
+    get_manifest,
+    format_manifest_code_diffs,
+    get_head_commit,
+    capture_worktree_patch,
+    restore_worktree_patch,
+    snapshot_worktree,
+    diff_snapshots,
+)
+from checkpoint import WorkflowCheckpoint, create_checkpoint_store
+from models import CLAUDE_SONNET_4, get_model
+from model_router import get_step_model
+from constants import (
+    MCP_TOOLS_TTL_SECONDS,
+    IMPLEMENTATION_SHARDS,
+    SPECULATIVE_CANDIDATES,
+    SPECULATIVE_MODELS,
+    SPECULATIVE_TEMPERATURES,
+    SPECULATIVE_SCORE_THRESHOLD,
+    REVIEW_ROUNDS,
+    REVIEW_CHUNK_TOKENS,
+    REVIEW_MAX_CONCURRENCY,
+)
+from metrics import metrics, timed
+from mcp_pool import MCPConnectionPool
+from tool_cache import cache_tools
+from context_builder import ContextBuilder, estimate_tokens, chunk_code_diffs
+from worktree_shards import (
+    Subtask,
+    partition_plan,
+    rebase_paths,
+    add_worktree,
+    remove_worktree,
+    merge_shard_patches,
+)
+from step_graph import GraphConfig, Step, StepGraph, StopWorkflow, load_graph_config
+from agent_hooks import get_agent_hooks
+from conversation import create_conversation_manager
+from tool_output import read_tool_output
+from lint_engine import get_lint_engine
+from review_verdict import review_approved, count_findings
 from prompt.agent_prompt import (
     planner_prompt,
     senior_engineer_prompt,
@@ -30,6 +70,8 @@ from prompt.agent_prompt import (
     data_structure_algorithms_agent_prompt,
     story_scoring_prompt,
     doc_prompt,
+    review_aggregator_prompt,
+    review_verdict_prompt,
 )
 
 # Set the environment variable
@@ -59,47 +101,11 @@ os.environ['BYPASS_TOOL_CONSENT'] = 'True'
 # strands_telemetry = StrandsTelemetry()
 # strands_telemetry.setup_otlp_exporter()     # Send traces to OTLP endpoint
 
-retry_config = Config(
-    retries={
-        'max_attempts': 5,
-        'mode': 'standard'  # or 'adaptive'
-    },
-    read_timeout=180
-)
-
-session = boto3.Session()
-
-claude_sonnet_4 = BedrockModel(
-    model_id='us.anthropic.claude-sonnet-4-20250514-v1:0',
-    boto_session=session,
-    boto_client_config=retry_config
-)
-
-bedrock_nova_pro_model = BedrockModel(
-    model_id='us.amazon.nova-pro-v1:0',
-    boto_session=session,
-    boto_client_config=retry_config
-)
+# Agents get a routed model per step type (see model_router.py); models are built on first use
+# so importing this module stays cheap
 
 # ast_index = MemoryCodeIndex(s3_bucket='nemo-ai-ast-bucket', s3_key='asts/finance_service_agent.json')
 
-def filter_files(directory: str, allowed_extensions: List[str] = ['.py', '.md', '.json', '.txt', '.yml', '.yaml']) -> str:
-    """Return JSON string of file paths excluding .bak and irrelevant files."""
-    files = []
-    exclude_dirs = {'.git', '__pycache__', 'node_modules', '.venv', 'venv', 'env'}
-    
-    for root, dirs, filenames in os.walk(directory):
-        # Remove excluded directories from traversal
-        dirs[:] = [d for d in dirs if d not in exclude_dirs]
-        
-        for filename in filenames:
-            if any(filename.endswith(ext) for ext in allowed_extensions) and not filename.endswith('.bak'):
-                files.append(os.path.join(root, filename))
-    
-    file_context = {"files": files, "total_files": len(files)}
-    print(f"Filtered {len(files)} files from {directory}")
-    return json.dumps(file_context, indent=2)
-
 def extract_manifest_from_output(output: str) -> Dict:
     """Extract the change manifest JSON from the senior agent's output."""
     # Look for the prefixed JSON block
@@ -114,14 +120,14 @@ def extract_manifest_from_output(output: str) -> Dict:
     return {}
 
 @tool
-def lint_check(changes_manifest: dict) -> dict:
+async def lint_check(changes_manifest: dict) -> dict:
     """
     Run linting checks (pylint and mypy) on only the Python files that were modified
     according to the provided `changes_json`.
 
-    For each `.py` file in the manifest:
-    - Runs `pylint --errors-only`
-    - Runs `mypy`
+    `pylint --errors-only` and `mypy` (through a warm dmypy daemon) each run once over all
+    the `.py` files in the manifest, concurrently. Files unchanged since their last check are
+    served from the lint cache.
 
     Returns:
       A dictionary mapping each Python file to its linting results, including:
@@ -130,42 +136,20 @@ def lint_check(changes_manifest: dict) -> dict:
     """
 
     try:
-        py_files = {
-            change["file_path"]
-            for change in changes_manifest.get("changes", [])
-            if change["file_path"].endswith(".py")
-        }
-        print("lint_check py_files", py_files)
-
-        results: Dict[str, Any] = {"lint_results": {}}
-
-        for f in py_files:
-            results["lint_results"][f] = {}
-
-            # Run pylint
-            pylint_res = subprocess.run(
-                ["pylint", "--errors-only", f],
-                capture_output=True, text=True
-            )
-            results["lint_results"][f]["pylint"] = {
-                "returncode": pylint_res.returncode,
-                "stdout": pylint_res.stdout.strip(),
-            }
-
-            # Run mypy
-            mypy_res = subprocess.run(
-                ["mypy", f],
-                capture_output=True, text=True
-            )
-            results["lint_results"][f]["mypy"] = {
-                "returncode": mypy_res.returncode,
-                "stdout": mypy_res.stdout.strip(),
-            }
-
-        return results
+        return {"lint_results": await run_lint(changes_manifest)}
     except Exception as e:
         return f"Error in lint_check: {e}"
 
+async def run_lint(changes_manifest: dict) -> Dict[str, Any]:
+    """pylint (errors only) and mypy results for each Python file in the manifest."""
+    py_files = {
+        change["file_path"]
+        for change in changes_manifest.get("changes", [])
+        if change["file_path"].endswith(".py")
+    }
+    print("lint_check py_files", py_files)
+    return await get_lint_engine().lint(list(py_files))
+
 # file_context = filter_files('/tmp/finance_service_agent')
 # planner_prompt = planner_prompt.format(project_name=project_name, file_context=file_context)
 
@@ -201,62 +185,581 @@ def lint_check(changes_manifest: dict) -> dict:
 #     callback_handler=None
 # )
 
-# Initialize single code reviewer agent (combines all review aspects)
-code_reviewer_agent = Agent(
-    name='code_reviewer',
-    model=claude_sonnet_4,  # Use Claude for better code review
-    system_prompt=code_reviewer_prompt,
-    tools=[file_read, shell],
-    callback_handler=None
-)
+# Review role -> (agent name, system prompt)
+REVIEW_AGENT_PROMPTS = {
+    # 'security_agent': ('security_engineer', security_engineer_prompt),
+    'coding_standard_agent': ('coding_standard_engineer', coding_standard_prompt),
+    'low_system_design_agent': ('low_system_design_engineer', low_system_design_engineer_prompt),
+    # 'library_compatibility_agent': ...,
+    'data_structure_algorithms_agent': ('data_structure_algorithms_agent', data_structure_algorithms_agent_prompt),
+}
 
-# security_agent = Agent(
-#     name='security_engineer',
-#     model=bedrock_nova_pro_model,
-#     system_prompt=security_engineer_prompt,
-#     tools=[file_read, shell_agent],
-#     callback_handler=None
-# )
+def build_review_agent(role: str) -> Agent:
+    name, system_prompt = REVIEW_AGENT_PROMPTS[role]
+    return Agent(
+        name=name,
+        model=get_step_model("review"),
+        system_prompt=system_prompt + review_verdict_prompt,
+        tools=[file_read, shell, read_tool_output],
+        callback_handler=None,
+        conversation_manager=create_conversation_manager(),
+        hooks=get_agent_hooks()
+    )
+
+def build_review_agents() -> Dict[str, Agent]:
+    """Create fresh review agents so concurrent workflows never share conversation history."""
+    return {role: build_review_agent(role) for role in REVIEW_AGENT_PROMPTS}
+
+def build_story_scoring_agent() -> Agent:
+    """Create a fresh story scoring agent for a single workflow run."""
+    return Agent(
+        name='story_scoring_agent',
+        model=get_step_model("story_scoring"),
+        system_prompt=story_scoring_prompt,
+        tools=[file_read, shell, read_tool_output],
+        callback_handler=None,
+        conversation_manager=create_conversation_manager(),
+        hooks=get_agent_hooks()
+    )
+
+def build_code_reviewer_agent() -> Agent:
+    """Create a single code reviewer agent (combines all review aspects)."""
+    return Agent(
+        name='code_reviewer',
+        model=get_step_model("code_reviewer"),
+        system_prompt=code_reviewer_prompt,
+        tools=[file_read, shell, read_tool_output],
+        callback_handler=None,
+        conversation_manager=create_conversation_manager(),
+        hooks=get_agent_hooks()
+    )
+
+# Overridable so local stand-ins (see benchmarks/stub_mcp_server.py) can replace the remote servers
+MCP_SERVER_URLS = {
+    "context7": os.getenv("NEMO_CONTEXT7_MCP_URL", "https://mcp.context7.com/mcp"),
+    "aws_documentation": os.getenv("NEMO_AWS_DOCS_MCP_URL", "https://knowledge-mcp.global.api.aws"),
+}
 
-coding_standard_agent = Agent(
-    name='coding_standard_engineer',
-    model=bedrock_nova_pro_model,
-    system_prompt=coding_standard_prompt,
-    tools=[file_read, shell],
-    callback_handler=None
-)
+def create_mcp_client(name: str) -> MCPClient:
+    url = MCP_SERVER_URLS[name]
+    return MCPClient(lambda: streamablehttp_client(url))
 
-low_system_design_agent = Agent(
-    name='low_system_design_engineer',
-    model=bedrock_nova_pro_model,
-    system_prompt=low_system_design_engineer_prompt,
-    tools=[file_read, shell],
-    callback_handler=None
-)
+def create_mcp_clients() -> Dict[str, MCPClient]:
+    """Create the Context7 and AWS Documentation MCP clients (not yet connected)."""
+    return {name: create_mcp_client(name) for name in MCP_SERVER_URLS}
 
-data_structure_algorithms_agent = Agent(
-    name='data_structure_algorithms_agent',
-    model=bedrock_nova_pro_model,
-    system_prompt=data_structure_algorithms_agent_prompt,
-    tools=[file_read, shell],
-    callback_handler=None
-)
+def list_mcp_tools(mcp_clients: Dict[str, MCPClient]) -> Dict[str, List[Any]]:
+    """List the tools of already connected MCP clients, keyed like `create_mcp_clients`."""
+    try:
+        mcp_tools = {name: client.list_tools_sync() for name, client in mcp_clients.items()}
+        print(f"✅ AWS Documentation MCP {len(mcp_tools['aws_documentation'])} tools available")
+        print(f"✅ Context7 MCP {len(mcp_tools['context7'])} tools available")
+        return mcp_tools
+    except Exception as e:
+        print(f"❌ Failed to load AWS Documentation MCP or Context7 MCP tools: {e}")
+        raise
+
+_mcp_pool: Optional[MCPConnectionPool] = None
+
+def get_mcp_pool() -> MCPConnectionPool:
+    """Process-wide MCP pool, so warm Lambdas and ECS workers reuse sessions across workflows."""
+    global _mcp_pool
+    if _mcp_pool is None:
+        _mcp_pool = MCPConnectionPool(
+            {name: partial(create_mcp_client, name) for name in MCP_SERVER_URLS},
+            tools_ttl_seconds=MCP_TOOLS_TTL_SECONDS
+        )
+        atexit.register(_mcp_pool.close)
+    return _mcp_pool
+
+def resume_from_checkpoint(checkpoint: WorkflowCheckpoint, repo_path: str) -> None:
+    """
+    Bring the cloned repo back to the state of the last completed step.
 
-story_scoring_agent = Agent(
-    name='story_scoring_agent',
-    model=bedrock_nova_pro_model,
-    system_prompt=story_scoring_prompt,
-    tools=[file_read, shell],
-    callback_handler=None
-)
+    Checkpoints taken against a different base commit are discarded, since their
+    patches no longer apply cleanly. Checkpoints taken in another workspace have their
+    paths moved to this one. A step stopped by a handoff restarts on top of its partial changes.
+    """
+    base_commit = get_head_commit(repo_path)
+    if checkpoint.get_meta("base_commit") not in (None, base_commit):
+        print("⚠️ Base commit changed since the last checkpoint, starting from Step 1")
+        checkpoint.reset()
+    checkpoint.set_meta("base_commit", base_commit)
+    checkpoint.rebase_workspace(os.path.basename(repo_path.rstrip("/")))
+
+    patch = checkpoint.resume_patch()
+    if checkpoint.completed_steps or patch:
+        print(f"♻️ Resuming workflow, completed steps: {checkpoint.completed_steps}")
+        restore_worktree_patch(repo_path, patch or "")
+
+@dataclass
+class NemoContext:
+    """Shared, non-serializable state for the steps of one nemo_workflow run."""
+    project_name: str
+    jira_story: str
+    jira_story_id: str
+    context7_tools: List[Any]
+    aws_documentation_tools: List[Any]
+    speculative_candidates: int = SPECULATIVE_CANDIDATES
+    senior_agent: Optional[Agent] = None
+    # Per-run counts; `metrics` holds the process-wide totals
+    revisions_run: int = 0
+    revisions_skipped: int = 0
+
+    @property
+    def repo_path(self) -> str:
+        return f'/tmp/{self.project_name}'
+
+    def build_senior_agent(self, project_name: Optional[str] = None, model: Optional[Model] = None) -> Agent:
+        """A fresh senior agent working on `/tmp/<project_name>` (a worktree, or the repo itself)."""
+        return Agent(
+            name='senior_software_engineer',
+            model=model or get_step_model("senior_engineer"),
+            system_prompt=senior_engineer_prompt.format(project_name=project_name or self.project_name),
+            tools=[editor, file_read, file_write, shell, read_tool_output, *self.context7_tools, *self.aws_documentation_tools],
+            callback_handler=None,
+            conversation_manager=create_conversation_manager(),
+            hooks=get_agent_hooks()
+        )
+
+    def get_senior_agent(self) -> Agent:
+        """The implementation and revision steps share one senior agent (and its conversation)."""
+        if self.senior_agent is None:
+            self.senior_agent = self.build_senior_agent()
+        return self.senior_agent
+
+async def plan_step(ctx: NemoContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    print("Step 1: Planning phase")
+    file_context = await asyncio.to_thread(filter_files, ctx.repo_path)
+
+    planner_agent = Agent(
+        name='planner_engineer',
+        model=get_step_model("planner"),
+        system_prompt=planner_prompt.format(project_name=ctx.project_name, file_context=file_context),
+        tools=[file_read, shell, read_tool_output, *ctx.aws_documentation_tools],
+        callback_handler=None,
+        conversation_manager=create_conversation_manager(),
+        hooks=get_agent_hooks()
+    )
+    plan = str(await planner_agent.invoke_async(ctx.jira_story))
+    print(f"Plan created:\\n{plan}")
+    return {"plan": plan}
+
+def build_impl_task(jira_story: str, plan: str, subtask: Optional[Subtask] = None, project_name: Optional[str] = None) -> str:
+    impl_task = f"""
+    Jira Story: {jira_story}
+    
+    Implementation Plan:
+    {plan}
+    """
+    if subtask is not None:
+        files = "\n".join(f"    - /tmp/{project_name}/{path}" for path in subtask.files)
+        steps = "\n".join(f"    {step}" for step in subtask.steps)
+        impl_task += f"""
+    YOUR SUBTASK: other engineers are implementing the rest of the plan concurrently.
+    Implement only these plan items:
+{steps}
+    
+    Modify ONLY these files:
+{files}
+    """
+    return impl_task + """
+    CRITICAL RULES:
+    1. Implement ONLY what is specified in the Jira story
+    2. Do NOT modify unrelated code
+    3. Do NOT add extra features or improvements
+    """
 
-review_agents = {
-    # 'security_agent': security_agent,
-    'coding_standard_agent': coding_standard_agent,
-    'low_system_design_agent': low_system_design_agent,
-    # 'library_compatibility_agent': library_compatibility_agent,
-    'data_structure_algorithms_agent': data_structure_algorithms_agent,   
-}
+async def implement_in_shards(ctx: NemoContext, plan: str, subtasks: List[Subtask]) -> str:
+    """
+    Implement file-disjoint subtasks concurrently, each with its own senior agent in a separate
+    `git worktree`, then merge their patches into the main checkout.
+
+    A subtask whose patch touches a file another subtask already changed (or no longer applies)
+    is re-run afterwards in the main checkout by the workflow's senior agent.
+    """
+    print(f"🔀 Implementing {len(subtasks)} file-disjoint subtasks in parallel worktrees")
+    metrics.gauge("implementation_shards", len(subtasks))
+    shard_names = [f"{ctx.project_name}.shard-{i + 1}" for i in range(len(subtasks))]
+    base_patch = await asyncio.to_thread(capture_worktree_patch, ctx.repo_path)
+
+    async def run_shard(index: int) -> Dict[str, str]:
+        shard_name, subtask = shard_names[index], subtasks[index]
+        await asyncio.to_thread(add_worktree, ctx.repo_path, f"/tmp/{shard_name}", base_patch)
+        task = build_impl_task(ctx.jira_story, rebase_paths(plan, ctx.project_name, shard_name), subtask, shard_name)
+        with timed("implementation_shard_seconds", shard=index + 1):
+            summary = str(await ctx.build_senior_agent(shard_name).invoke_async(task))
+        return {
+            "summary": rebase_paths(summary, shard_name, ctx.project_name),
+            "patch": await asyncio.to_thread(capture_worktree_patch, f"/tmp/{shard_name}"),
+        }
+
+    try:
+        results = await asyncio.gather(*[run_shard(i) for i in range(len(subtasks))], return_exceptions=True)
+    finally:
+        await asyncio.gather(*[asyncio.to_thread(remove_worktree, ctx.repo_path, f"/tmp/{name}") for name in shard_names])
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+    conflicts = await asyncio.to_thread(merge_shard_patches, ctx.repo_path, [result["patch"] for result in results])
+    for index in conflicts:
+        print(f"⚠️ Subtask {index + 1} conflicts with another subtask, re-running it in the main checkout")
+        metrics.incr("implementation_shard_conflicts")
+        task = build_impl_task(ctx.jira_story, plan, subtasks[index], ctx.project_name)
+        results[index]["summary"] = str(await ctx.get_senior_agent().invoke_async(task))
+
+    return "\n\n".join(
+        f"Subtask {i + 1} ({', '.join(subtask.files)}):\n{result['summary']}"
+        for i, (subtask, result) in enumerate(zip(subtasks, results))
+    )
+
+async def implement_speculatively(ctx: NemoContext, plan: str, candidates: int) -> str:
+    """
+    Best-of-N: run `candidates` senior agents concurrently, each in its own `git worktree` and
+    with the next model / temperature from NEMO_SPECULATIVE_MODELS / NEMO_SPECULATIVE_TEMPERATURES.
+
+    Every finished candidate is linted and scored by the story scoring agent. Once one scores at
+    least SPECULATIVE_SCORE_THRESHOLD the others are cancelled; otherwise all are awaited. The
+    best (highest score, then fewest lint errors) is applied to the main checkout.
+    """
+    print(f"🎲 Running {candidates} speculative implementations")
+    names = [f"{ctx.project_name}.candidate-{i + 1}" for i in range(candidates)]
+    base_patch = await asyncio.to_thread(capture_worktree_patch, ctx.repo_path)
+
+    async def run_candidate(index: int) -> Dict[str, Any]:
+        name = names[index]
+        model_id = SPECULATIVE_MODELS[index % len(SPECULATIVE_MODELS)] if SPECULATIVE_MODELS else CLAUDE_SONNET_4
+        temperature = SPECULATIVE_TEMPERATURES[index % len(SPECULATIVE_TEMPERATURES)] if SPECULATIVE_TEMPERATURES else None
+        candidate_plan = rebase_paths(plan, ctx.project_name, name)
+
+        with timed("speculative_candidate_seconds", candidate=index + 1):
+            agent = ctx.build_senior_agent(name, model=get_model(model_id, temperature))
+            summary = str(await agent.invoke_async(build_impl_task(ctx.jira_story, candidate_plan)))
+            manifest = await asyncio.to_thread(get_manifest, project_name=name, py_only=True)
+            code_diffs = await asyncio.to_thread(format_manifest_code_diffs, manifest)
+            lint_results, score = await asyncio.gather(
+                run_lint(manifest),
+                build_story_scoring_agent().invoke_async(build_score_task(ctx.jira_story, candidate_plan, summary, code_diffs))
+            )
+
+        result = {
+            "candidate": index + 1,
+            "model_id": model_id,
+            "temperature": temperature,
+            "summary": rebase_paths(summary, name, ctx.project_name),
+            "score": parse_story_score(str(score)),
+            "lint_errors": sum(1 for lint in lint_results.values() if lint["pylint"]["returncode"] != 0),
+            "changes": len(manifest.get("changes", [])),
+            "patch": await asyncio.to_thread(capture_worktree_patch, f"/tmp/{name}"),
+        }
+        print(f"🎯 Candidate {result['candidate']} ({model_id}, temperature={temperature}): "
+              f"score {result['score']}, {result['lint_errors']} lint errors, {result['changes']} changes")
+        return result
+
+    # Worktrees are set up before any candidate starts, so cancelling one never races git
+    await asyncio.gather(*[asyncio.to_thread(add_worktree, ctx.repo_path, f"/tmp/{name}", base_patch) for name in names])
+    tasks = [asyncio.create_task(run_candidate(i)) for i in range(candidates)]
+    results: List[Dict[str, Any]] = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                result = await next_done
+            except Exception as e:
+                print(f"⚠️ Speculative candidate failed: {e}")
+                metrics.incr("speculative_candidate_errors")
+                continue
+            results.append(result)
+            if result["changes"] and (result["score"] or 0) >= SPECULATIVE_SCORE_THRESHOLD:
+                print(f"⏹️ Candidate {result['candidate']} reached the score threshold, cancelling the rest")
+                metrics.incr("speculative_early_stops")
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*[asyncio.to_thread(remove_worktree, ctx.repo_path, f"/tmp/{name}") for name in names])
+
+    if not results:
+        raise RuntimeError("Every speculative implementation failed")
+    best = max(results, key=lambda r: (r["changes"] > 0, r["score"] or 0, -r["lint_errors"]))
+    print(f"🏆 Keeping candidate {best['candidate']} of {len(results)} finished")
+    metrics.gauge("speculative_candidates_finished", len(results))
+    if await asyncio.to_thread(merge_shard_patches, ctx.repo_path, [best["patch"]]):
+        raise RuntimeError(f"Could not apply speculative candidate {best['candidate']} to {ctx.repo_path}")
+    return best["summary"]
+
+async def implementation_step(ctx: NemoContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    print("Step 2: Implementation phase")
+    subtasks = partition_plan(inputs['plan'], ctx.project_name, IMPLEMENTATION_SHARDS) if IMPLEMENTATION_SHARDS > 1 else []
+    if ctx.speculative_candidates > 1:
+        change_summary = await implement_speculatively(ctx, inputs['plan'], ctx.speculative_candidates)
+    elif len(subtasks) > 1:
+        change_summary = await implement_in_shards(ctx, inputs['plan'], subtasks)
+    else:
+        change_summary = str(await ctx.get_senior_agent().invoke_async(build_impl_task(ctx.jira_story, inputs['plan'])))
+    print(f"Implementation completed:\\n{change_summary}")
+    return {"change_summary": change_summary, "worktree_patch": await asyncio.to_thread(capture_worktree_patch, ctx.repo_path)}
+
+async def manifest_step(ctx: NemoContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    print("Step 3: Capturing changes via git manifest")
+    change_manifest = await asyncio.to_thread(get_manifest, project_name=ctx.project_name, py_only=True)
+    print(f"Manifest captured {len(change_manifest.get('changes', []))} file changes")
+    return {"change_manifest": change_manifest}
+
+def stop_without_changes(outputs: Dict[str, Any]) -> Optional[str]:
+    if not outputs["change_manifest"].get("changes"):
+        print("No changes detected in manifest!")
+        return "Workflow complete but no changes were made."
+    return None
+
+async def review_in_chunks(chunks: List[str]) -> Dict[str, str]:
+    """
+    Map-reduce review for large change sets: every review role gets a fresh agent per chunk
+    (at most REVIEW_MAX_CONCURRENCY running at once), then a cheap aggregator merges each
+    role's chunk findings into a single report.
+    """
+    print(f"Reviewing {len(chunks)} chunks of changes per review role")
+    metrics.gauge("review_chunks", len(chunks))
+    semaphore = asyncio.Semaphore(REVIEW_MAX_CONCURRENCY)
+
+    async def review_chunk(role: str, index: int, chunk: str) -> str:
+        async with semaphore:
+            with timed("review_chunk_seconds", role=role):
+                review_task = f"""Changes to review (part {index + 1} of {len(chunks)}):\n{chunk}"""
+                return str(await build_review_agent(role).invoke_async(review_task))
+
+    async def review_role(role: str) -> str:
+        findings = await asyncio.gather(*[review_chunk(role, i, chunk) for i, chunk in enumerate(chunks)])
+        aggregator = Agent(
+            name='review_aggregator',
+            model=get_step_model("review_aggregator"),
+            system_prompt=review_aggregator_prompt + review_verdict_prompt,
+            tools=[],
+            callback_handler=None,
+            conversation_manager=create_conversation_manager(),
+            hooks=get_agent_hooks()
+        )
+        aggregate_task = "\n\n".join(f"Findings for part {i + 1}:\n{fb}" for i, fb in enumerate(findings))
+        async with semaphore:
+            return str(await aggregator.invoke_async(aggregate_task))
+
+    results = await asyncio.gather(*[review_role(role) for role in REVIEW_AGENT_PROMPTS])
+    return dict(zip(REVIEW_AGENT_PROMPTS, results))
+
+async def review_step(ctx: NemoContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    print("Step 4: Code review phase")
+
+    code_diffs = await asyncio.to_thread(format_manifest_code_diffs, inputs["change_manifest"])
+    review_task = f"""Changes to review:\n{code_diffs}"""
+    print(f"==>> review_task: \n{review_task}")
+    metrics.observe("review_prompt_tokens", estimate_tokens(review_task), kind="full")
+
+    chunks = chunk_code_diffs(code_diffs, REVIEW_CHUNK_TOKENS) if REVIEW_CHUNK_TOKENS else [code_diffs]
+    if len(chunks) > 1:
+        feedback = await review_in_chunks(chunks)
+    else:
+        review_agents = build_review_agents()
+        feedback_results = await asyncio.gather(*[
+            agent.invoke_async(review_task) for agent in review_agents.values()
+        ])
+        feedback = dict(zip(review_agents.keys(), map(str, feedback_results)))
+
+    for role, fb in feedback.items():
+        print("role", role)
+        print("feedback", fb)
+
+    combined_feedback = '\n'.join([f"{role.upper()}: {fb}" for role, fb in feedback.items() if fb])
+    print(f"Code review completed:\\n{combined_feedback}")
+    print(f"Review findings: {count_findings(feedback)}")
+    return {"feedback": feedback, "combined_feedback": combined_feedback}
+
+def skip_revision_when_approved(inputs: Dict[str, Any]) -> Optional[str]:
+    """Skip revision (and its re-manifest) when no reviewer raised a blocking finding."""
+    if all(review_approved(fb) for fb in inputs["feedback"].values()):
+        return "no blocking review findings"  # Counted in nemo_workflow, once the step was actually skipped
+    return None
+
+async def revise(ctx: NemoContext, plan: str, change_summary: str, feedback: str) -> str:
+    context = (
+        ContextBuilder("revision")
+        .add("Jira Story", ctx.jira_story)
+        .add("Original Plan", plan)
+        .add("Your Implementation Summary", change_summary)
+        .add("Code Review Feedback", feedback)
+        .build()
+    )
+    revise_task = f"""
+    {context}
+    
+    TASK: Address the review feedback by making necessary changes.
+    
+    RULES:
+    1. Fix only the issues mentioned in the feedback
+    2. Stay within the scope of the Jira story
+    """
+
+    revised_summary = str(await ctx.get_senior_agent().invoke_async(revise_task))
+    metrics.incr("revisions_run")
+    ctx.revisions_run += 1
+    print(f"Revisions completed:\\n{revised_summary}")
+    return revised_summary
+
+async def re_review(ctx: NemoContext, delta: str, previous_feedback: Dict[str, str]) -> Dict[str, str]:
+    """
+    Incremental review: each reviewer gets only the hunks changed by the last revision, plus its
+    own previous findings, and reports whether each finding was addressed.
+    """
+    review_agents = build_review_agents()
+
+    async def review(role: str, agent: Agent) -> str:
+        context = (
+            ContextBuilder("re_review")
+            .add("Your Previous Findings", previous_feedback.get(role, ""))
+            .add(f"Changes Since Your Last Review (unified diff, paths relative to {ctx.repo_path})", delta, is_code=True)
+            .build()
+        )
+        review_task = f"""
+    {context}
+    
+    TASK: This is a follow-up review of a revision. For each previous finding, state whether it
+    was ADDRESSED or NOT ADDRESSED by these changes, then flag any new issue the changes introduce.
+    Only the diff above is new; do not re-review unchanged code.
+    The verdict's findings list only what is NOT ADDRESSED plus new issues.
+    """
+        metrics.observe("review_prompt_tokens", estimate_tokens(review_task), kind="delta")
+        return str(await agent.invoke_async(review_task))
+
+    results = await asyncio.gather(*[review(role, agent) for role, agent in review_agents.items()])
+    return dict(zip(review_agents.keys(), results))
+
+async def revision_step(ctx: NemoContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    print("Step 5: Incorporating review feedback")
+
+    before = await asyncio.to_thread(snapshot_worktree, ctx.repo_path)
+    revised_summary = await revise(ctx, inputs['plan'], inputs['change_summary'], inputs['combined_feedback'])
+    change_summary = inputs['change_summary'] + f"\\n\\nRevisions based on feedback:\\n{revised_summary}"
+
+    # Further rounds re-review only what the previous revision changed
+    feedback: Dict[str, str] = inputs['feedback']
+    rounds = 1
+    while rounds < REVIEW_ROUNDS:
+        after = await asyncio.to_thread(snapshot_worktree, ctx.repo_path)
+        delta = await asyncio.to_thread(diff_snapshots, ctx.repo_path, before, after)
+        if not delta:
+            print("Revision made no changes, skipping re-review")
+            break
+        rounds += 1
+        print(f"Step 5.{rounds}: Re-reviewing the revision delta (~{estimate_tokens(delta)} tokens)")
+        feedback = await re_review(ctx, delta, feedback)
+        open_feedback = {role: fb for role, fb in feedback.items() if not review_approved(fb)}
+        if not open_feedback:
+            print("✅ Reviewers approved the revision")
+            metrics.incr("revisions_skipped")
+            ctx.revisions_skipped += 1
+            break
+
+        before = after
+        combined_feedback = '\n'.join(f"{role.upper()}: {fb}" for role, fb in open_feedback.items())
+        revised_summary = await revise(ctx, inputs['plan'], change_summary, combined_feedback)
+        change_summary += f"\\n\\nRevisions based on round {rounds} feedback:\\n{revised_summary}"
+
+    # Update manifest after revisions
+    return {
+        "final_change_summary": change_summary,
+        "final_change_manifest": await asyncio.to_thread(get_manifest, project_name=ctx.project_name, py_only=True),
+        "review_rounds": rounds,
+        "worktree_patch": await asyncio.to_thread(capture_worktree_patch, ctx.repo_path)
+    }
+
+def build_score_task(jira_story: str, plan: str, change_summary: str, code_diffs: str) -> str:
+    context = (
+        ContextBuilder("score")
+        .add("Jira Story", jira_story)
+        .add("Implementation Plan", plan)
+        .add("Changes Manifest", code_diffs, is_code=True)
+        .add("Final Implementation Summary", change_summary)
+        .build()
+    )
+    return f"""
+    {context}
+    
+    Evaluate whether the implementation fulfills the Jira story requirements.
+    Use file_read to review the actual changed code sections from the manifest.
+    """
+
+def parse_story_score(score: str) -> Optional[float]:
+    """The X of the scoring agent's "**Score**: X/10" line."""
+    match = re.search(r"Score\W*(\d+(?:\.\d+)?)\s*/\s*10", score, re.IGNORECASE)
+    return float(match.group(1)) if match else None
+
+async def score_step(ctx: NemoContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    print("Step 6: Story scoring phase")
+    code_diffs = await asyncio.to_thread(format_manifest_code_diffs, inputs["final_change_manifest"])
+
+    score_task = build_score_task(ctx.jira_story, inputs['plan'], inputs['final_change_summary'], code_diffs)
+    score = str(await build_story_scoring_agent().invoke_async(score_task))
+    print(f"Story score: {score}")
+    return {"score": score}
+
+async def doc_step(ctx: NemoContext, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    print("Step 7: Generating PR documentation")
+    code_diffs = await asyncio.to_thread(format_manifest_code_diffs, inputs["final_change_manifest"])
+
+    doc_agent = Agent(
+        name='doc_agent',
+        model=get_step_model("doc"),
+        system_prompt=doc_prompt.format(
+            project_name=ctx.project_name,
+            jira_story_id=ctx.jira_story_id
+        ),
+        tools=[file_write, file_read, shell, read_tool_output],
+        callback_handler=None,
+        conversation_manager=create_conversation_manager(),
+        hooks=get_agent_hooks()
+    )
+
+    context = (
+        ContextBuilder("doc")
+        .add("Story Details", ctx.jira_story)
+        .add("Implementation Plan", inputs['plan'])
+        .add("Changes Summary", inputs['final_change_summary'])
+        .add("Changes Manifest", code_diffs, is_code=True)
+        .add("Story Score", inputs['score'])
+        .build()
+    )
+    doc_task = f"""
+    Generate PR body for Jira Story: {ctx.jira_story_id}
+    
+    {context}
+    
+    Create a comprehensive PR body markdown file at /tmp/{ctx.project_name}/{ctx.jira_story_id}.md
+    """
+    doc_result = str(await doc_agent.invoke_async(doc_task))
+    print(f"doc_result", doc_result)
+    print("PR documentation generated successfully")
+    return {"doc_result": doc_result, "worktree_patch": await asyncio.to_thread(capture_worktree_patch, ctx.repo_path)}
+
+def build_nemo_steps() -> List[Step]:
+    """
+    The nemo_workflow graph. Score runs once revision (or its passthrough on the fast path) is
+    done, and doc after it, since the PR body includes the story score.
+    """
+    return [
+        Step("plan", plan_step, outputs=["plan"]),
+        Step("implementation", implementation_step, inputs=["plan"], outputs=["change_summary"]),
+        Step("manifest", manifest_step, inputs=["change_summary"], outputs=["change_manifest"], stop_when=stop_without_changes),
+        Step("review", review_step, inputs=["change_manifest"], outputs=["feedback", "combined_feedback"]),
+        Step(
+            "revision", revision_step,
+            inputs=["plan", "change_summary", "change_manifest", "feedback", "combined_feedback"],
+            outputs=["final_change_summary", "final_change_manifest"],
+            passthrough={"final_change_summary": "change_summary", "final_change_manifest": "change_manifest"},
+            skip_when=skip_revision_when_approved
+        ),
+        Step("score", score_step, inputs=["plan", "final_change_summary", "final_change_manifest"], outputs=["score"]),
+        Step("doc", doc_step, inputs=["plan", "final_change_summary", "final_change_manifest", "score"], outputs=["doc_result"]),
+    ]
 
 @retry(
     stop=stop_after_attempt(1),
@@ -264,179 +767,88 @@ review_agents = {
     retry=retry_if_exception_type((httpx.ReadTimeout, httpcore.ReadTimeout, Exception)),
     before_sleep=lambda retry_state: print(f"Retrying workflow, attempt {retry_state.attempt_number}...")
 )
-async def nemo_workflow(project_name: str, jira_story: str, jira_story_id: str) -> str:
-    """Entry point for the Nemo AI workflow."""
+async def nemo_workflow(
+    project_name: str,
+    jira_story: str,
+    jira_story_id: str,
+    mcp_tools: Optional[Dict[str, List[Any]]] = None,
+    checkpoint: Optional[WorkflowCheckpoint] = None,
+    skip_review: bool = False,
+    graph_config: Optional[GraphConfig] = None,
+    speculative_candidates: Optional[int] = None
+) -> str:
+    """
+    Entry point for the Nemo AI workflow.
 
-    print("Initializing Context7 MCP client...")
-    context7_mcp = MCPClient(lambda: streamablehttp_client("https://mcp.context7.com/mcp"))
-    aws_documentation_mcp = MCPClient(lambda: streamablehttp_client("https://knowledge-mcp.global.api.aws"))
+    The steps are declared in `build_nemo_steps` and run by a StepGraph, which starts each
+    step as soon as its inputs exist. `graph_config` (or NEMO_WORKFLOW_GRAPH_CONFIG) can
+    skip, reorder or add steps.
 
-    try:
-        with context7_mcp, aws_documentation_mcp:
-            print("✅ Context7 client connected successfully")
-            print("✅ AWS Documentation MCP client connected successfully")
+    `mcp_tools` overrides the MCP tools. When omitted, they come from the process-wide
+    MCP pool, which keeps sessions open between workflows.
 
-            try:
-                context7_tools = context7_mcp.list_tools_sync()
-                aws_documentation_tools = aws_documentation_mcp.list_tools_sync()
-                print(f"✅ AWS Documentation MCP {len(aws_documentation_tools)} tools available")
-                print(f"✅ Context7 MCP {len(context7_tools)} tools available")
-            except Exception as e:
-                print(f"❌ Failed to load AWS Documentation MCP or Context7 MCP tools: {e}")
-                raise  
-
-            print("Step 1: Planning phase")
-            repo_path = f'/tmp/{project_name}'
-            file_context = filter_files(repo_path)
-            
-            planner_agent = Agent(
-                name='planner_engineer',
-                model=claude_sonnet_4,
-                system_prompt=planner_prompt.format(project_name=project_name, file_context=file_context),
-                tools=[file_read, shell, *aws_documentation_tools],
-                callback_handler=None
-            )
-            plan = str(planner_agent(jira_story))
-            print(f"Plan created:\\n{plan}")
-
-            print("Step 2: Implementation phase")
-            senior_agent = Agent(
-                name='senior_software_engineer',
-                model=claude_sonnet_4,
-                system_prompt=senior_engineer_prompt.format(project_name=project_name),
-                tools=[editor, file_read, file_write, shell, *context7_tools, *aws_documentation_tools],
-                callback_handler=None
-            )
-            
-            impl_task = f"""
-            Jira Story: {jira_story}
-            
-            Implementation Plan:
-            {plan}
-            
-            CRITICAL RULES:
-            1. Implement ONLY what is specified in the Jira story
-            2. Do NOT modify unrelated code
-            3. Do NOT add extra features or improvements
-            """
-            
-            change_summary = str(senior_agent(impl_task))
-            print(f"Implementation completed:\\n{change_summary}")
-
-            print("Step 3: Capturing changes via git manifest")
-            change_manifest = get_manifest(project_name=project_name, py_only=True)
-            
-            if not change_manifest.get("changes"):
-                print("No changes detected in manifest!")
-                return "Workflow complete but no changes were made."
-            
-            print(f"Manifest captured {len(change_manifest.get('changes', []))} file changes")
-
-            print("Step 4: Code review phase")
-            
-            code_diffs = format_manifest_code_diffs(change_manifest) 
-            review_task = f"""Changes to review:\n{code_diffs}"""
-            print(f"==>> review_task: \n{review_task}")
-            
-            start_time = time.perf_counter()
-            feedback_results = await asyncio.gather(*[
-                agent.invoke_async(review_task) for agent in review_agents.values()
-            ])
-            feedback = dict(zip(review_agents.keys(), map(str, feedback_results)))
-            end_time = time.perf_counter()
-            print(f"Review agents feedback completed in {end_time - start_time:.2f} seconds")
-
-            for role, fb in feedback.items():
-                print("role", role)
-                print("feedback", fb)
-
-            combined_feedback = '\n'.join([f"{role.upper()}: {fb}" for role, fb in feedback.items() if fb])
-            print(f"Code review completed:\\n{combined_feedback}")
-
-            print("Step 5: Incorporating review feedback")
-            
-            revise_task = f"""
-            Jira Story: {jira_story}
-            
-            Original Plan: {plan}
-            
-            Your Implementation Summary: {change_summary}
-            
-            Code Review Feedback: {combined_feedback}
-            
-            TASK: Address the review feedback by making necessary changes.
-            
-            RULES:
-            1. Fix only the issues mentioned in the feedback
-            2. Stay within the scope of the Jira story
-            """
-            
-            revised_summary = str(senior_agent(revise_task))
-            print(f"Revisions completed:\\n{revised_summary}")
-            change_summary += f"\\n\\nRevisions based on feedback:\\n{revised_summary}"
-            
-            # Update manifest after revisions
-            change_manifest = get_manifest(project_name=project_name, py_only=True)
-            code_diffs = format_manifest_code_diffs(change_manifest) 
-
-            print("Step 6: Story scoring phase")
-               
-            score_task = f"""
-            Jira Story: {jira_story}
-            
-            Implementation Plan: {plan}
-            
-            Changes Manifest: {code_diffs}
-            
-            Final Implementation Summary: {change_summary}
-            
-            Evaluate whether the implementation fulfills the Jira story requirements.
-            Use file_read to review the actual changed code sections from the manifest.
-            """
-            score = str(story_scoring_agent(score_task))
-            print(f"Story score: {score}")
-
-            print("Step 7: Generating PR documentation")
-
-            doc_agent = Agent(
-                name='doc_agent',
-                model=bedrock_nova_pro_model,
-                system_prompt=doc_prompt.format(
-                    project_name=project_name,
-                    jira_story_id=jira_story_id
-                ),
-                tools=[file_write, file_read, shell],
-                callback_handler=None
-            )
-            
-            doc_task = f"""
-            Generate PR body for Jira Story: {jira_story_id}
-            
-            Story Details: {jira_story}
-            
-            Implementation Plan: {plan}
-            
-            Changes Summary: {change_summary}
-            
-            Changes Manifest: {code_diffs}
-            
-            Story Score: {score}
-            
-            Create a comprehensive PR body markdown file at /tmp/{project_name}/{jira_story_id}.md
-            """
-            doc_result = str(doc_agent(doc_task))
-            print(f"doc_result", doc_result)
-            print("PR documentation generated successfully")
-            
-            return json.dumps({
-                "status": "success",
-                "jira_story_id": jira_story_id,
-                "changes_count": len(change_manifest.get('changes', [])),
-                "score": score,
-                "pr_doc_path": f"/tmp/{project_name}/{jira_story_id}.md"
-            }, indent=2)
+    Each step's output is saved to `checkpoint` as soon as it completes, so a retry or a
+    redelivered message resumes at the first unfinished step.
+
+    `skip_review` runs the reduced pipeline chosen by the router for small stories:
+    review is skipped and revision passes the unrevised change through.
+
+    `speculative_candidates` (default NEMO_SPECULATIVE_CANDIDATES) above 1 implements the
+    story best-of-N for high-value stories, see `implement_speculatively`.
+    """
+    if checkpoint is None:
+        checkpoint = WorkflowCheckpoint(create_checkpoint_store(), key=f"{project_name}-{jira_story_id}")
+    graph_config = graph_config or load_graph_config()
+    if skip_review:
+        graph_config = replace(graph_config, skip=graph_config.skip | {"review"})
+
+    try:
+        if mcp_tools is None:
+            mcp_tools = await get_mcp_pool().get_tools_async()
+
+        ctx = NemoContext(
+            project_name=project_name,
+            jira_story=jira_story,
+            jira_story_id=jira_story_id,
+            # Documentation lookups repeat across stories, serve them from the on-disk tool cache
+            context7_tools=cache_tools(mcp_tools["context7"]),
+            aws_documentation_tools=cache_tools(mcp_tools["aws_documentation"]),
+            speculative_candidates=int(speculative_candidates or SPECULATIVE_CANDIDATES),
+        )
+        await asyncio.to_thread(resume_from_checkpoint, checkpoint, ctx.repo_path)
+
+        graph = StepGraph(build_nemo_steps(), config=graph_config)
+        try:
+            values = await graph.run(ctx, initial={}, checkpoint=checkpoint)
+        except StopWorkflow as stop:
+            return stop.message
+
+        # Skipped by `skip_revision_when_approved`, rather than disabled or after a skipped review
+        revision_skipped_on_approval = (
+            "revision" in values["skipped_steps"]
+            and "review" not in values["skipped_steps"]
+            and "revision" not in graph_config.skip
+        )
+        if revision_skipped_on_approval:
+            metrics.incr("revisions_skipped")
+        return json.dumps({
+            "status": "success",
+            "jira_story_id": jira_story_id,
+            "changes_count": len(values["final_change_manifest"].get('changes', [])),
+            "score": values.get("score"),
+            "resumed_steps": values["resumed_steps"],
+            "skipped_steps": values["skipped_steps"],
+            "revisions": {
+                "skipped": "revision" in values["skipped_steps"],
+                # This run only, including re-review rounds that ended without a revision
+                "skipped_total": ctx.revisions_skipped + int(revision_skipped_on_approval),
+                "run_total": ctx.revisions_run,
+            },
+            "step_timings": values["step_timings"],
+            "pr_doc_path": f"/tmp/{project_name}/{jira_story_id}.md"
+        }, indent=2)
 
     except Exception as e:
         print(f"Workflow failed: {str(e)}")
         print(traceback.format_exc())
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,122 @@
+import os
+import re
+import shutil
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from lint_engine import release_lint_workspace
+
+# Throwaway identity for the base commit made inside shard worktrees (never pushed)
+GIT_IDENTITY = ["-c", "user.name=nemo-ai", "-c", "user.email=nemo-ai@localhost"]
+
+@dataclass
+class Subtask:
+    """A slice of the plan that only touches `files` (repo-relative)."""
+    files: List[str]
+    steps: List[str] = field(default_factory=list)
+
+def extract_plan_files(text: str, project_name: str) -> Set[str]:
+    """Repo-relative paths of every `/tmp/<project_name>/...` file mentioned in `text`."""
+    return set(re.findall(rf"/tmp/{re.escape(project_name)}/([\w./-]*\w\.\w+)", text))
+
+def partition_plan(plan: str, project_name: str, max_shards: int) -> List[Subtask]:
+    """
+    Split the planner's output into at most `max_shards` file-disjoint subtasks.
+
+    Plan lines are grouped by the files they mention; a line naming several files joins them
+    into one group, so no file ends up in two subtasks. Groups are then spread over the shards,
+    largest first. Lines that mention no file stay out of the subtasks (every shard still sees
+    the full plan for context).
+    """
+    lines = plan.splitlines()
+    parent: Dict[str, str] = {}
+
+    def find(path: str) -> str:
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    line_files = []
+    for line in lines:
+        files = sorted(extract_plan_files(line, project_name))
+        for path in files:
+            parent.setdefault(path, path)
+        for path in files[1:]:
+            parent[find(path)] = find(files[0])
+        line_files.append(files)
+
+    groups: Dict[str, Dict[str, Set]] = {}
+    for index, files in enumerate(line_files):
+        if files:
+            group = groups.setdefault(find(files[0]), {"files": set(), "lines": set()})
+            group["files"].update(files)
+            group["lines"].add(index)
+
+    shards: List[Dict[str, Set]] = [{"files": set(), "lines": set()} for _ in range(min(max_shards, len(groups)))]
+    for group in sorted(groups.values(), key=lambda g: len(g["lines"]), reverse=True):
+        shard = min(shards, key=lambda s: len(s["lines"]))
+        shard["files"] |= group["files"]
+        shard["lines"] |= group["lines"]
+
+    return [Subtask(sorted(s["files"]), [lines[i].strip() for i in sorted(s["lines"])]) for s in shards]
+
+def rebase_paths(text: str, from_project: str, to_project: str) -> str:
+    return text.replace(f"/tmp/{from_project}/", f"/tmp/{to_project}/")
+
+def _git(args: List[str], cwd: str, patch: Optional[str] = None) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=cwd, input=patch, text=True, capture_output=True)
+
+def add_worktree(repo_path: str, worktree_path: str, base_patch: str = "") -> None:
+    """
+    Check out HEAD of `repo_path` into a detached worktree at `worktree_path`.
+
+    Uncommitted changes of the main checkout (`base_patch`) are applied and committed in the
+    worktree, so the shard's own changes can later be captured as a patch on top of them.
+    """
+    remove_worktree(repo_path, worktree_path)
+    result = _git(["worktree", "add", "--detach", worktree_path, "HEAD"], cwd=repo_path)
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not create worktree {worktree_path}: {result.stderr.strip()}")
+    if base_patch:
+        for args, patch in (
+            (["apply", "--binary", "--whitespace=nowarn", "-"], base_patch),
+            (["add", "-A"], None),
+            ([*GIT_IDENTITY, "commit", "--no-verify", "-q", "-m", "nemo: base changes"], None),
+        ):
+            result = _git(args, cwd=worktree_path, patch=patch)
+            if result.returncode != 0:
+                raise RuntimeError(f"Could not prepare worktree {worktree_path}: {result.stderr.strip()}")
+
+def remove_worktree(repo_path: str, worktree_path: str) -> None:
+    _git(["worktree", "remove", "--force", worktree_path], cwd=repo_path)
+    if os.path.exists(worktree_path):
+        shutil.rmtree(worktree_path, ignore_errors=True)
+    _git(["worktree", "prune"], cwd=repo_path)
+    release_lint_workspace(worktree_path)
+
+def patch_files(patch: str) -> Set[str]:
+    return set(re.findall(r"^diff --git a/(\S+) b/", patch, re.MULTILINE))
+
+def merge_shard_patches(repo_path: str, patches: List[str]) -> List[int]:
+    """
+    Apply each shard's patch to the main checkout, in order.
+
+    A patch that touches a file an earlier patch already changed, or that does not apply
+    cleanly, is left out. Returns the indexes of those conflicting patches.
+    """
+    merged_files: Set[str] = set()
+    conflicts = []
+    for index, patch in enumerate(patches):
+        if not patch:
+            continue
+        files = patch_files(patch)
+        if files & merged_files or _git(["apply", "--binary", "--check", "--whitespace=nowarn", "-"], repo_path, patch).returncode != 0:
+            conflicts.append(index)
+            continue
+        result = _git(["apply", "--binary", "--whitespace=nowarn", "-"], repo_path, patch)
+        if result.returncode != 0:
+            raise RuntimeError(f"Could not merge shard {index}: {result.stderr.strip()}")
+        merged_files |= files
+    return conflicts